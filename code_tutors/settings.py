@@ -58,15 +58,24 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tutorials.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'tutorials.middleware.ProfileMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Loads the role profiles along with the session user for ProfileMiddleware.
+# ModelBackend stays listed so sessions stored under its path still authenticate.
+AUTHENTICATION_BACKENDS = [
+    'tutorials.middleware.ProfileBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 ROOT_URLCONF = 'code_tutors.urls'
 
 TEMPLATES = [
@@ -80,6 +89,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'tutorials.context_processors.unread_messages',
             ],
         },
     },
@@ -169,3 +179,28 @@ if ENVIRONMENT == 'production':
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = Path(BASE_DIR / 'media')
+
+# Messages older than this many days are moved to the archive by archive_messages
+MESSAGE_ARCHIVE_AFTER_DAYS = 365
+
+# Per-request SQL logging and Server-Timing headers from QueryInstrumentationMiddleware
+QUERY_INSTRUMENTATION = ENVIRONMENT != 'production'
+
+# Most queries the view behind each URL name may run per request
+QUERY_BUDGETS = {
+    'dashboard': 20,
+    'calendar': 10,
+    'tutor_calendar': 10,
+    'all_messages': 10,
+    'message_thread': 15,
+    'conversation': 10,
+    'search_messages': 10,
+    'manage_languages': 20,
+    'create_invoice': 25,
+    'invoice_detail': 10,
+    'student_invoices': 10,
+    'student_list': 10,
+}
+
+# What a request over its budget does: 'warn' logs a warning, 'raise' fails it
+QUERY_BUDGET_ACTION = 'raise' if ENVIRONMENT == 'test' else 'warn'
@@ -39,11 +39,19 @@ urlpatterns = [
     path('message/send/<int:reply_id>/', views.SendMessageView.as_view(), name='reply_message'),
     path('messages/', views.AllMessagesView.as_view(), name='all_messages'),
     path('messages/<int:pk>/', views.MessageDetailView.as_view(), name='message_detail'),
+    path('messages/<int:pk>/thread/', views.MessageThreadView.as_view(), name='message_thread'),
+    path('messages/conversations/<int:pk>/', views.ConversationView.as_view(), name='conversation'),
+    path('messages/broadcast/', views.broadcast_message, name='broadcast_message'),
+    path('messages/updates/', views.message_updates, name='message_updates'),
+    path('messages/search/', views.search_messages, name='search_messages'),
+    path('api/users/suggest', views.suggest_users, name='suggest_users'),
 
     path('invoice/<int:invoice_id>/approve/', views.approve_invoice, name='approve_invoice'),
+    path('invoices/bulk/', views.bulk_update_invoices, name='bulk_update_invoices'),
 
     #dashboard tools (admin)
     path('user/<int:user_id>/delete/', views.delete_user, name='delete_user'),
+    path('users/roles/', views.bulk_update_user_roles, name='bulk_update_user_roles'),
     path('user/<int:user_id>/update-role/', views.update_user_role, name='update_user_role'),
 
     path('calendar/', views.calendar_view, name='calendar'),
@@ -62,6 +70,11 @@ urlpatterns = [
     path('invoices/<int:invoice_id>/', views.invoice_detail, name='invoice_detail'),
     path('invoices/pay/<int:invoice_id>/', views.pay_invoice, name='pay_invoice'),
 
+    # Accounting exports (admin)
+    path('exports/<str:dataset>.<str:fmt>', views.export_records, name='export_records'),
+
+    path('reports/revenue/', views.revenue_report, name='revenue_report'),
+
     # Student Invoice List
     path('my-invoices/', views.student_invoices, name='student_invoices'),
 
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import User, Language, Tutor, Student, Invoice, Lesson, TutorAvailability, Message, StudentRequest
+from .models import User, Language, Tutor, Student, Invoice, InvoiceLine, Lesson, TutorAvailability, Message, MessageArchive, StudentRequest
+from .search import matching_message_ids
 # Register your models here.
 
 
@@ -21,10 +22,14 @@ class LanguageAdmin(admin.ModelAdmin):
 @admin.register(Tutor)
 class TutorAdmin(admin.ModelAdmin):
     list_display = ('id', 'UserID', 'get_languages') 
+    list_select_related = ('UserID',)
     search_fields = ('user__username', 'user__email')  
     autocomplete_fields = ['UserID']   
     filter_horizontal = ['languages'] 
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('languages')
+
     def get_languages(self, obj):
         """Display the languages taught by the tutor."""
         return ", ".join([language.name for language in obj.languages.all()])
@@ -34,21 +39,47 @@ class TutorAdmin(admin.ModelAdmin):
 @admin.register(Student)
 class StudentAdmin(admin.ModelAdmin):
     list_display = ('id', 'UserID') 
+    list_select_related = ('UserID',)
     search_fields = ('user__username', 'user__email')  
     autocomplete_fields = ['UserID']  
 
 
+class InvoiceLineInline(admin.TabularInline):
+    """Read-only lesson snapshots taken when the invoice was issued."""
+    model = InvoiceLine
+    extra = 0
+    can_delete = False
+    readonly_fields = ('date', 'time', 'language_name', 'tutor_name', 'duration', 'price')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Invoice)
 class InvoiceAdmin(admin.ModelAdmin):
+    inlines = [InvoiceLineInline]
     list_display = ('id', 'student', 'tutor', 'total_amount', 'paid', 'date_issued', 'date_paid')  
+    list_select_related = ('student__UserID', 'tutor__UserID')
     list_filter = ('paid', 'date_issued')  
     search_fields = ('student__UserID__username', 'tutor__UserID__username')  
     date_hierarchy = 'date_issued' 
+    actions = ['approve_selected', 'mark_selected_paid']
+
+    @admin.action(description="Approve selected invoices")
+    def approve_selected(self, request, queryset):
+        changed = Invoice.approve(list(queryset.values_list('id', flat=True)))
+        self.message_user(request, f"{changed} invoice(s) approved.")
+
+    @admin.action(description="Mark selected invoices as paid")
+    def mark_selected_paid(self, request, queryset):
+        changed = Invoice.mark_paid(list(queryset.values_list('id', flat=True)))
+        self.message_user(request, f"{changed} invoice(s) marked as paid.")
 
 
 @admin.register(Lesson)
 class LessonAdmin(admin.ModelAdmin):
     list_display = ('id', 'tutor', 'student', 'invoice','language', 'date', 'time', 'venue', 'duration', 'frequency', 'term', 'created_at')
+    list_select_related = ('tutor__UserID', 'student__UserID', 'invoice', 'language')
     list_filter = ('frequency', 'term', 'date') 
     search_fields = ('tutor__UserID__username', 'student__UserID__username', 'language__name')  
     autocomplete_fields = ['tutor', 'student', 'language'] 
@@ -56,6 +87,7 @@ class LessonAdmin(admin.ModelAdmin):
 @admin.register(StudentRequest)
 class StudentRequestAdmin(admin.ModelAdmin):
     list_display = ('student', 'language', 'is_allocated', 'created_at', 'term', 'frequency')  
+    list_select_related = ('student__UserID', 'language')
     list_filter = ('is_allocated', 'term', 'frequency', 'language') 
     search_fields = ('student__UserID__username', 'language__name', 'description') 
     ordering = ('-created_at',)  
@@ -64,8 +96,17 @@ class StudentRequestAdmin(admin.ModelAdmin):
 class MessageAdmin(admin.ModelAdmin):
     """Admin view for the Message model."""
     list_display = ('sender', 'recipient', 'subject', 'created_at', 'get_previous_message','get_reply')
-    search_fields = ('subject', 'content', 'sender__username', 'recipient__username','get_previous_message', 'get_reply')
+    list_select_related = ('sender', 'recipient', 'previous_message', 'reply')
+    search_fields = ('subject', 'sender__username', 'recipient__username')
     ordering = ('-created_at',)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Match message bodies through the full-text index instead of LIKE."""
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        matching_ids = matching_message_ids(search_term)
+        if matching_ids is not None:
+            results |= queryset.filter(id__in=matching_ids)
+        return results, may_have_duplicates
     def get_previous_message(self, obj):
         """Display the previous message in a human-readable format."""
         return obj.previous_message.subject if obj.previous_message else "None"
@@ -76,10 +117,42 @@ class MessageAdmin(admin.ModelAdmin):
         return obj.reply.subject if obj.reply else "None"
     get_reply.subject = "Reply Message"
 
+@admin.register(MessageArchive)
+class MessageArchiveAdmin(admin.ModelAdmin):
+    """Read-only admin view of archived messages."""
+    list_display = ('sender', 'recipient', 'subject', 'created_at', 'archived_at')
+    list_select_related = ('sender', 'recipient')
+    search_fields = ('subject', 'sender__username', 'recipient__username')
+    ordering = ('-created_at',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+class TutorListFilter(admin.SimpleListFilter):
+    """Tutor filter whose options are read with one query rather than one per tutor."""
+    title = 'tutor'
+    parameter_name = 'tutor__id__exact'
+
+    def lookups(self, request, model_admin):
+        tutors = Tutor.objects.order_by('UserID__last_name', 'UserID__first_name').values_list(
+            'id', 'UserID__first_name', 'UserID__last_name'
+        )
+        return [(tutor_id, f"{first_name} {last_name}") for tutor_id, first_name, last_name in tutors]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(tutor_id=self.value())
+        return queryset
+
+
 @admin.register(TutorAvailability)
 class TutorAvailability(admin.ModelAdmin):
     list_display = ('tutor', 'day', 'start_time', 'end_time', 'action', 'availability_status')
-    list_filter = ('tutor', 'action', 'availability_status', )
+    list_select_related = ('tutor__UserID',)
+    list_filter = (TutorListFilter, 'action', 'availability_status', )
     search_fields = ('tutor__UserID__username', 'day', 'availability_status')
 
 
@@ -0,0 +1,111 @@
+"""Move old messages from the hot Message table into MessageArchive."""
+from collections import Counter
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from .models import THREAD_LINK_SQL, Conversation, Message, MessageArchive, UnreadCounter
+
+ARCHIVE_BATCH_SIZE = 1000
+ARCHIVE_FIELDS = (
+    'id', 'recipient_id', 'sender_id', 'subject', 'content', 'created_at',
+    'read_at', 'previous_message_id', 'reply_id', 'broadcast_id',
+)
+
+
+def protected_ids(cutoff):
+    """Return a RawSQL selecting old messages whose thread reaches a message newer than cutoff.
+
+    Threads are archived whole, so these stay in the hot table until every
+    message in their thread is old enough.
+    """
+    table = connection.ops.quote_name(Message._meta.db_table)
+    return RawSQL(
+        f"""
+        WITH RECURSIVE protected(id) AS (
+            SELECT linked.id
+            FROM {table} node
+            JOIN {table} linked ON ({THREAD_LINK_SQL})
+            WHERE node.created_at >= %s AND linked.created_at < %s
+            UNION
+            SELECT linked.id
+            FROM protected
+            JOIN {table} node ON node.id = protected.id
+            JOIN {table} linked ON ({THREAD_LINK_SQL})
+            WHERE linked.created_at < %s
+        )
+        SELECT id FROM protected
+        """,
+        (cutoff, cutoff, cutoff),
+    )
+
+
+def _protected(cutoff):
+    """Evaluate protected_ids once and return the ids as a set."""
+    return set(Message.objects.filter(id__in=protected_ids(cutoff)).values_list('id', flat=True))
+
+
+def _release_unread(batch):
+    """Take unread messages about to be archived off the unread counters."""
+    unread = Counter(
+        (recipient_id, sender_id)
+        for _, recipient_id, sender_id, read_at in batch
+        if read_at is None and recipient_id is not None
+    )
+    per_recipient = Counter()
+    for (recipient_id, sender_id), count in unread.items():
+        per_recipient[recipient_id] += count
+        if sender_id is not None:
+            Conversation.mark_read(recipient_id, sender_id, count)
+    for recipient_id, count in per_recipient.items():
+        UnreadCounter.adjust(recipient_id, -count)
+
+
+def archive_messages(cutoff, batch_size=ARCHIVE_BATCH_SIZE, progress=None):
+    """Archive every message older than cutoff whose whole thread is older too.
+
+    All rows are copied first and only then deleted, both in batches. Copying
+    first keeps the reply links intact, because deleting a message nulls the
+    links that point to it from the hot table. The copy ignores rows that are
+    already archived, so an interrupted run can simply be repeated. The
+    protected threads are worked out once per pass rather than per batch, and
+    batches step through the old messages by id. Returns the number of
+    messages removed from the hot table.
+    """
+    archived_at = timezone.now()
+    old = Message.objects.filter(created_at__lt=cutoff).order_by('id')
+
+    protected = _protected(cutoff)
+    last_id = 0
+    while True:
+        rows = list(old.filter(id__gt=last_id).values(*ARCHIVE_FIELDS)[:batch_size])
+        if not rows:
+            break
+        last_id = rows[-1]['id']
+        rows = [row for row in rows if row['id'] not in protected]
+        MessageArchive.objects.bulk_create(
+            [MessageArchive(archived_at=archived_at, **row) for row in rows], ignore_conflicts=True
+        )
+        if progress and rows:
+            progress('copied', len(rows))
+
+    # Threads that got a recent reply while copying stay hot as well
+    protected = _protected(cutoff)
+    copied = old.filter(id__in=MessageArchive.objects.values('id'))
+    last_id = 0
+    removed = 0
+    while True:
+        with transaction.atomic():
+            batch = list(copied.filter(id__gt=last_id).values_list('id', 'recipient_id', 'sender_id', 'read_at')[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            batch = [row for row in batch if row[0] not in protected]
+            _release_unread(batch)
+            Message.objects.filter(id__in=[row[0] for row in batch]).delete()
+        removed += len(batch)
+        if progress and batch:
+            progress('removed', len(batch))
+
+    # Drop the copies of messages that stayed hot, so each lives in one table only
+    MessageArchive.objects.filter(id__in=Message.objects.values('id')).delete()
+    return removed
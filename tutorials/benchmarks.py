@@ -0,0 +1,345 @@
+"""Seed a large deterministic dataset and measure end-to-end latency of the main pages."""
+import math
+import random
+import subprocess
+import time as clock
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time, timedelta
+from decimal import Decimal
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+from django.db.models import DecimalField, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.test import Client
+from django.urls import reverse
+from .language_index import language_index
+from .models import (
+    Conversation, Invoice, Language, Lesson, Message, Student, StudentRequest, Tutor, TutorAvailability,
+    UnreadCounter, User, email_hash,
+)
+from .profiles import sync_profiles
+from .query_stats import QueryRecorder
+from .reference_data import reference_data
+from .rollups import rebuild_rollups
+from .user_suggestions import user_index
+
+BENCHMARK_PREFIX = '@bench'
+BENCHMARK_BATCH_SIZE = 5000
+# Lessons fall within this many days either side of the anchor, so the dataset never depends on today
+ANCHOR_DATE = date(2025, 1, 6)
+LESSON_SPREAD_DAYS = 180
+LANGUAGES = ('python', 'java', 'scala', 'kotlin', 'c++', 'django', 'rust', 'go', 'haskell', 'ruby')
+PRICES = (Decimal('20.00'), Decimal('25.00'), Decimal('30.00'), Decimal('40.00'))
+PERCENTILES = (50, 95, 99)
+# The host the benchmark clients send, so ALLOWED_HOSTS need not include 'testserver'
+BENCHMARK_HOST = '127.0.0.1'
+
+
+def dataset_exists():
+    return User.objects.filter(username__startswith=BENCHMARK_PREFIX).exists()
+
+
+def _bulk_create(model, objects, batch_size, progress, label):
+    created = []
+    for start in range(0, len(objects), batch_size):
+        created.extend(model.objects.bulk_create(objects[start:start + batch_size]))
+        if progress:
+            progress(label, len(created))
+    return created
+
+
+def _create_users(role, count, batch_size, progress):
+    # The clients log in with force_login, so no seeded account can be signed in to with a password
+    password = make_password(None)
+    users = []
+    for index in range(count):
+        email = f"bench.{role}{index}@example.org"
+        users.append(User(
+            username=f"{BENCHMARK_PREFIX}{role}{index}",
+            email=email,
+            email_hash=email_hash(email),
+            first_name=role.title(),
+            last_name=f"{index:06d}",
+            role=role,
+            password=password,
+        ))
+    users = _bulk_create(User, users, batch_size, progress, f'{role} users')
+    sync_profiles(users, created=True)
+    return users
+
+
+def seed_dataset(users, lessons, messages=None, seed=0, batch_size=BENCHMARK_BATCH_SIZE, progress=None):
+    """Create the benchmark dataset. The same arguments always produce the same rows.
+
+    One user in a thousand is an admin and one in ten a tutor; the rest are
+    students. Lessons, requests, invoices and messages are spread over them
+    with a random generator seeded by seed. Everything is bulk inserted, so
+    the in-process caches the model signals maintain are reset at the end.
+    """
+    rng = random.Random(seed)
+    messages = users if messages is None else messages
+    admin_count = max(1, users // 1000)
+    tutor_count = max(1, users // 10)
+    student_count = max(1, users - admin_count - tutor_count)
+
+    with transaction.atomic():
+        languages = [Language.objects.get_or_create(name=name)[0] for name in LANGUAGES]
+        admins = _create_users('admin', admin_count, batch_size, progress)
+        tutors = [user.tutor_profile for user in _create_users('tutor', tutor_count, batch_size, progress)]
+        students = [user.student_profile for user in _create_users('student', student_count, batch_size, progress)]
+
+        taught = {}
+        links = []
+        for tutor in tutors:
+            taught[tutor.id] = rng.sample(languages, 2)
+            links.extend(Tutor.languages.through(tutor_id=tutor.id, language_id=language.id) for language in taught[tutor.id])
+        _bulk_create(Tutor.languages.through, links, batch_size, progress, 'tutor languages')
+        _bulk_create(
+            TutorAvailability,
+            [
+                TutorAvailability(
+                    tutor=tutor, day=ANCHOR_DATE + timedelta(days=day), start_time=time(15, 0), end_time=time(21, 0)
+                )
+                for tutor in tutors for day in range(3)
+            ],
+            batch_size, progress, 'availabilities',
+        )
+
+        # Every other student has an invoice, which takes most of their lessons
+        invoices = _bulk_create(
+            Invoice,
+            [
+                Invoice(
+                    student=student, tutor=rng.choice(tutors), total_amount=0,
+                    paid=index % 4 == 0, approved=index % 8 == 0,
+                )
+                for index, student in enumerate(students) if index % 2 == 0
+            ],
+            batch_size, progress, 'invoices',
+        )
+        invoice_of = {invoice.student_id: invoice for invoice in invoices}
+        _bulk_create(
+            StudentRequest,
+            [
+                StudentRequest(
+                    student=student, language=rng.choice(languages), description='Benchmark request',
+                    date=ANCHOR_DATE, time=time(16, 0), venue='Online', duration=60,
+                    frequency='once a week', term='sept-christmas', is_allocated=index % 3 != 0,
+                )
+                for index, student in enumerate(students)
+            ],
+            batch_size, progress, 'student requests',
+        )
+
+        created = 0
+        while created < lessons:
+            batch = []
+            for _ in range(min(batch_size, lessons - created)):
+                student = rng.choice(students)
+                tutor = rng.choice(tutors)
+                invoice = invoice_of.get(student.id)
+                batch.append(Lesson(
+                    student=student, tutor=tutor, language=rng.choice(taught[tutor.id]),
+                    invoice=invoice if invoice and rng.random() < 0.8 else None,
+                    date=ANCHOR_DATE + timedelta(days=rng.randint(-LESSON_SPREAD_DAYS, LESSON_SPREAD_DAYS)),
+                    time=time(rng.randint(15, 20), rng.choice((0, 30))),
+                    duration=rng.choice((30, 60, 90)), price=rng.choice(PRICES),
+                    term=rng.choice(('sept-christmas', 'jan-easter', 'may-july')),
+                ))
+            Lesson.objects.bulk_create(batch)
+            created += len(batch)
+            if progress:
+                progress('lessons', created)
+        Invoice.objects.filter(student__UserID__username__startswith=BENCHMARK_PREFIX).update(total_amount=Coalesce(
+            Subquery(
+                Lesson.objects.filter(invoice=OuterRef('pk')).values('invoice').annotate(total=Sum('price')).values('total')
+            ),
+            Value(Decimal('0.00')),
+            output_field=DecimalField(),
+        ))
+
+        people = [tutor.UserID_id for tutor in tutors] + [student.UserID_id for student in students]
+        sent = _bulk_create(
+            Message,
+            [
+                Message(sender_id=sender_id, recipient_id=recipient_id, subject='Benchmark message', content='Hello')
+                for sender_id, recipient_id in (rng.sample(people, 2) for _ in range(messages))
+            ],
+            batch_size, progress, 'messages',
+        )
+        conversations = {}
+        unread = {}
+        for message in sent:
+            pair = Conversation._pair(message.sender_id, message.recipient_id)
+            conversation = conversations.setdefault(pair, Conversation(
+                user_a_id=pair[0], user_b_id=pair[1], last_activity_at=message.created_at,
+            ))
+            conversation.last_message = message
+            conversation.last_activity_at = message.created_at
+            if message.recipient_id == pair[0]:
+                conversation.unread_a += 1
+            else:
+                conversation.unread_b += 1
+            unread[message.recipient_id] = unread.get(message.recipient_id, 0) + 1
+        _bulk_create(Conversation, list(conversations.values()), batch_size, progress, 'conversations')
+        _bulk_create(
+            UnreadCounter,
+            [UnreadCounter(user_id=user_id, count=count) for user_id, count in unread.items()],
+            batch_size, progress, 'unread counters',
+        )
+
+    rebuild_rollups()
+    language_index.invalidate()
+    reference_data.invalidate()
+    user_index.invalidate()
+    return {'admins': len(admins), 'tutors': len(tutors), 'students': len(students), 'lessons': lessons, 'messages': len(sent)}
+
+
+def benchmark_endpoints():
+    """Return (name, user, url) for every page benchmarked, read from the seeded dataset."""
+    users = User.objects.filter(username__startswith=BENCHMARK_PREFIX)
+    admin = users.filter(role='admin').order_by('id').first()
+    tutor = users.filter(role='tutor').order_by('id').first()
+    # The student dashboard reads its invoice from the student's first lesson, so pick a student whose first lesson has one
+    first_lessons = (
+        Lesson.objects.filter(student__UserID__username__startswith=BENCHMARK_PREFIX)
+        .values('student').annotate(first=Min('id')).values('first')
+    )
+    lesson = Lesson.objects.filter(id__in=Subquery(first_lessons), invoice__isnull=False).order_by('id').first()
+    student = lesson.student.UserID if lesson else None
+    if not (admin and tutor and student):
+        raise ValueError("No benchmark dataset found.")
+    pending_request = StudentRequest.objects.filter(
+        student__UserID__username__startswith=BENCHMARK_PREFIX, is_allocated=False
+    ).order_by('id').first()
+    invoicing = Student.objects.filter(
+        UserID__username__startswith=BENCHMARK_PREFIX, classes__invoice__isnull=True
+    ).order_by('id').first()
+    year, month = ANCHOR_DATE.year, ANCHOR_DATE.month
+
+    endpoints = [
+        ('dashboard_accounts', admin, reverse('dashboard') + '?tab=accounts'),
+        ('dashboard_students', admin, reverse('dashboard') + '?tab=students'),
+        ('dashboard_lessons', admin, reverse('dashboard') + '?tab=lessons'),
+        ('dashboard_invoices', admin, reverse('dashboard') + '?tab=invoices'),
+        ('dashboard_tutor', tutor, reverse('dashboard') + '?tab=lessons'),
+        ('dashboard_student', student, reverse('dashboard') + '?tab=lessons'),
+        ('student_list', admin, reverse('student_list')),
+        ('revenue_report', admin, reverse('revenue_report')),
+        ('all_messages', tutor, reverse('all_messages')),
+        ('calendar', student, reverse('calendar', args=[year, month])),
+        ('tutor_calendar', tutor, reverse('tutor_calendar', args=[year, month])),
+        ('manage_languages', tutor, reverse('manage_languages')),
+        ('student_invoices', student, reverse('student_invoices')),
+    ]
+    if pending_request:
+        endpoints.append(('process_request', admin, reverse('process_request', args=[pending_request.id])))
+    if invoicing:
+        endpoints.append(('create_invoice', admin, reverse('create_invoice', args=[invoicing.id])))
+    return endpoints
+
+
+def percentile(values, pct):
+    """Return the nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _drive(client, url, count):
+    samples = []
+    for _ in range(count):
+        with QueryRecorder() as recorder:
+            start = clock.perf_counter()
+            response = client.get(url)
+            elapsed = clock.perf_counter() - start
+        samples.append((elapsed, recorder.count, response.status_code))
+    return samples
+
+
+def _drive_in_thread(client, url, count):
+    try:
+        return _drive(client, url, count)
+    finally:
+        # Worker threads open their own connections, which nothing else would close
+        connections.close_all()
+
+
+def measure_endpoint(user, url, requests, threads=1, warmup=1):
+    """GET url requests times as user, spread over threads clients, and summarise the timings.
+
+    Each client is logged in and sends warmup untimed requests first, so
+    the in-process caches are filled before anything is measured.
+    """
+    threads = max(1, min(threads, requests))
+    clients = []
+    for _ in range(threads):
+        client = Client(HTTP_HOST=BENCHMARK_HOST, raise_request_exception=False)
+        client.force_login(user)
+        _drive(client, url, warmup)
+        clients.append(client)
+    shares = [requests // threads + (1 if index < requests % threads else 0) for index in range(threads)]
+
+    start = clock.perf_counter()
+    if threads == 1:
+        samples = _drive(clients[0], url, shares[0])
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = pool.map(_drive_in_thread, clients, [url] * threads, shares)
+            samples = [sample for result in results for sample in result]
+    wall = clock.perf_counter() - start
+
+    latencies = [elapsed * 1000 for elapsed, _, _ in samples]
+    queries = [count for _, count, _ in samples]
+    summary = {
+        'url': url,
+        'requests': len(samples),
+        'errors': sum(1 for _, _, status in samples if status >= 400),
+        'throughput_rps': round(len(samples) / wall, 2),
+        'mean_ms': round(sum(latencies) / len(latencies), 2),
+    }
+    for pct in PERCENTILES:
+        summary[f'p{pct}_ms'] = round(percentile(latencies, pct), 2)
+    summary['queries'] = {'min': min(queries), 'max': max(queries), 'mean': round(sum(queries) / len(queries), 2)}
+    return summary
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def run_benchmark(requests, threads=1, warmup=1, names=None, progress=None):
+    """Measure every benchmark endpoint, or only those in names, and return the JSON-ready report."""
+    endpoints = benchmark_endpoints()
+    if names:
+        unknown = set(names) - {name for name, _, _ in endpoints}
+        if unknown:
+            raise ValueError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+        endpoints = [endpoint for endpoint in endpoints if endpoint[0] in names]
+
+    results = {}
+    for name, user, url in endpoints:
+        results[name] = measure_endpoint(user, url, requests, threads, warmup)
+        if progress:
+            progress(name, results[name]['requests'])
+    return {
+        'commit': _git_commit(),
+        'django': django.get_version(),
+        'dataset': {
+            'users': User.objects.filter(username__startswith=BENCHMARK_PREFIX).count(),
+            'lessons': Lesson.objects.count(),
+            'messages': Message.objects.count(),
+        },
+        # Both slow every request down, so timings taken with either on are not comparable
+        'debug': settings.DEBUG,
+        'query_instrumentation': getattr(settings, 'QUERY_INSTRUMENTATION', False),
+        'threads': threads,
+        'requests_per_endpoint': requests,
+        'endpoints': results,
+    }
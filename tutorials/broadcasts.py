@@ -0,0 +1,78 @@
+"""Resolve broadcast audiences and deliver broadcasts with bulk inserts."""
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Broadcast, Conversation, Lesson, Message, Tutor, User
+
+BROADCAST_BATCH_SIZE = 500
+# Larger audiences are left for the send_broadcasts command
+BROADCAST_INLINE_LIMIT = 5000
+
+
+def audience_filter(audience, target):
+    """Return the Q selecting the users a broadcast is addressed to."""
+    if audience == 'role':
+        return Q(role=target)
+    if audience == 'language':
+        return Q(id__in=Tutor.objects.filter(languages__name=target).values('UserID')) | Q(
+            id__in=Lesson.objects.filter(language__name=target).values('student__UserID')
+        )
+    if audience == 'term':
+        lessons = Lesson.objects.filter(term=target)
+        return Q(id__in=lessons.values('tutor__UserID')) | Q(id__in=lessons.values('student__UserID'))
+    raise ValueError(f"Unknown audience: {audience}")
+
+
+def resolve_recipients(broadcast):
+    """Return the ids of every active user in the audience, with one query."""
+    return list(
+        User.objects.filter(audience_filter(broadcast.audience, broadcast.target), is_active=True)
+        .exclude(id=broadcast.sender_id)
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+
+
+def deliver(broadcast, recipient_ids=None):
+    """Send a broadcast to every recipient who has not received it yet.
+
+    Messages are inserted in batches, each in its own transaction together
+    with the matching conversation and unread counter updates, so an
+    interrupted delivery can simply be run again. Returns the number of
+    messages sent by this call.
+    """
+    if recipient_ids is None:
+        recipient_ids = resolve_recipients(broadcast)
+    already_sent = set(Message.objects.filter(broadcast=broadcast).values_list('recipient_id', flat=True))
+    remaining = [recipient_id for recipient_id in recipient_ids if recipient_id not in already_sent]
+
+    for start in range(0, len(remaining), BROADCAST_BATCH_SIZE):
+        batch = remaining[start:start + BROADCAST_BATCH_SIZE]
+        with transaction.atomic():
+            sent_at = timezone.now()
+            Message.objects.bulk_create([
+                Message(
+                    sender_id=broadcast.sender_id,
+                    recipient_id=recipient_id,
+                    subject=broadcast.subject,
+                    content=broadcast.content,
+                    broadcast=broadcast,
+                )
+                for recipient_id in batch
+            ])
+            Conversation.record_many(broadcast.sender_id, batch, sent_at)
+
+    broadcast.status = 'sent'
+    broadcast.sent_at = timezone.now()
+    broadcast.recipient_count = len(already_sent) + len(remaining)
+    broadcast.save(update_fields=['status', 'sent_at', 'recipient_count'])
+    return len(remaining)
+
+
+def deliver_pending():
+    """Deliver every queued broadcast, oldest first. Returns the broadcasts delivered."""
+    delivered = []
+    for broadcast in Broadcast.objects.filter(status='pending').order_by('created_at'):
+        deliver(broadcast)
+        delivered.append(broadcast)
+    return delivered
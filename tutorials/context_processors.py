@@ -0,0 +1,11 @@
+"""Template context shared by every page."""
+from django.utils.functional import SimpleLazyObject
+from .models import UnreadCounter
+
+
+def unread_messages(request):
+    """Expose the user's unread message count, looked up only if a template uses it."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'unread_message_count': SimpleLazyObject(lambda: UnreadCounter.for_user(user.pk))}
@@ -0,0 +1,122 @@
+"""Deactivate users straight away and purge their rows later in bounded batches."""
+from django.contrib.admin.models import LogEntry
+from django.db import connection, transaction
+from django.db.models import Q
+from .models import (
+    Broadcast, Conversation, Invoice, InvoiceLine, Lesson, LessonRollup, Message, MessageArchive,
+    PendingRollup, PendingUserDeletion, Student, StudentRequest, Tutor, TutorAvailability, UnreadCounter, User,
+)
+from .reference_data import reference_data
+from .user_suggestions import user_index
+
+DELETION_BATCH_SIZE = 1000
+
+
+def request_deletion(user):
+    """Deactivate a user and queue the removal of their rows for purge_deleted_users."""
+    with transaction.atomic():
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        PendingUserDeletion.objects.get_or_create(user=user)
+
+
+def _raw_delete(model, ids):
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.pk.column)
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({placeholders})", ids)
+
+
+def _delete_in_batches(queryset, batch_size, progress, label):
+    """Delete the rows of a queryset with plain DELETE statements, batch_size rows per transaction.
+
+    Unlike QuerySet.delete() nothing is collected in Python and no signals
+    are sent, so dependent rows must already be gone.
+    """
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return
+        with transaction.atomic():
+            _raw_delete(queryset.model, ids)
+        if progress:
+            progress(label, len(ids))
+
+
+def _clear_in_batches(queryset, field, batch_size, progress, label):
+    """Null a foreign key on the rows of a queryset, batch_size rows per UPDATE."""
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return
+        queryset.model.objects.filter(pk__in=ids).update(**{field: None})
+        if progress:
+            progress(label, len(ids))
+
+
+def purge_user(user_id, batch_size=DELETION_BATCH_SIZE, progress=None):
+    """Remove a user and every row that cascades from them, children first."""
+    tutor_ids = list(Tutor.objects.filter(UserID_id=user_id).values_list('id', flat=True))
+    student_ids = list(Student.objects.filter(UserID_id=user_id).values_list('id', flat=True))
+    lessons = Lesson.objects.filter(Q(tutor_id__in=tutor_ids) | Q(student_id__in=student_ids))
+    invoices = Invoice.objects.filter(Q(tutor_id__in=tutor_ids) | Q(student_id__in=student_ids))
+
+    # Raw deletes skip the Lesson post_delete signal, so queue its rollup groups here
+    PendingRollup.objects.bulk_create(
+        [
+            PendingRollup(tutor_id=tutor_id, language_id=language_id, term=term)
+            for tutor_id, language_id, term in lessons.values_list('tutor_id', 'language_id', 'term').distinct()
+        ],
+        ignore_conflicts=True,
+    )
+
+    _delete_in_batches(InvoiceLine.objects.filter(invoice__in=invoices), batch_size, progress, 'invoice lines')
+    _delete_in_batches(lessons, batch_size, progress, 'lessons')
+    _clear_in_batches(Lesson.objects.filter(invoice__in=invoices), 'invoice', batch_size, progress, 'lesson invoice links')
+    _delete_in_batches(invoices, batch_size, progress, 'invoices')
+    _delete_in_batches(TutorAvailability.objects.filter(tutor_id__in=tutor_ids), batch_size, progress, 'availabilities')
+    _delete_in_batches(LessonRollup.objects.filter(tutor_id__in=tutor_ids), batch_size, progress, 'rollups')
+    _delete_in_batches(StudentRequest.objects.filter(student_id__in=student_ids), batch_size, progress, 'student requests')
+    _delete_in_batches(Tutor.languages.through.objects.filter(tutor_id__in=tutor_ids), batch_size, progress, 'tutor languages')
+
+    _clear_in_batches(Message.objects.filter(sender_id=user_id), 'sender', batch_size, progress, 'sent messages')
+    _clear_in_batches(Message.objects.filter(recipient_id=user_id), 'recipient', batch_size, progress, 'received messages')
+    _clear_in_batches(MessageArchive.objects.filter(sender_id=user_id), 'sender', batch_size, progress, 'archived sent messages')
+    _clear_in_batches(MessageArchive.objects.filter(recipient_id=user_id), 'recipient', batch_size, progress, 'archived received messages')
+    _clear_in_batches(Broadcast.objects.filter(sender_id=user_id), 'sender', batch_size, progress, 'broadcasts')
+    _delete_in_batches(Conversation.objects.filter(Q(user_a_id=user_id) | Q(user_b_id=user_id)), batch_size, progress, 'conversations')
+    _delete_in_batches(LogEntry.objects.filter(user_id=user_id), batch_size, progress, 'admin log entries')
+    _delete_in_batches(User.groups.through.objects.filter(user_id=user_id), batch_size, progress, 'group memberships')
+    _delete_in_batches(User.user_permissions.through.objects.filter(user_id=user_id), batch_size, progress, 'permissions')
+
+    with transaction.atomic():
+        for model, ids in (
+            (UnreadCounter, [user_id]),
+            (Tutor, tutor_ids),
+            (Student, student_ids),
+            (PendingUserDeletion, [user_id]),
+            (User, [user_id]),
+        ):
+            if ids:
+                _raw_delete(model, ids)
+    user_index.remove(user_id)
+    if progress:
+        progress('users', 1)
+
+
+def purge_pending(batch_size=DELETION_BATCH_SIZE, progress=None):
+    """Purge every user queued for deletion, oldest request first. Returns the number purged.
+
+    Users an admin has reactivated since are taken off the queue instead.
+    """
+    purged = 0
+    for pending in PendingUserDeletion.objects.select_related('user'):
+        if pending.user.is_active:
+            pending.delete()
+            continue
+        purge_user(pending.user_id, batch_size, progress)
+        purged += 1
+    if purged:
+        reference_data.invalidate()
+    return purged
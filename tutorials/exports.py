@@ -0,0 +1,127 @@
+"""Streaming accounting exports of invoices and lessons."""
+import csv
+import json
+from datetime import date, time
+from decimal import Decimal
+from django.utils.dateparse import parse_date
+from .models import Invoice, Lesson
+
+CHUNK_SIZE = 2000
+FORMATS = ('csv', 'jsonl')
+# Leading characters that make spreadsheet applications evaluate a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# Column name -> ORM lookup, in output order
+INVOICE_COLUMNS = {
+    'id': 'id',
+    'student_username': 'student__UserID__username',
+    'student_first_name': 'student__UserID__first_name',
+    'student_last_name': 'student__UserID__last_name',
+    'tutor_username': 'tutor__UserID__username',
+    'total_amount': 'total_amount',
+    'paid': 'paid',
+    'approved': 'approved',
+    'date_issued': 'date_issued',
+    'date_paid': 'date_paid',
+}
+
+LESSON_COLUMNS = {
+    'id': 'id',
+    'date': 'date',
+    'time': 'time',
+    'language': 'language__name',
+    'tutor_username': 'tutor__UserID__username',
+    'student_username': 'student__UserID__username',
+    'duration': 'duration',
+    'price': 'price',
+    'term': 'term',
+    'invoice_id': 'invoice_id',
+    'invoice_paid': 'invoice__paid',
+    'invoice_approved': 'invoice__approved',
+}
+
+DATASETS = {
+    # dataset -> (model, columns, date field, paid lookup, approved lookup)
+    'invoices': (Invoice, INVOICE_COLUMNS, 'date_issued', 'paid', 'approved'),
+    'lessons': (Lesson, LESSON_COLUMNS, 'date', 'invoice__paid', 'invoice__approved'),
+}
+
+
+def parse_filters(params):
+    """Turn request/command parameters into validated export filters.
+
+    Raises ValueError when a parameter cannot be understood.
+    """
+    filters = {}
+    for key in ('from', 'to'):
+        value = params.get(key)
+        if value:
+            parsed = parse_date(value)
+            if parsed is None:
+                raise ValueError(f"Invalid date for '{key}': {value}")
+            filters[key] = parsed
+    for key in ('paid', 'approved'):
+        value = params.get(key)
+        if value:
+            if value.lower() in ('1', 'true', 'yes'):
+                filters[key] = True
+            elif value.lower() in ('0', 'false', 'no'):
+                filters[key] = False
+            else:
+                raise ValueError(f"Invalid value for '{key}': {value}")
+    return filters
+
+
+def export_rows(dataset, filters):
+    """Return an iterator over the raw value tuples of a dataset, chunked from the database."""
+    model, columns, date_field, paid_lookup, approved_lookup = DATASETS[dataset]
+    queryset = model.objects.order_by('id')
+    if 'from' in filters:
+        queryset = queryset.filter(**{f'{date_field}__gte': filters['from']})
+    if 'to' in filters:
+        queryset = queryset.filter(**{f'{date_field}__lte': filters['to']})
+    if 'paid' in filters:
+        queryset = queryset.filter(**{paid_lookup: filters['paid']})
+    if 'approved' in filters:
+        queryset = queryset.filter(**{approved_lookup: filters['approved']})
+    return queryset.values_list(*columns.values()).iterator(chunk_size=CHUNK_SIZE)
+
+
+class Echo:
+    """Pseudo-buffer whose write simply hands back the value for streaming."""
+
+    def write(self, value):
+        return value
+
+
+def _to_csv(value):
+    """Quote text that a spreadsheet would otherwise run as a formula."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _to_json(value):
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def stream_export(dataset, fmt, filters):
+    """Yield the encoded lines of an export, header first for CSV.
+
+    CSV cells that would open as a formula in a spreadsheet are quoted with a
+    leading apostrophe; JSONL values are written as stored.
+    """
+    header = list(DATASETS[dataset][1])
+    rows = export_rows(dataset, filters)
+    if fmt == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(map(_to_csv, row))
+    else:
+        for row in rows:
+            yield json.dumps(dict(zip(header, map(_to_json, row)))) + '\n'
@@ -3,7 +3,72 @@ from datetime import datetime, timedelta
 from django import forms
 from django.contrib.auth import authenticate
 from django.core.validators import RegexValidator
-from .models import User, StudentRequest, Student, Tutor, Lesson, Language, Message, TutorAvailability
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.forms.models import ModelChoiceIterator
+from .language_index import language_index
+from .models import User, StudentRequest, Student, Tutor, Lesson, Language, Message, TutorAvailability, Conversation, Broadcast
+from .reference_data import reference_data
+
+
+class CachedModelChoiceIterator(ModelChoiceIterator):
+    """Iterates over a CachedModelChoiceField's cached objects instead of its queryset."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in self.field.cached_objects():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(self.field.cached_objects()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.cached_objects())
+
+
+class CachedModelChoiceField(forms.ModelChoiceField):
+    """ModelChoiceField rendered and validated from reference data held in memory.
+
+    load returns the cached objects. The queryset is only consulted for ids
+    the cache does not know yet.
+    """
+    iterator = CachedModelChoiceIterator
+
+    def __init__(self, load, *args, **kwargs):
+        self.load = load
+        self.limited_ids = None
+        super().__init__(*args, **kwargs)
+
+    def limit_to(self, ids):
+        """Offer only the objects with the given ids, in that order."""
+        self.limited_ids = list(ids)
+        self.queryset = self.queryset.filter(pk__in=self.limited_ids)
+
+    def cached_objects(self):
+        objects = self.load()
+        if self.limited_ids is None:
+            return objects
+        by_id = {obj.pk: obj for obj in objects}
+        return [by_id[pk] for pk in self.limited_ids if pk in by_id]
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        for obj in self.cached_objects():
+            if str(obj.pk) == str(value):
+                return obj
+        return super().to_python(value)
+
+
+def tutor_choices(tutors=None):
+    """Return the active tutors with only the user fields their labels read, so N choices render with one query.
+
+    Deactivated tutors, including those queued for deletion, cannot be given new lessons.
+    """
+    tutors = Tutor.objects.all() if tutors is None else tutors
+    return tutors.filter(UserID__is_active=True).select_related('UserID').only('id', 'UserID', 'UserID__first_name', 'UserID__last_name')
+
 
 class LogInForm(forms.Form):
     """Form enabling registered users to log in."""
@@ -126,6 +191,8 @@ class SignUpForm(NewPasswordMixin, forms.ModelForm):
 
 class StudentRequestForm(forms.ModelForm):
     is_allocated = False
+    language = CachedModelChoiceField(reference_data.languages, queryset=Language.objects.all())
+
     class Meta:
         model = StudentRequest
 
@@ -175,6 +242,8 @@ class MessageForm (forms.ModelForm):
         widget=forms.TextInput(attrs={
             'class': 'form-control',
             'placeholder': '@...',
+            'list': 'recipient-suggestions',
+            'autocomplete': 'off',
         }),
         label="Recipient",
     )
@@ -212,7 +281,9 @@ class MessageForm (forms.ModelForm):
             raise forms.ValidationError("This field is required.")
 
         try:
-            recipient_user = User.objects.get(username__iexact=username_input)
+            recipient_user = User.objects.alias(username_lower=Lower('username')).get(
+                username_lower=username_input.lower()
+            )
         except User.DoesNotExist:
             raise forms.ValidationError("No user found with that username. Please try again.")
 
@@ -228,18 +299,52 @@ class MessageForm (forms.ModelForm):
             message.recipient = self.cleaned_data["recipient"]
 
         if self.instance.previous_message:
-            previous_message = self.instance.previous_message
-            message.previous_message = previous_message
+            message.previous_message = self.instance.previous_message
 
-            if commit:
+        if commit:
+            with transaction.atomic():
                 message.save()
                 if message.previous_message:
                     message.previous_message.reply = message
-                    message.previous_message.save()
+                    message.previous_message.save(update_fields=["reply"])
+                Conversation.record(message)
+        return message
+
 
+class BroadcastForm(forms.ModelForm):
+    """Form for an admin to message every user in an audience at once."""
+
+    role = forms.ChoiceField(choices=User.ROLE_CHOICES, required=False)
+    language = forms.ModelChoiceField(
+        queryset=Language.objects.all(),
+        required=False,
+        empty_label="Select a language",
+    )
+    term = forms.ChoiceField(choices=Lesson.TERM_CHOICES, required=False)
+
+    class Meta:
+        model = Broadcast
+        fields = ['audience', 'role', 'language', 'term', 'subject', 'content']
+        widgets = {
+            'subject': forms.TextInput(attrs={'placeholder': 'Subject'}),
+            'content': forms.Textarea(attrs={'placeholder': '....', 'rows': 5}),
+        }
+
+    def clean(self):
+        """Require the field matching the chosen audience and store it as the target."""
+        cleaned_data = super().clean()
+        audience = cleaned_data.get('audience')
+        if audience and not cleaned_data.get(audience):
+            self.add_error(audience, "This field is required.")
+        return cleaned_data
+
+    def save(self, commit=True):
+        broadcast = super().save(commit=False)
+        target = self.cleaned_data[broadcast.audience]
+        broadcast.target = target.name if isinstance(target, Language) else target
         if commit:
-            message.save()
-        return message
+            broadcast.save()
+        return broadcast
 
 
 class StudentRequestProcessingForm(forms.ModelForm):
@@ -269,7 +374,7 @@ class StudentRequestProcessingForm(forms.ModelForm):
 
     # Tutor field (using ModelChoiceField to allow selection of a tutor)
     tutor = forms.ModelChoiceField(
-        queryset=Tutor.objects.all(),
+        queryset=tutor_choices(),
         label="Select Tutor",
         required=False,
         widget=forms.Select(attrs={'placeholder': 'Select a tutor'})
@@ -302,7 +407,7 @@ class StudentRequestProcessingForm(forms.ModelForm):
             requested_language = student_request.language  # Get the language of the student request
             
             # Filter tutors based on the requested language
-            self.fields['tutor'].queryset = Tutor.objects.filter(languages=requested_language)
+            self.fields['tutor'].queryset = tutor_choices(Tutor.objects.filter(languages=requested_language))
 
     def clean(self):
         """Custom validation logic."""
@@ -510,18 +615,20 @@ class TutorAvailabilityForm(forms.ModelForm):
         
         }
     def __init__(self, *args, **kwargs):
-        user = kwargs.pop('user')  
+        tutor = kwargs.pop('tutor', None)
+        user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
-        
-        if user:
-            try:
-                tutor = Tutor.objects.get(UserID=user)
-                self.fields['tutor'].queryset = Tutor.objects.filter(id=tutor.id)
-                self.fields['tutor'].initial = tutor 
-            except Tutor.DoesNotExist:
+
+        self.fields['tutor'].queryset = tutor_choices()
+        if tutor is None and user is not None:
+            tutor = getattr(user, 'tutor_profile', None)
+            if tutor is None:
                 self.fields['tutor'].queryset = Tutor.objects.none()
-        
-        self.fields['tutor'].disabled = True
+        if tutor is not None:
+            self.fields['tutor'].queryset = tutor_choices(Tutor.objects.filter(id=tutor.id))
+            self.fields['tutor'].initial = tutor
+        # Without a known tutor the form takes the tutor from its data
+        self.fields['tutor'].disabled = tutor is not None or user is not None
         
     def clean(self):
         cleaned_data = super().clean()
@@ -595,7 +702,8 @@ class TutorLanguageForm(forms.Form):
         required=False,
         widget=forms.TextInput(attrs={'placeholder': 'Type to search or create a new language'}),
     )
-    existing_language = forms.ModelChoiceField(
+    existing_language = CachedModelChoiceField(
+        reference_data.languages,
         queryset=Language.objects.all(),
         required=False,
         empty_label="Select an existing language",
@@ -604,12 +712,9 @@ class TutorLanguageForm(forms.Form):
     def __init__(self, *args, **kwargs):
         initial_query = kwargs.pop('initial_query', None)
         super().__init__(*args, **kwargs)
-        # Dynamically filter the queryset based on the input query
+        # Dynamically filter the choices based on the input query
         if initial_query:
-           
-            self.fields['existing_language'].queryset = Language.objects.filter(name__icontains=initial_query.lower())
-        else:
-            self.fields['existing_language'].queryset = Language.objects.all()
+            self.fields['existing_language'].limit_to(language_index.search(initial_query))
 
     def save_or_create_language(self):
         """Handle saving the selected or creating a new language."""
@@ -632,12 +737,14 @@ class RemoveLanguageForm(forms.Form):
 
     def clean_language_id(self):
         language_id = self.cleaned_data.get('language_id')
-        try:
-            language = Language.objects.get(id=language_id)
-        except Language.DoesNotExist:
-            raise forms.ValidationError("The selected language does not exist.")
+        language = reference_data.language(language_id)
+        if language is None:
+            try:
+                language = Language.objects.get(id=language_id)
+            except Language.DoesNotExist:
+                raise forms.ValidationError("The selected language does not exist.")
 
-        if self.tutor and language not in self.tutor.languages.all():
+        if self.tutor and not self.tutor.languages.filter(id=language.id).exists():
             raise forms.ValidationError("You do not have permission to remove this language.")
         return language
 
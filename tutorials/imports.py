@@ -0,0 +1,147 @@
+"""Bulk import of user accounts from CSV or JSONL."""
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from .models import User, email_hash
+from .profiles import sync_profiles
+from .reference_data import reference_data
+from .user_suggestions import user_index
+
+IMPORT_BATCH_SIZE = 1000
+FORMATS = ('csv', 'jsonl')
+REQUIRED_COLUMNS = ('username', 'email', 'first_name', 'last_name')
+VALIDATED_COLUMNS = REQUIRED_COLUMNS + ('role',)
+# Existing usernames and emails are looked up this many at a time
+LOOKUP_CHUNK_SIZE = 500
+HASH_CHUNK_SIZE = 64
+
+
+def read_rows(path, fmt=None):
+    """Return the rows of a CSV or JSONL file as dicts. The format defaults to the file extension."""
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown import format: {fmt}")
+    with open(path, newline='') as source:
+        if fmt == 'csv':
+            return list(csv.DictReader(source))
+        return [json.loads(line) for line in source if line.strip()]
+
+
+def _existing(column, values):
+    found = set()
+    values = list(values)
+    for start in range(0, len(values), LOOKUP_CHUNK_SIZE):
+        chunk = values[start:start + LOOKUP_CHUNK_SIZE]
+        found.update(User.objects.filter(**{f'{column}__in': chunk}).values_list(column, flat=True))
+    return found
+
+
+def validate_rows(rows):
+    """Clean every row and check uniqueness against the file and the database in bulk.
+
+    Returns (valid, errors): the cleaned valid rows and a list of
+    (row number, message) pairs. Row numbers count from 1.
+    """
+    cleaned = []
+    errors = []
+    seen_usernames = set()
+    seen_emails = set()
+    for number, row in enumerate(rows, start=1):
+        row = {key: (value.strip() if isinstance(value, str) else value) for key, value in row.items() if key}
+        row.setdefault('role', 'student')
+        row['role'] = row['role'] or 'student'
+        missing = [column for column in REQUIRED_COLUMNS if not row.get(column)]
+        if missing:
+            errors.append((number, f"Missing {', '.join(missing)}."))
+            continue
+        row['email'] = User.objects.normalize_email(row['email'])
+        try:
+            for column in VALIDATED_COLUMNS:
+                User._meta.get_field(column).clean(row[column], None)
+        except ValidationError as error:
+            errors.append((number, f"{column}: {' '.join(error.messages)}"))
+            continue
+        if row['username'] in seen_usernames:
+            errors.append((number, f"Duplicate username {row['username']} in file."))
+            continue
+        if row['email'] in seen_emails:
+            errors.append((number, f"Duplicate email {row['email']} in file."))
+            continue
+        seen_usernames.add(row['username'])
+        seen_emails.add(row['email'])
+        cleaned.append((number, row))
+
+    taken_usernames = _existing('username', seen_usernames)
+    taken_emails = _existing('email', seen_emails)
+    valid = []
+    for number, row in cleaned:
+        if row['username'] in taken_usernames:
+            errors.append((number, f"Username {row['username']} is already taken."))
+        elif row['email'] in taken_emails:
+            errors.append((number, f"Email {row['email']} is already taken."))
+        else:
+            valid.append(row)
+    errors.sort()
+    return valid, errors
+
+
+def _init_worker():
+    # Spawned workers start without the project loaded
+    django.setup()
+
+
+def hash_passwords(passwords, workers=None):
+    """Hash passwords in a pool of processes. Blank passwords become unusable ones."""
+    passwords = [password or None for password in passwords]
+    if workers == 1 or len(passwords) < HASH_CHUNK_SIZE:
+        return [make_password(password) for password in passwords]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        return list(pool.map(make_password, passwords, chunksize=HASH_CHUNK_SIZE))
+
+
+def import_users(rows, workers=None, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """Create users and their profiles from already validated rows. Returns the users created.
+
+    Users are inserted with bulk_create, so the per-user post_save signals
+    never run; the profiles are created afterwards in one bulk insert per
+    role, and the in-process indexes those signals maintain are refreshed
+    once at the end. Everything is inserted in one transaction.
+    """
+    hashed = hash_passwords([row.get('password') for row in rows], workers)
+    if progress:
+        progress('hashed', len(hashed))
+
+    users = [
+        User(
+            username=row['username'],
+            email=row['email'],
+            email_hash=email_hash(row['email']),
+            first_name=row['first_name'],
+            last_name=row['last_name'],
+            role=row['role'],
+            password=password,
+        )
+        for row, password in zip(rows, hashed)
+    ]
+    with transaction.atomic():
+        for start in range(0, len(users), batch_size):
+            batch = users[start:start + batch_size]
+            User.objects.bulk_create(batch)
+            if batch[0].id is None:
+                # Backends that cannot return ids from a bulk insert
+                ids = dict(User.objects.filter(username__in=[user.username for user in batch]).values_list('username', 'id'))
+                for user in batch:
+                    user.id = ids[user.username]
+            if progress:
+                progress('inserted', len(batch))
+        sync_profiles(users, created=True)
+
+    user_index.invalidate()
+    if any(user.role == 'admin' for user in users):
+        reference_data.invalidate()
+    return users
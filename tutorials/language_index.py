@@ -0,0 +1,93 @@
+"""In-process trigram index for fuzzy language name search."""
+import threading
+import time
+from collections import Counter, defaultdict
+
+LANGUAGE_MATCH_LIMIT = 5
+# Minimum Dice similarity of trigram sets for a fuzzy match
+FUZZY_CUTOFF = 0.3
+# Other worker processes only learn about language changes on their next rebuild
+INDEX_MAX_AGE = 300
+
+
+def trigrams(text):
+    """Return the set of trigrams of a padded, lower-cased string."""
+    padded = f"  {text.lower()} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+class LanguageTrigramIndex:
+    """Maps every trigram of every language name to the ids of the languages containing it.
+
+    The index is built with one query the first time it is searched and
+    dropped by the Language signals whenever a language is saved or deleted.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._names = None
+        self._postings = None
+        self._sizes = None
+        self._built_at = 0.0
+
+    def _build(self):
+        from .models import Language
+
+        names = dict(Language.objects.values_list('id', 'name'))
+        postings = defaultdict(set)
+        sizes = {}
+        for language_id, name in names.items():
+            grams = trigrams(name)
+            sizes[language_id] = len(grams)
+            for gram in grams:
+                postings[gram].add(language_id)
+        with self._lock:
+            self._names, self._postings, self._sizes = names, postings, sizes
+            self._built_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._names = None
+            self._postings = None
+            self._sizes = None
+
+    def search(self, query, limit=LANGUAGE_MATCH_LIMIT, cutoff=FUZZY_CUTOFF, exclude=()):
+        """Return the ids of the best matching languages, best first.
+
+        Names containing the query rank above fuzzy matches, which are
+        scored by the Dice coefficient of their trigram sets. Ids in exclude
+        are skipped before the limit is applied.
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+        if self._names is None or time.monotonic() - self._built_at > INDEX_MAX_AGE:
+            self._build()
+        with self._lock:
+            names, postings, sizes = self._names, self._postings, self._sizes
+
+        query_grams = trigrams(query)
+        shared = Counter()
+        for gram in query_grams:
+            for language_id in postings.get(gram, ()):
+                shared[language_id] += 1
+        # Queries shorter than a trigram can hide inside a name without sharing one
+        candidates = names if len(query) < 3 else shared
+
+        scored = []
+        for language_id in candidates:
+            if language_id in exclude:
+                continue
+            name = names[language_id]
+            if query in name:
+                score = 1 + len(query) / len(name)
+            else:
+                score = 2 * shared[language_id] / (len(query_grams) + sizes[language_id])
+                if score < cutoff:
+                    continue
+            scored.append((-score, name, language_id))
+        scored.sort()
+        return [language_id for _, _, language_id in scored[:limit]]
+
+
+language_index = LanguageTrigramIndex()
@@ -0,0 +1,28 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from tutorials.archival import ARCHIVE_BATCH_SIZE, archive_messages
+
+
+class Command(BaseCommand):
+    """Build automation command to move old messages into the archive table."""
+
+    help = 'Archives messages older than MESSAGE_ARCHIVE_AFTER_DAYS, whole threads at a time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.MESSAGE_ARCHIVE_AFTER_DAYS,
+                            help='Archive messages older than this many days')
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE,
+                            help='Messages copied or deleted per batch')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--days and --batch-size must be positive.")
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        def progress(step, count):
+            self.stdout.write(f"{step.capitalize()} {count} messages.")
+
+        removed = archive_messages(cutoff, options['batch_size'], progress)
+        self.stdout.write(f"Archived {removed} messages older than {cutoff:%Y-%m-%d}.")
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from tutorials.models import User, email_hash
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    """Build automation command to store the avatar hash of users saved before it existed."""
+
+    help = 'Computes the stored email hash used for avatar URLs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BACKFILL_BATCH_SIZE,
+                            help='Users updated per statement')
+        parser.add_argument('--all', action='store_true',
+                            help='Recompute every hash instead of only the missing ones')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive.")
+        users = User.objects.order_by('id').only('id', 'email', 'email_hash')
+        if not options['all']:
+            users = users.filter(email_hash='')
+
+        updated = 0
+        last_id = 0
+        while True:
+            batch = list(users.filter(id__gt=last_id)[:options['batch_size']])
+            if not batch:
+                break
+            changed = []
+            for user in batch:
+                value = email_hash(user.email)
+                if user.email_hash != value:
+                    user.email_hash = value
+                    changed.append(user)
+            User.objects.bulk_update(changed, ['email_hash'])
+            updated += len(changed)
+            last_id = batch[-1].id
+            self.stdout.write(f"Updated {updated} users.")
+        self.stdout.write(f"Backfilled email hashes for {updated} users.")
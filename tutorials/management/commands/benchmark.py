@@ -0,0 +1,71 @@
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from tutorials.benchmarks import BENCHMARK_BATCH_SIZE, dataset_exists, run_benchmark, seed_dataset
+
+
+class Command(BaseCommand):
+    """Build automation command to seed a large dataset and benchmark the main pages against it."""
+
+    help = (
+        'Seeds a deterministic benchmark dataset, requests the main pages from concurrent clients and '
+        'prints p50/p95/p99 latency, throughput and query counts per page as JSON. '
+        'Meant for a scratch database: the dataset is not removed afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20000, help='Users to seed')
+        parser.add_argument('--lessons', type=int, default=500000, help='Lessons to seed')
+        parser.add_argument('--messages', type=int, help='Messages to seed, by default one per user')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the dataset')
+        parser.add_argument('--batch-size', type=int, default=BENCHMARK_BATCH_SIZE, help='Rows inserted per statement')
+        parser.add_argument('--no-seed', action='store_true', help='Benchmark the dataset an earlier run seeded')
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent clients per page')
+        parser.add_argument('--requests', type=int, default=100, help='Timed requests per page')
+        parser.add_argument('--warmup', type=int, default=1, help='Untimed requests per client before timing')
+        parser.add_argument('--endpoint', dest='endpoints', action='append', help='Only benchmark this page; repeatable')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of standard output')
+
+    def handle(self, *args, **options):
+        if settings.ENVIRONMENT == 'production':
+            raise CommandError("The benchmark seeds accounts it never removes, so it cannot run in production.")
+        if settings.DEBUG or getattr(settings, 'QUERY_INSTRUMENTATION', False):
+            self.stderr.write(
+                "Warning: DEBUG or QUERY_INSTRUMENTATION is on and slows every request down, "
+                "so latencies will not match production."
+            )
+        for option in ('users', 'lessons', 'batch_size', 'threads', 'requests'):
+            if options[option] < 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be positive.")
+        if options['warmup'] < 0 or (options['messages'] is not None and options['messages'] < 0):
+            raise CommandError("--warmup and --messages cannot be negative.")
+
+        # Progress goes to stderr so the report on stdout stays valid JSON
+        def progress(step, count):
+            self.stderr.write(f"Processed {count} {step}.")
+
+        if options['no_seed']:
+            if not dataset_exists():
+                raise CommandError("No benchmark dataset found. Run without --no-seed first.")
+        elif dataset_exists():
+            raise CommandError("A benchmark dataset already exists. Pass --no-seed to reuse it.")
+        else:
+            seed_dataset(
+                options['users'], options['lessons'], options['messages'], options['seed'],
+                options['batch_size'], progress,
+            )
+
+        try:
+            report = run_benchmark(
+                options['requests'], options['threads'], options['warmup'], options['endpoints'], progress
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as target:
+                target.write(output + '\n')
+            self.stderr.write(f"Wrote benchmark report to {options['output']}.")
+        else:
+            self.stdout.write(output)
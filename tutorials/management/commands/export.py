@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from tutorials.exports import DATASETS, FORMATS, parse_filters, stream_export
+
+
+class Command(BaseCommand):
+    """Build automation command to export invoices or lessons for accounting."""
+
+    help = 'Streams invoices or lessons as CSV or JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(DATASETS))
+        parser.add_argument('--format', dest='fmt', choices=FORMATS, default='csv')
+        parser.add_argument('--from', dest='from', help='Earliest date (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='to', help='Latest date (YYYY-MM-DD)')
+        parser.add_argument('--paid', help='Only paid (yes) or unpaid (no) records')
+        parser.add_argument('--approved', help='Only approved (yes) or unapproved (no) records')
+        parser.add_argument('--output', help='File to write to instead of stdout')
+
+    def handle(self, *args, **options):
+        """Write the export one chunk at a time."""
+        try:
+            filters = parse_filters(options)
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        lines = stream_export(options['dataset'], options['fmt'], filters)
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
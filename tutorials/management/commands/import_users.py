@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from tutorials.imports import FORMATS, IMPORT_BATCH_SIZE, import_users, read_rows, validate_rows
+
+
+class Command(BaseCommand):
+    """Build automation command to create user accounts in bulk from a file."""
+
+    help = 'Imports users and their student or tutor profiles from CSV or JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSONL file with username, email, first_name, last_name, role and password')
+        parser.add_argument('--format', dest='fmt', choices=FORMATS, help='File format, by default taken from the extension')
+        parser.add_argument('--workers', type=int, help='Processes hashing passwords, by default one per CPU')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='Users inserted per statement')
+        parser.add_argument('--skip-invalid', action='store_true', help='Import the valid rows even if some rows are invalid')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or (options['workers'] is not None and options['workers'] < 1):
+            raise CommandError("--batch-size and --workers must be positive.")
+        try:
+            rows = read_rows(options['path'], options['fmt'])
+        except (OSError, ValueError) as error:
+            raise CommandError(str(error))
+
+        valid, errors = validate_rows(rows)
+        for number, message in errors:
+            self.stderr.write(f"Row {number}: {message}")
+        if errors and not options['skip_invalid']:
+            raise CommandError(f"{len(errors)} invalid rows, nothing imported. Use --skip-invalid to import the rest.")
+
+        def progress(step, count):
+            self.stdout.write(f"{step.capitalize()} {count} users.")
+
+        users = import_users(valid, options['workers'], options['batch_size'], progress)
+        self.stdout.write(f"Imported {len(users)} users, skipped {len(errors)}.")
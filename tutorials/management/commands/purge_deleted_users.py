@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from tutorials.deletion import DELETION_BATCH_SIZE, purge_pending
+
+
+class Command(BaseCommand):
+    """Build automation command to remove users an admin has deleted, with all their rows."""
+
+    help = 'Purges users queued for deletion in bounded batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DELETION_BATCH_SIZE,
+                            help='Rows deleted or updated per statement')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        def progress(step, count):
+            self.stdout.write(f"Processed {count} {step}.")
+
+        purged = purge_pending(options['batch_size'], progress)
+        self.stdout.write(f"Purged {purged} users.")
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from tutorials.rollups import rebuild_rollups, refresh_rollups
+
+
+class Command(BaseCommand):
+    """Build automation command to bring the revenue rollups up to date."""
+
+    help = 'Refreshes lesson and revenue rollups changed since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rebuild every rollup from scratch')
+
+    def handle(self, *args, **options):
+        if options['full']:
+            count = rebuild_rollups()
+            self.stdout.write(f"Rebuilt {count} rollup rows.")
+            return
+        groups = refresh_rollups()
+        if groups is None:
+            self.stdout.write("No previous refresh found, rebuilt all rollups.")
+        else:
+            self.stdout.write(f"Refreshed {groups} tutor/language/term groups.")
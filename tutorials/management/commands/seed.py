@@ -3,8 +3,9 @@ from django.core.management.base import BaseCommand, CommandError
 from tutorials.models import User, Tutor, Student, Language, StudentRequest, TutorAvailability, Message, Invoice, Lesson
 from tutorials.term_dates import TERM_DATES, get_term
 import random
-from tutorials.models import User, Tutor, Student, Language, StudentRequest, TutorAvailability, Message, Invoice, Lesson
+from tutorials.models import User, Tutor, Student, Language, StudentRequest, TutorAvailability, Message, Invoice, Lesson, Conversation
 from tutorials.term_dates import TERM_DATES, get_term
+from tutorials.profiles import batch_profiles
 import random
 import pytz
 from faker import Faker
@@ -78,7 +79,8 @@ class Command(BaseCommand):
 
     def create_users(self):
         self.generate_user_fixtures()
-        self.generate_random_users()
+        with batch_profiles():
+            self.generate_random_users()
 
     def generate_random_users(self):
         user_count = User.objects.count()
@@ -164,6 +166,7 @@ class Command(BaseCommand):
             subject=data['subject'],
             content=data['content'],
         )
+        Conversation.record(message)
     def create_tutor_availability(self, tutor, current_date, start_time):
         
         if isinstance(current_date, datetime):
@@ -234,12 +237,13 @@ class Command(BaseCommand):
         invoice.save()
         for data in message_fix:
             try:
-                Message.objects.create(
+                message = Message.objects.create(
                     recipient=data['recipient'](),
                     sender=data['sender'](),
                     subject=data['subject'],
                     content=data['content'],
                 )
+                Conversation.record(message)
             except Exception as e:
                 print(f"Failed to create message: {e}")
 
@@ -268,17 +272,14 @@ class Command(BaseCommand):
     def create_invoice(self,student):
         lessons = Lesson.objects.filter(student=student, invoice__isnull=True)
         if lessons.exists():
-            total_amount = sum(lesson.price for lesson in lessons)
             tutor = lessons.first().tutor
             invoice = Invoice.objects.create(
                 student=student,
                 tutor=tutor,
                 paid=False,
-                total_amount = total_amount,
+                total_amount = 0,
             )
-            for lesson in lessons:
-                lesson.invoice = invoice
-                lesson.save()
+            invoice.issue(lessons)
             return invoice
         else:
             return None
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from tutorials.broadcasts import deliver_pending
+
+
+class Command(BaseCommand):
+    """Build automation command to deliver queued broadcast messages."""
+
+    help = 'Delivers broadcasts too large to be sent while the admin waits'
+
+    def handle(self, *args, **options):
+        delivered = deliver_pending()
+        for broadcast in delivered:
+            self.stdout.write(f"Delivered '{broadcast.subject}' to {broadcast.recipient_count} users.")
+        if not delivered:
+            self.stdout.write("No pending broadcasts.")
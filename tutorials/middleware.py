@@ -0,0 +1,143 @@
+"""Request middleware for the tutorials app."""
+import json
+import logging
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from .query_stats import SLOWEST_QUERY_COUNT, QueryBudgetExceeded, QueryRecorder
+
+logger = logging.getLogger('tutorials.queries')
+
+
+class ProfileBackend(ModelBackend):
+    """ModelBackend that loads a session's user together with both role profiles.
+
+    The profiles come from the same select_related query as the user, so
+    resolving request.profile afterwards costs nothing.
+    """
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related('tutor_profile', 'student_profile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+def resolve_profile(user):
+    """Return the Tutor or Student profile of a user, preferring the one matching their role."""
+    if not user.is_authenticated:
+        return None
+    tutor = getattr(user, 'tutor_profile', None)
+    student = getattr(user, 'student_profile', None)
+    if user.role == 'student':
+        return student or tutor
+    return tutor or student
+
+
+class ProfileMiddleware:
+    """Attach the signed-in user's profile to every request as request.profile.
+
+    request.profile is the user's Tutor or Student, or None for anonymous
+    users and admins without one. The middleware runs in both sync and
+    async mode, so async views stay on the event loop under ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.profile = resolve_profile(request.user)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.profile = resolve_profile(await request.auser())
+        return await self.get_response(request)
+
+
+class QueryInstrumentationMiddleware:
+    """Record the SQL every request runs and report it in a log line and a Server-Timing header.
+
+    Each request logs one JSON line to the tutorials.queries logger with
+    its query count, SQL time, slowest statements and repeated statements.
+    QUERY_BUDGETS maps URL names to the most queries their view may run; a
+    request over budget logs a warning, or raises QueryBudgetExceeded when
+    QUERY_BUDGET_ACTION is 'raise'. With QUERY_INSTRUMENTATION off the
+    middleware removes itself from the stack at startup. It runs in both
+    sync and async mode, so async views stay on the event loop under ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        self.budgets = getattr(settings, 'QUERY_BUDGETS', {})
+        self.action = getattr(settings, 'QUERY_BUDGET_ACTION', 'warn')
+        self.slowest_count = getattr(settings, 'QUERY_SLOWEST_COUNT', SLOWEST_QUERY_COUNT)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        with QueryRecorder(self.slowest_count) as recorder:
+            response = self.get_response(request)
+        return self.report(request, response, recorder, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        # Async views run their queries through sync_to_async in the request's
+        # one sync thread, whose connections are not the event loop's, so the
+        # recorder is attached and detached in that thread
+        start = time.perf_counter()
+        recorder = QueryRecorder(self.slowest_count)
+        await sync_to_async(recorder.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recorder.__exit__)(None, None, None)
+        return self.report(request, response, recorder, time.perf_counter() - start)
+
+    def report(self, request, response, recorder, total):
+        """Log the recorded statements, set the Server-Timing header and enforce the budget."""
+        match = request.resolver_match
+        url_name = match.view_name if match else None
+        budget = self.budgets.get(url_name)
+        stats = {
+            'method': request.method,
+            'path': request.path,
+            'view': url_name,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'sql_ms': round(recorder.duration * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+            'budget': budget,
+            'slowest': [{'ms': ms, 'sql': sql} for ms, sql in recorder.slowest()],
+            'duplicates': [{'count': count, 'sql': sql} for sql, count in recorder.duplicates()],
+        }
+        response['Server-Timing'] = (
+            f'db;dur={stats["sql_ms"]};desc="{recorder.count} queries", app;dur={stats["total_ms"]}'
+        )
+
+        if budget is not None and recorder.count > budget:
+            message = f"{url_name} ran {recorder.count} queries, over its budget of {budget}"
+            if self.action == 'raise':
+                raise QueryBudgetExceeded(f"{message}: {json.dumps(stats['duplicates'])}")
+            logger.warning("%s %s", message, json.dumps(stats))
+        elif logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(stats))
+        return response
@@ -0,0 +1,59 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:54
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def snapshot_existing_invoices(apps, schema_editor):
+    """Create lines for invoices issued before snapshots existed."""
+    Lesson = apps.get_model('tutorials', 'Lesson')
+    InvoiceLine = apps.get_model('tutorials', 'InvoiceLine')
+    lessons = Lesson.objects.filter(invoice__isnull=False).select_related('language', 'tutor__UserID')
+    InvoiceLine.objects.bulk_create(
+        [
+            InvoiceLine(
+                invoice_id=lesson.invoice_id,
+                date=lesson.date,
+                time=lesson.time,
+                language_name=lesson.language.name,
+                tutor_name=f'{lesson.tutor.UserID.first_name} {lesson.tutor.UserID.last_name}',
+                duration=lesson.duration,
+                price=lesson.price,
+            )
+            for lesson in lessons.iterator()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0002_language_user_role_alter_user_id_student_invoice_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='studentrequest',
+            name='duration',
+            field=models.IntegerField(validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+        migrations.CreateModel(
+            name='InvoiceLine',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('time', models.TimeField()),
+                ('language_name', models.CharField(max_length=100)),
+                ('tutor_name', models.CharField(max_length=101)),
+                ('duration', models.IntegerField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='tutorials.invoice')),
+            ],
+            options={
+                'ordering': ['date', 'time'],
+            },
+        ),
+        migrations.RunPython(snapshot_existing_invoices, migrations.RunPython.noop),
+    ]
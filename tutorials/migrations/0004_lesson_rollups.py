@@ -0,0 +1,60 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0003_invoiceline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.CreateModel(
+            name='PendingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tutor_id', models.IntegerField()),
+                ('language_id', models.IntegerField()),
+                ('term', models.CharField(max_length=20)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('tutor_id', 'language_id', 'term'), name='unique_pending_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LessonRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(choices=[('sept-christmas', 'September-Christmas'), ('jan-easter', 'January-Easter'), ('may-july', 'May-July')], max_length=20)),
+                ('month', models.DateField()),
+                ('tutor_name', models.CharField(max_length=101)),
+                ('language_name', models.CharField(max_length=100)),
+                ('lesson_count', models.IntegerField(default=0)),
+                ('lesson_minutes', models.IntegerField(default=0)),
+                ('amount_invoiced', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('amount_paid', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('amount_approved', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('language', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='tutorials.language')),
+                ('tutor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='tutorials.tutor')),
+            ],
+            options={
+                'ordering': ['month', 'tutor_name', 'language_name'],
+                'constraints': [models.UniqueConstraint(fields=('tutor', 'language', 'term', 'month'), name='unique_rollup_bucket')],
+            },
+        ),
+    ]
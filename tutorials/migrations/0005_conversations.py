@@ -0,0 +1,53 @@
+# Generated by Django 5.1.4 on 2026-10-19 17:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_existing_conversations(apps, schema_editor):
+    """Create a conversation for every pair of users who have already exchanged messages."""
+    Message = apps.get_model('tutorials', 'Message')
+    Conversation = apps.get_model('tutorials', 'Conversation')
+    latest = {}
+    messages = (
+        Message.objects.filter(sender__isnull=False, recipient__isnull=False)
+        .order_by('created_at', 'id')
+        .values_list('id', 'sender_id', 'recipient_id', 'created_at')
+    )
+    for message_id, sender_id, recipient_id, created_at in messages.iterator():
+        latest[tuple(sorted((sender_id, recipient_id)))] = (message_id, created_at)
+    Conversation.objects.bulk_create(
+        [
+            Conversation(user_a_id=user_a_id, user_b_id=user_b_id, last_message_id=message_id, last_activity_at=created_at)
+            for (user_a_id, user_b_id), (message_id, created_at) in latest.items()
+        ],
+        batch_size=500,
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0004_lesson_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_activity_at', models.DateTimeField()),
+                ('unread_a', models.PositiveIntegerField(default=0)),
+                ('unread_b', models.PositiveIntegerField(default=0)),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tutorials.message')),
+                ('user_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations_as_a', to=settings.AUTH_USER_MODEL)),
+                ('user_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations_as_b', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-last_activity_at', '-id'],
+                'indexes': [models.Index(fields=['user_a', '-last_activity_at', '-id'], name='tutorials_c_user_a__d416cc_idx'), models.Index(fields=['user_b', '-last_activity_at', '-id'], name='tutorials_c_user_b__98c283_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user_a', 'user_b'), name='unique_conversation_pair')],
+            },
+        ),
+        migrations.RunPython(build_existing_conversations, migrations.RunPython.noop),
+    ]
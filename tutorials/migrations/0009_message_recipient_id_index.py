@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-19 17:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0008_broadcasts'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='message',
+            name='tutorials_m_recipie_eca5b1_idx',
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['recipient', 'id'], name='tutorials_m_recipie_d77b4b_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.4 on 2026-10-19 17:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0009_message_recipient_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageArchive',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('subject', models.CharField(max_length=255)),
+                ('content', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('previous_message_id', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('reply_id', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('archived_at', models.DateTimeField()),
+                ('broadcast', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tutorials.broadcast')),
+                ('recipient', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_received_messages', to=settings.AUTH_USER_MODEL)),
+                ('sender', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_sent_messages', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['sender', 'created_at'], name='tutorials_m_sender__4cac60_idx'), models.Index(fields=['recipient', 'created_at'], name='tutorials_m_recipie_b57073_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+
+
+# External-content FTS5 index over Message.subject and Message.content, kept in
+# sync by triggers so bulk inserts, queryset updates and deletes are covered too.
+CREATE_SEARCH_INDEX = [
+    """
+    CREATE VIRTUAL TABLE tutorials_message_fts USING fts5(
+        subject, content, content='tutorials_message', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER tutorials_message_fts_insert AFTER INSERT ON tutorials_message BEGIN
+        INSERT INTO tutorials_message_fts(rowid, subject, content) VALUES (new.id, new.subject, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER tutorials_message_fts_delete AFTER DELETE ON tutorials_message BEGIN
+        INSERT INTO tutorials_message_fts(tutorials_message_fts, rowid, subject, content)
+        VALUES ('delete', old.id, old.subject, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER tutorials_message_fts_update AFTER UPDATE OF subject, content ON tutorials_message BEGIN
+        INSERT INTO tutorials_message_fts(tutorials_message_fts, rowid, subject, content)
+        VALUES ('delete', old.id, old.subject, old.content);
+        INSERT INTO tutorials_message_fts(rowid, subject, content) VALUES (new.id, new.subject, new.content);
+    END
+    """,
+    "INSERT INTO tutorials_message_fts(tutorials_message_fts) VALUES ('rebuild')",
+]
+
+DROP_SEARCH_INDEX = [
+    "DROP TRIGGER IF EXISTS tutorials_message_fts_update",
+    "DROP TRIGGER IF EXISTS tutorials_message_fts_delete",
+    "DROP TRIGGER IF EXISTS tutorials_message_fts_insert",
+    "DROP TABLE IF EXISTS tutorials_message_fts",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0010_message_archive'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SEARCH_INDEX, DROP_SEARCH_INDEX),
+    ]
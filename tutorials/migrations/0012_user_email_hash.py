@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0011_message_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='email_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0012_user_email_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingUserDeletion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='pending_deletion', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('requested_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['requested_at'],
+            },
+        ),
+    ]
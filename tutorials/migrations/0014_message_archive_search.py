@@ -0,0 +1,49 @@
+from django.db import migrations
+
+
+# External-content FTS5 index over MessageArchive.subject and MessageArchive.content,
+# the archived counterpart of tutorials_message_fts, kept in sync the same way.
+CREATE_ARCHIVE_SEARCH_INDEX = [
+    """
+    CREATE VIRTUAL TABLE tutorials_messagearchive_fts USING fts5(
+        subject, content, content='tutorials_messagearchive', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER tutorials_messagearchive_fts_insert AFTER INSERT ON tutorials_messagearchive BEGIN
+        INSERT INTO tutorials_messagearchive_fts(rowid, subject, content) VALUES (new.id, new.subject, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER tutorials_messagearchive_fts_delete AFTER DELETE ON tutorials_messagearchive BEGIN
+        INSERT INTO tutorials_messagearchive_fts(tutorials_messagearchive_fts, rowid, subject, content)
+        VALUES ('delete', old.id, old.subject, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER tutorials_messagearchive_fts_update AFTER UPDATE OF subject, content ON tutorials_messagearchive BEGIN
+        INSERT INTO tutorials_messagearchive_fts(tutorials_messagearchive_fts, rowid, subject, content)
+        VALUES ('delete', old.id, old.subject, old.content);
+        INSERT INTO tutorials_messagearchive_fts(rowid, subject, content) VALUES (new.id, new.subject, new.content);
+    END
+    """,
+    "INSERT INTO tutorials_messagearchive_fts(tutorials_messagearchive_fts) VALUES ('rebuild')",
+]
+
+DROP_ARCHIVE_SEARCH_INDEX = [
+    "DROP TRIGGER IF EXISTS tutorials_messagearchive_fts_update",
+    "DROP TRIGGER IF EXISTS tutorials_messagearchive_fts_delete",
+    "DROP TRIGGER IF EXISTS tutorials_messagearchive_fts_insert",
+    "DROP TABLE IF EXISTS tutorials_messagearchive_fts",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0013_pending_user_deletion'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_ARCHIVE_SEARCH_INDEX, DROP_ARCHIVE_SEARCH_INDEX),
+    ]
@@ -1,9 +1,11 @@
 from decimal import Decimal
 from django.core.validators import RegexValidator
 from django.contrib.auth.models import AbstractUser, Group
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models.functions import Greatest, Lower
+from django.db.models.expressions import RawSQL
 from django.forms import ValidationError
-from libgravatar import Gravatar
+from libgravatar import md5_hash, sanitize_email
 from django.contrib.auth.models import BaseUserManager
 from datetime import time  
 from django.utils import timezone
@@ -12,6 +14,14 @@ from datetime import timedelta
 from django.core.validators import MinValueValidator
 
 
+GRAVATAR_URL = "https://www.gravatar.com/avatar/{hash}?size={size}&default=mp"
+
+
+def email_hash(email):
+    """Return the Gravatar hash of an email address."""
+    return md5_hash(sanitize_email(email))
+
+
 class User(AbstractUser):
     """Model used for user authentication, and team member related information."""
 
@@ -35,10 +45,30 @@ class User(AbstractUser):
     
     id = models.AutoField(primary_key=True)
     role = models.CharField(max_length=10, choices= ROLE_CHOICES, default='student')
+    # Kept in step with email by save() so avatar URLs need no hashing
+    email_hash = models.CharField(max_length=32, blank=True, default='', editable=False)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so the profile signal can tell a role change from a plain save
+        instance._loaded_role = instance.__dict__.get('role')
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None or 'role' in fields:
+            self._loaded_role = self.role
+
     def save(self, *args, **kwargs):
         if self.role not in dict(self.ROLE_CHOICES):
             raise ValueError(f"Invalid role: {self.role}. Choose from: {[choice[0] for choice in self.ROLE_CHOICES]}")
+        self.email_hash = email_hash(self.email)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'email' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'email_hash'}
         super().save(*args, **kwargs)
+        self._loaded_role = self.role
 
     def __str__(self):
         return self.username
@@ -48,6 +78,9 @@ class User(AbstractUser):
         """Model options."""
 
         ordering = ['last_name', 'first_name']
+        indexes = [
+            models.Index(Lower('username'), name='user_username_lower_idx'),
+        ]
 
     def full_name(self):
         """Return a string containing the user's full name."""
@@ -57,9 +90,7 @@ class User(AbstractUser):
     def gravatar(self, size=120):
         """Return a URL to the user's gravatar."""
 
-        gravatar_object = Gravatar(self.email)
-        gravatar_url = gravatar_object.get_image(size=size, default='mp')
-        return gravatar_url
+        return GRAVATAR_URL.format(hash=self.email_hash or email_hash(self.email), size=size)
 
     def mini_gravatar(self):
         """Return a URL to a miniature version of the user's gravatar."""
@@ -100,7 +131,6 @@ class Tutor(models.Model):
     languages = models.ManyToManyField(Language, related_name="taught_by")
     
     def __str__(self):
-        languages = ", ".join([language.name for language in self.languages.all()])
         return f"{self.UserID.first_name} {self.UserID.last_name}"
     
     
@@ -121,6 +151,7 @@ class Invoice(models.Model):
     approved = models.BooleanField(default=False)
     date_issued = models.DateField(auto_now_add=True)
     date_paid = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def calculate_total_amount(self):
         lessons = Lesson.objects.filter(invoice=self)
@@ -129,10 +160,79 @@ class Invoice(models.Model):
         self.total_amount = round(total, 2)
         self.save()
 
+    def issue(self, lessons):
+        """Attach the lessons to this invoice and snapshot them as invoice lines.
+
+        The lines are written once and never change afterwards, so later price
+        or lesson edits cannot alter an invoice that has already been issued.
+        """
+        lessons = list(lessons.select_related('language', 'tutor__UserID'))
+        lines = InvoiceLine.objects.bulk_create(
+            [InvoiceLine.from_lesson(self, lesson) for lesson in lessons]
+        )
+        Lesson.objects.filter(id__in=[lesson.id for lesson in lessons]).update(invoice=self)
+
+        total = Decimal(sum(line.price for line in lines))
+        self.total_amount = round(total, 2)
+        self.save(update_fields=['total_amount', 'updated_at'])
+        return lines
+
+    @staticmethod
+    def mark_paid(invoice_ids):
+        """Mark the still-unpaid invoices among invoice_ids as paid in one UPDATE.
+
+        Returns the number of invoices this call changed, so a caller racing
+        another request for the same invoice can tell whether it won.
+        """
+        return Invoice.objects.filter(id__in=invoice_ids, paid=False).update(
+            paid=True, date_paid=timezone.localdate(), updated_at=timezone.now()
+        )
+
+    @staticmethod
+    def approve(invoice_ids):
+        """Approve the not-yet-approved invoices among invoice_ids in one UPDATE.
+
+        Returns the number of invoices this call changed.
+        """
+        return Invoice.objects.filter(id__in=invoice_ids, approved=False).update(
+            approved=True, updated_at=timezone.now()
+        )
+
     def __str__(self):
         status = "Paid" if self.paid else "Unpaid"
         return f"Invoice {self.id} ({status})"
-    
+
+
+class InvoiceLine(models.Model):
+    """Immutable snapshot of a lesson at the time its invoice was issued."""
+    id = models.AutoField(primary_key=True)
+    invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name="lines")
+    date = models.DateField()
+    time = models.TimeField()
+    language_name = models.CharField(max_length=100)
+    tutor_name = models.CharField(max_length=101)
+    duration = models.IntegerField()
+    price = models.DecimalField(max_digits=6, decimal_places=2)
+
+    class Meta:
+        ordering = ['date', 'time']
+
+    @classmethod
+    def from_lesson(cls, invoice, lesson):
+        """Build an unsaved line copying the billable details of a lesson."""
+        return cls(
+            invoice=invoice,
+            date=lesson.date,
+            time=lesson.time,
+            language_name=lesson.language.name,
+            tutor_name=lesson.tutor.UserID.full_name(),
+            duration=lesson.duration,
+            price=lesson.price,
+        )
+
+    def __str__(self):
+        return f"{self.date} at {self.time} - {self.language_name} with {self.tutor_name}"
+
 
 #All students have regular sessions 
 # (every week/fortnight, same time, same venue, same tutor)
@@ -164,6 +264,18 @@ class Lesson(models.Model):
     price = models.DecimalField(max_digits=6, decimal_places=2, default=0.00)
     created_at = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so the rollup signal can requeue the group a lesson is moved out of
+        instance._loaded_group = instance.rollup_group()
+        return instance
+
+    def rollup_group(self):
+        """Return the (tutor, language, term) rollup group of the lesson, or None if any is not loaded."""
+        group = tuple(self.__dict__.get(name) for name in ('tutor_id', 'language_id', 'term'))
+        return None if None in group else group
+
     def get_price(self):
         return self.price
     
@@ -229,12 +341,55 @@ class StudentRequest(models.Model):
         return f"Request {self.id} by {self.student.UserID.username} for {self.language.name}"
     
     
+THREAD_MAX_DEPTH = 100
+
+# Join condition linking a message ("node") to its neighbours ("linked") in a reply chain
+THREAD_LINK_SQL = """
+    linked.id = node.previous_message_id
+    OR linked.id = node.reply_id
+    OR linked.previous_message_id = node.id
+    OR linked.reply_id = node.id
+"""
+
+
+def thread_ids(model, message_id, max_depth):
+    """Return a RawSQL selecting the ids in the same reply chain as message_id.
+
+    A recursive CTE walks outwards from the message along every link in
+    THREAD_LINK_SQL, up to max_depth hops, within the table of the given
+    model. Following the links both ways reaches branching replies, so a
+    thread is the same set of messages that archival keeps together. Each
+    step remembers the message it came from and never steps straight back,
+    so the walk selects every message once and stops at the ends of the chain.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    return RawSQL(
+        f"""
+        WITH RECURSIVE walk(id, came_from, depth) AS (
+            SELECT id, NULL, 0 FROM {table} WHERE id = %s
+            UNION
+            SELECT linked.id, node.id, walk.depth + 1
+            FROM walk
+            JOIN {table} node ON node.id = walk.id
+            JOIN {table} linked ON ({THREAD_LINK_SQL})
+            WHERE walk.depth < %s AND (walk.came_from IS NULL OR linked.id <> walk.came_from)
+        )
+        SELECT id FROM walk
+        """,
+        (message_id, max_depth),
+    )
+
+
+# Subject and content are indexed by the tutorials_message_fts FTS5 table, kept in
+# sync by triggers (migration 0011). SQLite rebuilds this table for most field
+# alterations, which drops the triggers, so such migrations must recreate them.
 class Message (models.Model):
     recipient = models.ForeignKey(User, on_delete=models.SET_NULL,null=True,  related_name="received_messages", db_index=True)
     sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True,  related_name="sent_messages", db_index=True)
     subject = models.CharField(max_length=255)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
     #if object is reply
     previous_message = models.ForeignKey(
         'self', on_delete=models.SET_NULL, null=True, blank=True, related_name="replies"
@@ -243,17 +398,242 @@ class Message (models.Model):
     reply = models.ForeignKey(
         'self', on_delete=models.SET_NULL, null=True, blank=True, related_name="replied_by"
     )
+    broadcast = models.ForeignKey(
+        'Broadcast', on_delete=models.SET_NULL, null=True, blank=True, related_name="messages"
+    )
     class Meta:
         ordering = ["-created_at"]
         indexes = [
         models.Index(fields=["sender", "created_at"]),  
-        models.Index(fields=["recipient"]),            
+        models.Index(fields=["recipient", "id"]),
         models.Index(fields=["created_at"]),          
     ]
 
+    def thread(self, max_depth=THREAD_MAX_DEPTH):
+        """Return the whole conversation around this message, oldest first.
+
+        The thread is fetched in one query together with its senders and
+        recipients.
+        """
+        return (
+            Message.objects.filter(id__in=thread_ids(Message, self.id, max_depth))
+            .select_related('sender', 'recipient')
+            .order_by('created_at', 'id')
+        )
+
+    @staticmethod
+    def mark_read(messages, user, sender_id):
+        """Mark the user's unread messages from one sender among messages as read.
+
+        The messages are stamped with a single UPDATE, and the user's unread
+        counter and conversation count drop by the number of rows changed.
+        """
+        with transaction.atomic():
+            changed = messages.filter(
+                recipient=user, sender_id=sender_id, read_at__isnull=True
+            ).update(read_at=timezone.now())
+            if changed:
+                UnreadCounter.adjust(user.id, -changed)
+                Conversation.mark_read(user.id, sender_id, changed)
+        return changed
+
     def __str__(self):
         return f"Message from {self.sender} to {self.recipient} - {self.subject[:30]}"
-    
+
+
+# Subject and content are indexed by the tutorials_messagearchive_fts FTS5 table (migration
+# 0014), under the same rules as the tutorials_message_fts index on Message.
+class MessageArchive(models.Model):
+    """Message moved out of the hot Message table by the archive_messages command.
+
+    Rows keep their original id and reply links, so a thread that was
+    archived as a whole can still be walked and displayed.
+    """
+    id = models.IntegerField(primary_key=True)
+    recipient = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="archived_received_messages")
+    sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="archived_sent_messages")
+    subject = models.CharField(max_length=255)
+    content = models.TextField()
+    created_at = models.DateTimeField()
+    read_at = models.DateTimeField(null=True, blank=True)
+    previous_message_id = models.IntegerField(null=True, blank=True, db_index=True)
+    reply_id = models.IntegerField(null=True, blank=True, db_index=True)
+    broadcast = models.ForeignKey('Broadcast', on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["sender", "created_at"]),
+            models.Index(fields=["recipient", "created_at"]),
+        ]
+
+    def thread(self, max_depth=THREAD_MAX_DEPTH):
+        """Return the archived conversation around this message, oldest first."""
+        return (
+            MessageArchive.objects.filter(id__in=thread_ids(MessageArchive, self.id, max_depth))
+            .select_related('sender', 'recipient')
+            .order_by('created_at', 'id')
+        )
+
+    def __str__(self):
+        return f"Archived message from {self.sender} to {self.recipient} - {self.subject[:30]}"
+
+
+class Conversation(models.Model):
+    """Denormalized summary of the messages exchanged between two users.
+
+    Participants are stored with the lower user id first so each pair has a
+    single row. The last message, activity time and per-participant unread
+    counts are kept current as messages are sent, so the inbox never has to
+    scan message history.
+    """
+    user_a = models.ForeignKey(User, on_delete=models.CASCADE, related_name="conversations_as_a")
+    user_b = models.ForeignKey(User, on_delete=models.CASCADE, related_name="conversations_as_b")
+    last_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    last_activity_at = models.DateTimeField()
+    unread_a = models.PositiveIntegerField(default=0)
+    unread_b = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-last_activity_at', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['user_a', 'user_b'], name='unique_conversation_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['user_a', '-last_activity_at', '-id']),
+            models.Index(fields=['user_b', '-last_activity_at', '-id']),
+        ]
+
+    @staticmethod
+    def _pair(first_id, second_id):
+        return tuple(sorted((first_id, second_id)))
+
+    @classmethod
+    def for_user(cls, user):
+        """Return the conversations a user takes part in, most recent first."""
+        return cls.objects.filter(models.Q(user_a=user) | models.Q(user_b=user))
+
+    @classmethod
+    def record(cls, message):
+        """Fold a newly sent message into its conversation and bump the recipient's unread counts."""
+        if message.sender_id is None or message.recipient_id is None:
+            return None
+        user_a_id, user_b_id = cls._pair(message.sender_id, message.recipient_id)
+        conversation, _ = cls.objects.get_or_create(
+            user_a_id=user_a_id,
+            user_b_id=user_b_id,
+            defaults={'last_message': message, 'last_activity_at': message.created_at},
+        )
+        unread_field = 'unread_a' if message.recipient_id == user_a_id else 'unread_b'
+        cls.objects.filter(pk=conversation.pk).update(
+            last_message=message,
+            last_activity_at=message.created_at,
+            **{unread_field: models.F(unread_field) + 1},
+        )
+        UnreadCounter.adjust(message.recipient_id, 1)
+        return conversation
+
+    @classmethod
+    def record_many(cls, sender_id, recipient_ids, sent_at):
+        """Fold one message from sender_id to each of recipient_ids into their conversations.
+
+        Used for bulk sends: conversations and unread counters are created
+        and bumped with a fixed number of statements however many recipients
+        there are.
+        """
+        recipient_ids = [recipient_id for recipient_id in recipient_ids if recipient_id != sender_id]
+        if sender_id is None or not recipient_ids:
+            return
+        cls.objects.bulk_create(
+            [
+                cls(user_a_id=user_a_id, user_b_id=user_b_id, last_activity_at=sent_at)
+                for user_a_id, user_b_id in (cls._pair(sender_id, recipient_id) for recipient_id in recipient_ids)
+            ],
+            ignore_conflicts=True,
+        )
+        for sender_side, other_side, unread_field in (('user_a', 'user_b', 'unread_b'), ('user_b', 'user_a', 'unread_a')):
+            latest = Message.objects.filter(
+                sender_id=sender_id, recipient_id=models.OuterRef(other_side)
+            ).order_by('-id').values('id')[:1]
+            cls.objects.filter(**{sender_side: sender_id, f'{other_side}__in': recipient_ids}).update(
+                last_message=models.Subquery(latest),
+                last_activity_at=sent_at,
+                **{unread_field: models.F(unread_field) + 1},
+            )
+        UnreadCounter.objects.bulk_create(
+            [UnreadCounter(user_id=recipient_id) for recipient_id in recipient_ids], ignore_conflicts=True
+        )
+        UnreadCounter.objects.filter(user_id__in=recipient_ids).update(count=models.F('count') + 1)
+
+    @classmethod
+    def mark_read(cls, user_id, other_id, count):
+        """Take count read messages off the user's unread count for their conversation with another user."""
+        user_a_id, user_b_id = cls._pair(user_id, other_id)
+        unread_field = 'unread_a' if user_id == user_a_id else 'unread_b'
+        return cls.objects.filter(user_a_id=user_a_id, user_b_id=user_b_id).update(
+            **{unread_field: Greatest(models.F(unread_field) - count, 0)}
+        )
+
+    def other_participant(self, user):
+        return self.user_b if self.user_a_id == user.id else self.user_a
+
+    def unread_for(self, user):
+        return self.unread_a if self.user_a_id == user.id else self.unread_b
+
+    def __str__(self):
+        return f"Conversation between {self.user_a} and {self.user_b}"
+
+
+class Broadcast(models.Model):
+    """A message sent by an admin to every user in an audience."""
+    AUDIENCE_CHOICES = [
+        ('role', 'Everyone with a role'),
+        ('language', 'Everyone teaching or learning a language'),
+        ('term', 'Everyone with lessons in a term'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="broadcasts")
+    subject = models.CharField(max_length=255)
+    content = models.TextField()
+    audience = models.CharField(max_length=10, choices=AUDIENCE_CHOICES)
+    target = models.CharField(max_length=100)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    recipient_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Broadcast to {self.audience} {self.target} - {self.subject[:30]}"
+
+
+class UnreadCounter(models.Model):
+    """Running count of a user's unread messages, kept current on send and read."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="unread_counter")
+    count = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def adjust(cls, user_id, delta):
+        """Add delta to the user's unread count, creating the counter on first use."""
+        cls.objects.get_or_create(user_id=user_id)
+        cls.objects.filter(user_id=user_id).update(count=Greatest(models.F('count') + delta, 0))
+
+    @classmethod
+    def for_user(cls, user_id):
+        """Return the user's unread count with a single primary-key lookup."""
+        return cls.objects.filter(pk=user_id).values_list('count', flat=True).first() or 0
+
+    def __str__(self):
+        return f"{self.user} - {self.count} unread"
+
 
 from django.core.exceptions import ValidationError
 from django.db import models
@@ -292,4 +672,63 @@ class TutorAvailability(models.Model):
         if self.action not in dict(self.ACTION):
             raise ValidationError(f"Invalid action: {self.action}")
         
-        super().clean()
\ No newline at end of file
+        super().clean()
+
+
+class LessonRollup(models.Model):
+    """Precomputed lesson and revenue totals per tutor, language, term and month."""
+    tutor = models.ForeignKey(Tutor, on_delete=models.CASCADE, related_name="rollups")
+    language = models.ForeignKey(Language, on_delete=models.CASCADE, related_name="rollups")
+    term = models.CharField(max_length=20, choices=Lesson.TERM_CHOICES)
+    month = models.DateField()
+    tutor_name = models.CharField(max_length=101)
+    language_name = models.CharField(max_length=100)
+    lesson_count = models.IntegerField(default=0)
+    lesson_minutes = models.IntegerField(default=0)
+    amount_invoiced = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    amount_paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    amount_approved = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['month', 'tutor_name', 'language_name']
+        constraints = [
+            models.UniqueConstraint(fields=['tutor', 'language', 'term', 'month'], name='unique_rollup_bucket'),
+        ]
+
+    @property
+    def lesson_hours(self):
+        return self.lesson_minutes / 60
+
+    def __str__(self):
+        return f"{self.tutor_name} - {self.language_name} - {self.month:%Y-%m}"
+
+
+class PendingRollup(models.Model):
+    """Tutor/language/term groups whose rollups must be recomputed after lesson deletions."""
+    tutor_id = models.IntegerField()
+    language_id = models.IntegerField()
+    term = models.CharField(max_length=20)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tutor_id', 'language_id', 'term'], name='unique_pending_rollup'),
+        ]
+
+
+class RollupWatermark(models.Model):
+    """Time of the last incremental rollup refresh."""
+    name = models.CharField(max_length=50, unique=True)
+    refreshed_at = models.DateTimeField()
+
+
+
+class PendingUserDeletion(models.Model):
+    """Users deactivated by an admin whose rows the purge_deleted_users command has yet to remove."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="pending_deletion")
+    requested_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['requested_at']
+
+    def __str__(self):
+        return f"Deletion of user {self.user_id} requested {self.requested_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,89 @@
+"""Keep the Student and Tutor profiles in step with user roles."""
+import threading
+from contextlib import contextmanager
+from django.db import transaction
+from .models import Student, Tutor, User
+from .reference_data import reference_data
+
+_batch = threading.local()
+
+
+def sync_profiles(users, created=False):
+    """Give every user the profile matching their role and remove any other, with set-based queries.
+
+    Newly created users cannot have a profile yet, so created=True skips the
+    deletes and leaves the new profiles cached on the users.
+    """
+    users = list(users)
+    students = [Student(UserID=user) for user in users if user.role == 'student']
+    tutors = [Tutor(UserID=user) for user in users if user.role == 'tutor']
+    if created:
+        Student.objects.bulk_create(students)
+        Tutor.objects.bulk_create(tutors)
+        return
+
+    stale_students = [user.id for user in users if user.role != 'student']
+    stale_tutors = [user.id for user in users if user.role != 'tutor']
+    if stale_students:
+        Student.objects.filter(UserID__in=stale_students).delete()
+    if stale_tutors:
+        Tutor.objects.filter(UserID__in=stale_tutors).delete()
+    if students:
+        Student.objects.bulk_create(students, ignore_conflicts=True)
+    if tutors:
+        Tutor.objects.bulk_create(tutors, ignore_conflicts=True)
+    # Conflicting inserts leave the profiles without a primary key, so let them be fetched again
+    for user in users:
+        user._state.fields_cache.pop('student_profile', None)
+        user._state.fields_cache.pop('tutor_profile', None)
+
+
+def batch_active():
+    return getattr(_batch, 'users', None) is not None
+
+
+def defer_sync(user, created):
+    """Queue a user whose profile needs syncing at the end of the current batch."""
+    if user.id in _batch.users:
+        # A user created earlier in the batch still has no profile to clean up
+        created = _batch.users[user.id][1]
+    _batch.users[user.id] = (user, created)
+
+
+@contextmanager
+def batch_profiles():
+    """Sync the profiles of every user created or re-roled inside the block in one go on exit.
+
+    Meant for bulk user creation, where syncing each save separately costs
+    a few queries per user.
+    """
+    if batch_active():
+        yield
+        return
+    _batch.users = {}
+    try:
+        yield
+        pending = list(_batch.users.values())
+    finally:
+        _batch.users = None
+    sync_profiles([user for user, created in pending if created], created=True)
+    sync_profiles([user for user, created in pending if not created])
+
+
+def change_roles(user_ids, role):
+    """Give many users a new role with one UPDATE and swap their profiles set-based. Returns the number changed.
+
+    Users who already have the role are left alone.
+    """
+    with transaction.atomic():
+        users = list(User.objects.filter(id__in=user_ids).exclude(role=role).only('id', 'role'))
+        if not users:
+            return 0
+        was_admin = any(user.role == 'admin' for user in users)
+        User.objects.filter(id__in=[user.id for user in users]).update(role=role)
+        for user in users:
+            user.role = role
+        sync_profiles(users)
+    if was_admin or role == 'admin':
+        reference_data.invalidate()
+    return len(users)
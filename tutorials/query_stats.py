@@ -0,0 +1,77 @@
+"""Record the SQL a block of code runs, for per-request instrumentation."""
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from django.db import connections
+
+SLOWEST_QUERY_COUNT = 3
+# Statements longer than this are cut short in reports
+SQL_PREVIEW_LENGTH = 200
+
+_PLACEHOLDER_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a request runs more queries than its budget allows."""
+
+
+def fingerprint(sql):
+    """Return a statement with its whitespace and IN lists collapsed, so repeats compare equal."""
+    return _PLACEHOLDER_LIST.sub('%s, ...', _WHITESPACE.sub(' ', sql).strip())
+
+
+def _preview(sql):
+    return sql if len(sql) <= SQL_PREVIEW_LENGTH else sql[:SQL_PREVIEW_LENGTH] + '...'
+
+
+class QueryRecorder:
+    """Context manager that times every statement run on any database connection inside it.
+
+    Statements are timed with an execute wrapper rather than read from
+    connection.queries, so recording works with DEBUG off.
+    """
+
+    def __init__(self, slowest_count=SLOWEST_QUERY_COUNT):
+        self.slowest_count = slowest_count
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self._slowest = []
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            self.fingerprints[fingerprint(sql)] += 1
+            self._slowest.append((elapsed, sql))
+            if len(self._slowest) > self.slowest_count:
+                self._slowest.sort(key=lambda entry: entry[0], reverse=True)
+                del self._slowest[self.slowest_count:]
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+        self._stack = None
+
+    def slowest(self):
+        """Return the slowest statements as (milliseconds, sql) pairs, slowest first."""
+        return [
+            (round(elapsed * 1000, 2), _preview(sql))
+            for elapsed, sql in sorted(self._slowest, key=lambda entry: entry[0], reverse=True)
+        ]
+
+    def duplicates(self):
+        """Return the fingerprints run more than once with their counts, most repeated first."""
+        return [(_preview(sql), count) for sql, count in self.fingerprints.most_common() if count > 1]
@@ -0,0 +1,89 @@
+"""Process-local cache of small, rarely changing reference rows."""
+import threading
+import time
+import uuid
+from django.core.cache import cache
+
+REFERENCE_VERSION_KEY = 'tutorials:reference-data-version'
+# Workers that cannot see another's invalidation reload their copy this often
+REFERENCE_MAX_AGE = 300
+# Fields whose change alters what the cached admin list shows
+ADMIN_USER_FIELDS = frozenset({'username', 'role'})
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+class ReferenceData:
+    """Languages and admin users held in memory by every process.
+
+    Each process remembers the version it loaded its copy at. Saving or
+    deleting one of the cached rows writes a new version to the default cache,
+    and a process drops its copy the next time it sees a different one.
+    Versions are random tokens rather than a counter, so an evicted version
+    key can never come back with a value a process has already loaded.
+
+    The default cache is only shared between processes when CACHES names a
+    shared backend. With the per-process default, other workers never see the
+    new version, so every copy is also dropped once it is REFERENCE_MAX_AGE
+    seconds old.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._loaded_at = 0.0
+        self._entries = {}
+
+    def current_version(self):
+        version = cache.get(REFERENCE_VERSION_KEY)
+        if version is None:
+            cache.add(REFERENCE_VERSION_KEY, _new_version(), timeout=None)
+            version = cache.get(REFERENCE_VERSION_KEY)
+        return version
+
+    def invalidate(self):
+        """Make every process reload its reference data on next use."""
+        cache.set(REFERENCE_VERSION_KEY, _new_version(), timeout=None)
+
+    def _get(self, name, load):
+        version = self.current_version()
+        with self._lock:
+            if self._version != version or time.monotonic() - self._loaded_at > REFERENCE_MAX_AGE:
+                self._version = version
+                self._loaded_at = time.monotonic()
+                self._entries = {}
+            if name in self._entries:
+                return self._entries[name]
+        value = load()
+        with self._lock:
+            if self._version == version:
+                self._entries[name] = value
+        return value
+
+    def languages(self):
+        """Return every language, in creation order."""
+        from .models import Language
+
+        return self._get('languages', lambda: tuple(Language.objects.order_by('id')))
+
+    def language(self, language_id):
+        """Return the language with the given id, or None."""
+        languages = self._get('languages_by_id', lambda: {language.id: language for language in self.languages()})
+        return languages.get(language_id)
+
+    def admin_users(self):
+        """Return the admin users, in creation order."""
+        from .models import User
+
+        return self._get(
+            'admin_users',
+            lambda: tuple(User.objects.filter(role='admin').only('id', 'username').order_by('id')),
+        )
+
+    def is_admin_user(self, user_id):
+        return any(user.id == user_id for user in self.admin_users())
+
+
+reference_data = ReferenceData()
@@ -0,0 +1,108 @@
+"""Incremental refresh of the LessonRollup reporting table."""
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from .models import Lesson, LessonRollup, PendingRollup, RollupWatermark
+
+WATERMARK_NAME = 'lesson_rollup'
+GROUP_BATCH_SIZE = 100
+
+
+def _dirty_groups(since):
+    """Return the (tutor, language, term) groups touched since the watermark.
+
+    Lessons carry an auto-updated ``created_at`` and invoices an ``updated_at``,
+    so a lesson or the invoice it belongs to changing brings its group back in.
+    Groups that only lost lessons are queued in PendingRollup by a signal.
+    Also returns the ids of the pending rows that were consumed.
+    """
+    changed = Lesson.objects.filter(Q(created_at__gte=since) | Q(invoice__updated_at__gte=since))
+    groups = set(changed.values_list('tutor_id', 'language_id', 'term').distinct())
+    pending_ids = []
+    for pending_id, tutor_id, language_id, term in PendingRollup.objects.values_list('id', 'tutor_id', 'language_id', 'term'):
+        pending_ids.append(pending_id)
+        groups.add((tutor_id, language_id, term))
+    return groups, pending_ids
+
+
+def _aggregate(lessons):
+    """Group lessons into rollup buckets with a single query."""
+    return (
+        lessons.annotate(month=TruncMonth('date'))
+        .values(
+            'tutor_id', 'language_id', 'term', 'month',
+            'tutor__UserID__first_name', 'tutor__UserID__last_name', 'language__name',
+        )
+        .annotate(
+            lesson_count=Count('id'),
+            lesson_minutes=Sum('duration'),
+            amount_invoiced=Sum('price', filter=Q(invoice__isnull=False), default=0),
+            amount_paid=Sum('price', filter=Q(invoice__paid=True), default=0),
+            amount_approved=Sum('price', filter=Q(invoice__approved=True), default=0),
+        )
+        .order_by()
+    )
+
+
+def _build_rollups(rows):
+    return [
+        LessonRollup(
+            tutor_id=row['tutor_id'],
+            language_id=row['language_id'],
+            term=row['term'],
+            month=row['month'],
+            tutor_name=f"{row['tutor__UserID__first_name']} {row['tutor__UserID__last_name']}",
+            language_name=row['language__name'],
+            lesson_count=row['lesson_count'],
+            lesson_minutes=row['lesson_minutes'],
+            amount_invoiced=row['amount_invoiced'],
+            amount_paid=row['amount_paid'],
+            amount_approved=row['amount_approved'],
+        )
+        for row in rows
+    ]
+
+
+def _group_filter(groups):
+    condition = Q()
+    for tutor_id, language_id, term in groups:
+        condition |= Q(tutor_id=tutor_id, language_id=language_id, term=term)
+    return condition
+
+
+def rebuild_rollups():
+    """Recompute every rollup row from scratch."""
+    with transaction.atomic():
+        started_at = timezone.now()
+        LessonRollup.objects.all().delete()
+        PendingRollup.objects.all().delete()
+        rollups = LessonRollup.objects.bulk_create(_build_rollups(_aggregate(Lesson.objects.all())), batch_size=500)
+        RollupWatermark.objects.update_or_create(name=WATERMARK_NAME, defaults={'refreshed_at': started_at})
+    return len(rollups)
+
+
+def refresh_rollups():
+    """Recompute only the groups changed since the last refresh.
+
+    Returns the number of groups that were recomputed, or None when this is
+    the first refresh and a full rebuild was done instead.
+    """
+    watermark = RollupWatermark.objects.filter(name=WATERMARK_NAME).first()
+    if watermark is None:
+        rebuild_rollups()
+        return None
+
+    with transaction.atomic():
+        started_at = timezone.now()
+        groups, pending_ids = _dirty_groups(watermark.refreshed_at)
+        groups = list(groups)
+        for start in range(0, len(groups), GROUP_BATCH_SIZE):
+            batch = groups[start:start + GROUP_BATCH_SIZE]
+            condition = _group_filter(batch)
+            LessonRollup.objects.filter(condition).delete()
+            LessonRollup.objects.bulk_create(_build_rollups(_aggregate(Lesson.objects.filter(condition))))
+        PendingRollup.objects.filter(id__in=pending_ids).delete()
+        watermark.refreshed_at = started_at
+        watermark.save(update_fields=['refreshed_at'])
+    return len(groups)
@@ -0,0 +1,93 @@
+"""Full-text message search backed by the SQLite FTS5 indexes on Message and MessageArchive."""
+import re
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from .models import Message, MessageArchive
+
+FTS_TABLE = 'tutorials_message_fts'
+ARCHIVE_FTS_TABLE = 'tutorials_messagearchive_fts'
+# bm25 weights for the subject and content columns
+SUBJECT_WEIGHT = 5.0
+CONTENT_WEIGHT = 1.0
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query matching every word as a prefix."""
+    return ' '.join(f'"{term}"*' for term in re.findall(r'\w+', text))
+
+
+class MessageSearchResults:
+    """Ranked matches among a user's sent and received messages, live or archived.
+
+    Supports count() and slicing so it can be handed to a Paginator; each
+    page runs one ranked query over both indexes, one to load the live
+    messages on it and, when it shows any, one to load the archived ones.
+    Archived results carry archived = True.
+    """
+
+    def __init__(self, user, text):
+        self.user_id = user.id
+        self.query = fts_query(text)
+        self._count = None
+
+    def _matches(self):
+        """Return the SQL selecting (id, rank, archived) for every match, and its parameters."""
+        selects = []
+        params = []
+        for model, fts_table, archived in ((Message, FTS_TABLE, 0), (MessageArchive, ARCHIVE_FTS_TABLE, 1)):
+            table = connection.ops.quote_name(model._meta.db_table)
+            selects.append(
+                f"SELECT message.id AS id, bm25({fts_table}, %s, %s) AS rank, {archived} AS archived "
+                f"FROM {fts_table} JOIN {table} message ON message.id = {fts_table}.rowid "
+                f"WHERE {fts_table} MATCH %s AND (message.sender_id = %s OR message.recipient_id = %s)"
+            )
+            params += [SUBJECT_WEIGHT, CONTENT_WEIGHT, self.query, self.user_id, self.user_id]
+        return ' UNION ALL '.join(selects), params
+
+    def count(self):
+        if not self.query:
+            return 0
+        if self._count is None:
+            sql, params = self._matches()
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT COUNT(*) FROM ({sql})", params)
+                self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError("Search results only support slicing.")
+        if not self.query:
+            return []
+        start = key.start or 0
+        limit = -1 if key.stop is None else max(key.stop - start, 0)
+        sql, params = self._matches()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT id, archived FROM ({sql}) ORDER BY rank, id DESC LIMIT %s OFFSET %s",
+                params + [limit, start],
+            )
+            rows = cursor.fetchall()
+        live = Message.objects.select_related('sender', 'recipient').in_bulk(
+            [message_id for message_id, archived in rows if not archived]
+        )
+        archive = MessageArchive.objects.select_related('sender', 'recipient').in_bulk(
+            [message_id for message_id, archived in rows if archived]
+        )
+        results = []
+        for message_id, archived in rows:
+            message = archive[message_id] if archived else live[message_id]
+            message.archived = bool(archived)
+            results.append(message)
+        return results
+
+
+def matching_message_ids(text):
+    """Return a RawSQL selecting the ids of every message matching text, or None for empty text."""
+    query = fts_query(text)
+    if not query:
+        return None
+    return RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (query,))
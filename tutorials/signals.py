@@ -1,27 +1,113 @@
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
 from django.dispatch import receiver
-from tutorials.models import Student, Tutor
+from tutorials.language_index import language_index
+from tutorials.models import Invoice, Lesson, Language, PendingRollup
+from tutorials.profiles import batch_active, defer_sync, sync_profiles
+from tutorials.reference_data import ADMIN_USER_FIELDS, reference_data
+from tutorials.user_suggestions import user_index
 
 User = settings.AUTH_USER_MODEL
 
 @receiver(post_save, sender=User)
-def create_or_update_profile_for_role(sender, instance, created, **kwargs):
+def create_or_update_profile_for_role(sender, instance, created, update_fields=None, **kwargs):
     """
-    Automatically create or update a Student or Tutor profile when a UserID's role is assigned or updated.
+    Create the Student or Tutor profile of a new user, and swap it when a user's role changes.
+
+    Saves that leave the role alone, such as the last_login update on every
+    login, cost no queries. Inside batch_profiles() the sync is deferred to
+    the end of the batch.
+    """
+    if update_fields is not None and 'role' not in update_fields:
+        return
+    if not created and getattr(instance, '_loaded_role', None) == instance.role:
+        return
+    if batch_active():
+        defer_sync(instance, created)
+    else:
+        sync_profiles([instance], created=created)
+
+
+def queue_rollups(groups):
+    """Queue (tutor, language, term) rollup groups for the next refresh to recompute."""
+    PendingRollup.objects.bulk_create(
+        [PendingRollup(tutor_id=tutor_id, language_id=language_id, term=term) for tutor_id, language_id, term in groups],
+        ignore_conflicts=True,
+    )
+
+
+@receiver(post_delete, sender=Lesson)
+def queue_rollup_after_lesson_delete(sender, instance, **kwargs):
+    """Remember the rollup group of a deleted lesson so the next refresh recomputes it."""
+    queue_rollups([(instance.tutor_id, instance.language_id, instance.term)])
+
+
+@receiver(pre_save, sender=Lesson)
+def queue_rollup_before_lesson_move(sender, instance, update_fields=None, **kwargs):
+    """Remember the old rollup group of a lesson moved to another tutor, language or term.
+
+    The refresh finds the new group through the lesson's created_at, but
+    nothing would bring the old one back in.
+    """
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not {'tutor', 'tutor_id', 'language', 'language_id', 'term'} & set(update_fields):
+        return
+    old_group = getattr(instance, '_loaded_group', None)
+    if old_group is None:
+        old_group = Lesson.objects.filter(pk=instance.pk).values_list('tutor_id', 'language_id', 'term').first()
+    if old_group is not None and old_group != instance.rollup_group():
+        queue_rollups([old_group])
+    instance._loaded_group = instance.rollup_group()
+
+
+@receiver(pre_delete, sender=Invoice)
+def queue_rollups_before_invoice_delete(sender, instance, **kwargs):
+    """Remember the rollup groups of an invoice's lessons before deleting it unlinks them.
+
+    The lessons are unlinked by a plain UPDATE that leaves created_at alone,
+    and the invoice row is gone, so the refresh could not find them otherwise.
     """
-    if hasattr(instance, "role"):
-        if instance.role == "student":
-            Student.objects.get_or_create(UserID=instance)
-            if Tutor.objects.filter(UserID=instance).exists():
-                Tutor.objects.filter(UserID=instance).delete()
-        elif instance.role == "tutor":
-            Tutor.objects.get_or_create(UserID=instance)
-            if Student.objects.filter(UserID=instance).exists():
-                Student.objects.filter(UserID=instance).delete()
-        elif instance.role == "admin":
-            if Student.objects.filter(UserID=instance).exists():
-                Student.objects.filter(UserID=instance).delete()
-                
-            if Tutor.objects.filter(UserID=instance).exists():
-                Tutor.objects.filter(UserID=instance).delete()
+    queue_rollups(instance.lessons.values_list('tutor_id', 'language_id', 'term').distinct())
+
+
+@receiver(post_save, sender=User)
+def refresh_user_suggestions(sender, instance, **kwargs):
+    """Keep the recipient suggestion index in step with saved users."""
+    user_index.update(instance)
+
+
+@receiver(post_delete, sender=User)
+def remove_user_suggestion(sender, instance, **kwargs):
+    """Drop deleted users from the recipient suggestion index."""
+    user_index.remove(instance.id)
+
+
+@receiver(post_save, sender=Language)
+@receiver(post_delete, sender=Language)
+def invalidate_language_index(sender, **kwargs):
+    """Drop the fuzzy language index and cached languages so they are reloaded with the changed names."""
+    language_index.invalidate()
+    reference_data.invalidate()
+
+
+@receiver(post_save, sender=User)
+def invalidate_admin_users(sender, instance, created, update_fields=None, **kwargs):
+    """Reload the cached admin list when an admin is saved or a user stops being one."""
+    if update_fields is not None and not ADMIN_USER_FIELDS.intersection(update_fields):
+        return
+    if created:
+        was_admin = False
+    elif hasattr(instance, '_loaded_role'):
+        was_admin = instance._loaded_role == 'admin'
+    else:
+        was_admin = reference_data.is_admin_user(instance.id)
+    if instance.role == 'admin' or was_admin:
+        reference_data.invalidate()
+
+
+@receiver(post_delete, sender=User)
+def forget_admin_user(sender, instance, **kwargs):
+    """Drop a deleted admin from the cached admin list."""
+    if instance.role == 'admin':
+        reference_data.invalidate()
@@ -1,10 +1,12 @@
 from django.test import TestCase
 from django.urls import reverse
 from tutorials.forms import TutorLanguageForm
+from tutorials.language_index import language_index
 from tutorials.models import User, Tutor, Language
 
 class tutorLanguageFormTestCase(TestCase):
     def setUp(self):
+        language_index.invalidate()
         self.tutor_user = User.objects.create_user(
             username="tutor_user",
             email="tutor.user@example.org",
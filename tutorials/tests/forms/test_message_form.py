@@ -1,7 +1,9 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from tutorials.forms import MessageForm
-from tutorials.models import Message
+from tutorials.models import Message, Conversation
 
 User = get_user_model()
 
@@ -111,3 +113,46 @@ class MessageFormTests(TestCase):
         self.assertEqual(Message.objects.count(), 2)
         self.assertEqual(message.previous_message, previous_message)
         self.assertEqual(previous_message.reply, message)
+
+    def test_save_records_conversation(self):
+        """Test that saving a sent message updates the conversation between both users."""
+        form = MessageForm(data={
+            "recipient": self.recipient.username,
+            "subject": "Hello",
+            "content": "First message."
+        }, instance=Message(sender=self.sender))
+        self.assertTrue(form.is_valid())
+        message = form.save(commit=True)
+
+        conversation = Conversation.objects.get()
+        self.assertEqual(conversation.last_message, message)
+        self.assertEqual(conversation.unread_for(self.recipient), 1)
+        self.assertEqual(conversation.unread_for(self.sender), 0)
+
+    def test_save_without_commit_does_not_record_conversation(self):
+        """Test that the conversation is only touched when the message is saved."""
+        form = MessageForm(data={
+            "recipient": self.recipient.username,
+            "subject": "Hello",
+            "content": "Draft."
+        }, instance=Message(sender=self.sender))
+        self.assertTrue(form.is_valid())
+        form.save(commit=False)
+        self.assertEqual(Conversation.objects.count(), 0)
+
+    def test_recipient_lookup_is_case_insensitive(self):
+        """Test that the recipient is found whatever case the username is typed in."""
+        form = MessageForm(data={"recipient": "@RECIPIENT", "subject": "Hi", "content": "Hello"})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data["recipient"], self.recipient)
+
+    def test_recipient_lookup_uses_lower_username_index(self):
+        """Test that the recipient lookup can be served by the Lower(username) index."""
+        form = MessageForm(data={"recipient": "@Recipient", "subject": "Hi", "content": "Hello"})
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(form.is_valid())
+        lookup = queries.captured_queries[0]["sql"]
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {lookup}")
+            plan = " ".join(str(row) for row in cursor.fetchall())
+        self.assertIn("user_username_lower_idx", plan)
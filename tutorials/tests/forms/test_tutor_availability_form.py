@@ -91,7 +91,7 @@ class TutorAvailabilityFormTestCase(TestCase):
         })
         if form.is_valid():
             instance = form.save()
-            self.assertEqual(TutorAvailability.objects.count(), 1)
+            self.assertGreater(TutorAvailability.objects.count(), 1)
             self.assertNotEqual(TutorAvailability.objects.filter(day=date.today() + timedelta(days=7)).count(), 0)
 
     @patch('tutorials.term_dates.get_term')  # Correct the import path according to your project structure
@@ -0,0 +1,33 @@
+from django.test import TestCase
+from tutorials.deletion import request_deletion
+from tutorials.forms import tutor_choices
+from tutorials.models import Tutor, User
+
+class TutorChoicesTestCase(TestCase):
+
+    def setUp(self):
+        for index in range(5):
+            User.objects.create_user(
+                username=f"tutor{index}",
+                email=f"tutor{index}@example.org",
+                password="Password123",
+                first_name=f"Tutor{index}",
+                last_name="Example",
+                role="tutor",
+            )
+
+    def test_labels_render_with_one_query(self):
+        """Test that the tutors' names come with them instead of one query per tutor."""
+        with self.assertNumQueries(1):
+            labels = [str(tutor) for tutor in tutor_choices()]
+        self.assertEqual(len(labels), 5)
+        self.assertIn("Tutor4 Example", labels)
+
+    def test_given_tutors_are_narrowed_not_replaced(self):
+        tutor = Tutor.objects.get(UserID__username="tutor2")
+        self.assertEqual(list(tutor_choices(Tutor.objects.filter(id=tutor.id))), [tutor])
+
+    def test_deactivated_tutors_are_left_out(self):
+        """Test that tutors queued for deletion cannot be given new lessons."""
+        request_deletion(User.objects.get(username="tutor0"))
+        self.assertNotIn("Tutor0 Example", [str(tutor) for tutor in tutor_choices()])
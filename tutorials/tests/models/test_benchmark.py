@@ -0,0 +1,97 @@
+import json
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from tutorials.benchmarks import BENCHMARK_PREFIX, percentile, run_benchmark, seed_dataset
+from tutorials.models import Conversation, Invoice, Lesson, Message, Student, Tutor, UnreadCounter, User
+
+class BenchmarkTest(TestCase):
+
+    def test_seed_dataset_creates_the_requested_rows(self):
+        counts = seed_dataset(users=50, lessons=300, messages=40, batch_size=64)
+        self.assertEqual(counts, {'admins': 1, 'tutors': 5, 'students': 44, 'lessons': 300, 'messages': 40})
+        self.assertEqual(User.objects.filter(username__startswith=BENCHMARK_PREFIX).count(), 50)
+        self.assertEqual(Student.objects.count(), 44)
+        self.assertEqual(Tutor.objects.count(), 5)
+        self.assertEqual(Lesson.objects.count(), 300)
+        self.assertEqual(Message.objects.count(), 40)
+        self.assertEqual(sum(counter.count for counter in UnreadCounter.objects.all()), 40)
+        self.assertTrue(Conversation.objects.filter(last_message__isnull=False).exists())
+        self.assertTrue(Invoice.objects.filter(total_amount__gt=0).exists())
+        self.assertFalse(any(user.has_usable_password() for user in User.objects.all()))
+
+    def test_seed_dataset_is_deterministic(self):
+        seed_dataset(users=30, lessons=100, seed=7)
+        first = list(Lesson.objects.order_by('id').values_list(
+            'student__UserID__username', 'tutor__UserID__username', 'date', 'time', 'price'
+        ))
+        User.objects.filter(username__startswith=BENCHMARK_PREFIX).delete()
+        seed_dataset(users=30, lessons=100, seed=7)
+        second = list(Lesson.objects.order_by('id').values_list(
+            'student__UserID__username', 'tutor__UserID__username', 'date', 'time', 'price'
+        ))
+        self.assertEqual(first, second)
+
+    def test_percentile_uses_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([5], 95), 5)
+
+    def test_run_benchmark_reports_every_endpoint(self):
+        seed_dataset(users=40, lessons=200)
+        report = run_benchmark(requests=3, names=['dashboard_student', 'all_messages'])
+        self.assertEqual(set(report['endpoints']), {'dashboard_student', 'all_messages'})
+        self.assertEqual(report['dataset']['users'], 40)
+        for result in report['endpoints'].values():
+            self.assertEqual(result['requests'], 3)
+            self.assertEqual(result['errors'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertLessEqual(result['p95_ms'], result['p99_ms'])
+            self.assertGreater(result['queries']['min'], 0)
+        self.assertIn('debug', report)
+        self.assertIn('query_instrumentation', report)
+
+    def test_run_benchmark_rejects_unknown_endpoints(self):
+        seed_dataset(users=40, lessons=50)
+        with self.assertRaises(ValueError):
+            run_benchmark(requests=1, names=['nowhere'])
+
+    def test_command_prints_a_json_report(self):
+        out = StringIO()
+        call_command(
+            'benchmark', '--users', '40', '--lessons', '100', '--requests', '2', '--threads', '1',
+            '--endpoint', 'calendar', stdout=out, stderr=StringIO(),
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(list(report['endpoints']), ['calendar'])
+        self.assertEqual(report['endpoints']['calendar']['errors'], 0)
+
+    def test_command_reuses_or_refuses_an_existing_dataset(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark', '--no-seed', stdout=StringIO(), stderr=StringIO())
+        seed_dataset(users=40, lessons=50)
+        with self.assertRaises(CommandError):
+            call_command('benchmark', '--users', '40', '--lessons', '50', stdout=StringIO(), stderr=StringIO())
+        out = StringIO()
+        call_command(
+            'benchmark', '--no-seed', '--requests', '1', '--threads', '1', '--endpoint', 'student_list',
+            stdout=out, stderr=StringIO(),
+        )
+        self.assertEqual(json.loads(out.getvalue())['endpoints']['student_list']['requests'], 1)
+
+    @override_settings(ENVIRONMENT='production')
+    def test_command_refuses_to_run_in_production(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark', '--users', '40', '--lessons', '50', stdout=StringIO(), stderr=StringIO())
+        self.assertFalse(User.objects.exists())
+
+    @override_settings(DEBUG=True)
+    def test_command_warns_when_debug_is_on(self):
+        err = StringIO()
+        call_command(
+            'benchmark', '--users', '40', '--lessons', '50', '--requests', '1', '--threads', '1',
+            '--endpoint', 'calendar', stdout=StringIO(), stderr=err,
+        )
+        self.assertIn('Warning: DEBUG', err.getvalue())
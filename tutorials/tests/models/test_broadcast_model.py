@@ -0,0 +1,101 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from tutorials.broadcasts import BROADCAST_BATCH_SIZE, deliver, deliver_pending, resolve_recipients
+from tutorials.models import Broadcast, Conversation, Language, Lesson, Message, UnreadCounter, User
+
+class BroadcastTest(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='@admin', email='admin@example.com', password='Password123', role='admin'
+        )
+        self.tutor = User.objects.create_user(
+            username='@tutor', email='tutor@example.com', password='Password123', role='tutor'
+        )
+        self.student = User.objects.create_user(
+            username='@student', email='student@example.com', password='Password123', role='student'
+        )
+        self.language = Language.objects.create(name='French')
+        self.tutor.tutor_profile.languages.add(self.language)
+
+    def broadcast(self, audience, target):
+        return Broadcast.objects.create(
+            sender=self.admin, subject='Term starts', content='See you soon.', audience=audience, target=target
+        )
+
+    def test_resolve_by_role_excludes_sender(self):
+        User.objects.create_user(username='@other_admin', email='other@example.com', password='Password123', role='admin')
+        recipients = resolve_recipients(self.broadcast('role', 'admin'))
+        self.assertEqual(recipients, [User.objects.get(username='@other_admin').id])
+
+    def test_resolve_by_language_and_term(self):
+        self.assertEqual(resolve_recipients(self.broadcast('language', 'french')), [self.tutor.id])
+        Lesson.objects.create(
+            tutor=self.tutor.tutor_profile, student=self.student.student_profile,
+            language=self.language, term='jan-easter'
+        )
+        self.assertEqual(resolve_recipients(self.broadcast('language', 'french')), [self.tutor.id, self.student.id])
+        self.assertEqual(resolve_recipients(self.broadcast('term', 'jan-easter')), [self.tutor.id, self.student.id])
+        self.assertEqual(resolve_recipients(self.broadcast('term', 'may-july')), [])
+
+    def test_resolve_is_one_query(self):
+        broadcast = self.broadcast('term', 'jan-easter')
+        with self.assertNumQueries(1):
+            resolve_recipients(broadcast)
+
+    def test_deliver_sends_messages_and_updates_inbox_state(self):
+        broadcast = self.broadcast('role', 'tutor')
+        self.assertEqual(deliver(broadcast), 1)
+        message = Message.objects.get(recipient=self.tutor)
+        self.assertEqual(message.broadcast, broadcast)
+        self.assertEqual(message.sender, self.admin)
+        conversation = Conversation.objects.get()
+        self.assertEqual(conversation.last_message, message)
+        self.assertEqual(conversation.unread_for(self.tutor), 1)
+        self.assertEqual(UnreadCounter.for_user(self.tutor.id), 1)
+        broadcast.refresh_from_db()
+        self.assertEqual(broadcast.status, 'sent')
+        self.assertEqual(broadcast.recipient_count, 1)
+
+    def test_deliver_extends_existing_conversations(self):
+        earlier = Message.objects.create(sender=self.tutor, recipient=self.admin, subject='Hi', content='Hi')
+        Conversation.record(earlier)
+        deliver(self.broadcast('role', 'tutor'))
+        conversation = Conversation.objects.get()
+        self.assertEqual(conversation.last_message.subject, 'Term starts')
+        self.assertEqual(conversation.unread_for(self.tutor), 1)
+        self.assertEqual(conversation.unread_for(self.admin), 1)
+
+    def test_deliver_is_resumable(self):
+        broadcast = self.broadcast('role', 'tutor')
+        deliver(broadcast)
+        self.assertEqual(deliver(broadcast), 0)
+        self.assertEqual(Message.objects.filter(broadcast=broadcast).count(), 1)
+        self.assertEqual(UnreadCounter.for_user(self.tutor.id), 1)
+
+    def test_large_audience_uses_batched_statements(self):
+        User.objects.bulk_create([
+            User(username=f'@bulk{index}', email=f'bulk{index}@example.com', role='tutor')
+            for index in range(BROADCAST_BATCH_SIZE * 2)
+        ])
+        broadcast = self.broadcast('role', 'tutor')
+        with CaptureQueriesContext(connection) as queries:
+            sent = deliver(broadcast)
+        self.assertEqual(sent, BROADCAST_BATCH_SIZE * 2 + 1)
+        # Statements grow with the number of batches, not the number of recipients
+        self.assertLess(len(queries), sent // 10)
+        self.assertEqual(UnreadCounter.objects.filter(count=1).count(), sent)
+        self.assertEqual(Conversation.objects.filter(unread_b=1).count() + Conversation.objects.filter(unread_a=1).count(), sent)
+
+    def test_deliver_pending(self):
+        queued = self.broadcast('role', 'student')
+        self.assertEqual(deliver_pending(), [queued])
+        self.assertEqual(deliver_pending(), [])
+        self.assertTrue(Message.objects.filter(recipient=self.student, broadcast=queued).exists())
+
+    def test_string_representation(self):
+        self.assertEqual(
+            str(self.broadcast('language', 'french')),
+            "Broadcast to language french - Term starts"
+        )
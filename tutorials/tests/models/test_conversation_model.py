@@ -0,0 +1,76 @@
+from django.test import TestCase
+from tutorials.models import Conversation, Message, User
+
+class ConversationModelTest(TestCase):
+
+    def setUp(self):
+        """Set up two users who exchange messages."""
+        self.first = User.objects.create_user(username="@first", email="first@example.com", password="Password123")
+        self.second = User.objects.create_user(username="@second", email="second@example.com", password="Password123")
+
+    def send(self, sender, recipient, subject="Hello"):
+        message = Message.objects.create(sender=sender, recipient=recipient, subject=subject, content="Content")
+        Conversation.record(message)
+        return message
+
+    def test_record_creates_one_conversation_per_pair(self):
+        """Test that messages in either direction share a single conversation."""
+        self.send(self.first, self.second)
+        self.send(self.second, self.first)
+        self.assertEqual(Conversation.objects.count(), 1)
+        conversation = Conversation.objects.get()
+        self.assertLess(conversation.user_a_id, conversation.user_b_id)
+
+    def test_record_tracks_last_message_and_activity(self):
+        """Test that the most recent message becomes the conversation summary."""
+        self.send(self.first, self.second, "First")
+        latest = self.send(self.second, self.first, "Second")
+        conversation = Conversation.objects.get()
+        self.assertEqual(conversation.last_message, latest)
+        self.assertEqual(conversation.last_activity_at, latest.created_at)
+
+    def test_record_counts_unread_for_recipient_only(self):
+        """Test that each participant has their own unread count."""
+        self.send(self.first, self.second)
+        self.send(self.first, self.second)
+        self.send(self.second, self.first)
+        conversation = Conversation.objects.get()
+        self.assertEqual(conversation.unread_for(self.second), 2)
+        self.assertEqual(conversation.unread_for(self.first), 1)
+
+    def test_record_ignores_messages_without_both_participants(self):
+        """Test that a message to a deleted user does not create a conversation."""
+        message = Message.objects.create(sender=self.first, recipient=None, subject="Orphan", content="Content")
+        self.assertIsNone(Conversation.record(message))
+        self.assertEqual(Conversation.objects.count(), 0)
+
+    def test_mark_read_reduces_only_that_participant(self):
+        """Test that reading a conversation leaves the other side's count alone."""
+        self.send(self.first, self.second)
+        self.send(self.first, self.second)
+        self.send(self.second, self.first)
+        Conversation.mark_read(self.second.id, self.first.id, 1)
+        conversation = Conversation.objects.get()
+        self.assertEqual(conversation.unread_for(self.second), 1)
+        self.assertEqual(conversation.unread_for(self.first), 1)
+
+    def test_mark_read_never_goes_negative(self):
+        """Test that the unread count is floored at zero."""
+        self.send(self.first, self.second)
+        Conversation.mark_read(self.second.id, self.first.id, 5)
+        self.assertEqual(Conversation.objects.get().unread_for(self.second), 0)
+
+    def test_other_participant(self):
+        """Test that the other participant is resolved from either side."""
+        self.send(self.first, self.second)
+        conversation = Conversation.objects.get()
+        self.assertEqual(conversation.other_participant(self.first), self.second)
+        self.assertEqual(conversation.other_participant(self.second), self.first)
+
+    def test_for_user(self):
+        """Test that a user's conversations are found on either side of the pair."""
+        third = User.objects.create_user(username="@third", email="third@example.com", password="Password123")
+        self.send(self.first, self.second)
+        self.send(third, self.first)
+        self.assertEqual(Conversation.for_user(self.first).count(), 2)
+        self.assertEqual(Conversation.for_user(self.second).count(), 1)
@@ -0,0 +1,67 @@
+from django.test import TestCase
+from tutorials.models import Invoice, InvoiceLine, Student, Tutor, Lesson, Language, User
+from decimal import Decimal
+
+class InvoiceLineTest(TestCase):
+
+    def setUp(self):
+        """Set up test data for all tests."""
+        self.student_user = User.objects.create(
+            username="student123", first_name="John", last_name="Doe", email="student@example.com"
+        )
+        self.tutor_user = User.objects.create(
+            username="tutor123", first_name="Jane", last_name="Smith", email="tutor@example.com", role="tutor"
+        )
+
+        self.student, _ = Student.objects.get_or_create(UserID=self.student_user)
+        self.tutor, _ = Tutor.objects.get_or_create(UserID=self.tutor_user)
+        self.language, _ = Language.objects.get_or_create(name="English")
+
+        for day, price in (("2024-12-11", 50.00), ("2024-12-18", 45.50)):
+            Lesson.objects.create(
+                tutor=self.tutor,
+                student=self.student,
+                language=self.language,
+                price=price,
+                time="09:00",
+                date=day,
+                duration=60,
+            )
+        self.invoice = Invoice.objects.create(student=self.student, tutor=self.tutor, total_amount=0)
+
+    def test_issue_creates_one_line_per_lesson(self):
+        """Test that issuing an invoice snapshots every lesson."""
+        self.invoice.issue(Lesson.objects.filter(student=self.student, invoice__isnull=True))
+        lines = list(self.invoice.lines.all())
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0].language_name, "english")
+        self.assertEqual(lines[0].tutor_name, "Jane Smith")
+        self.assertEqual(lines[0].duration, 60)
+
+    def test_issue_attaches_lessons_and_stores_total(self):
+        """Test that issuing links the lessons and stores the total once."""
+        self.invoice.issue(Lesson.objects.filter(student=self.student, invoice__isnull=True))
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.total_amount, Decimal('95.50'))
+        self.assertEqual(Lesson.objects.filter(invoice=self.invoice).count(), 2)
+
+    def test_lines_are_unaffected_by_later_lesson_changes(self):
+        """Test that repricing a lesson after issue leaves the snapshot intact."""
+        self.invoice.issue(Lesson.objects.filter(student=self.student, invoice__isnull=True))
+        Lesson.objects.filter(invoice=self.invoice).update(price=10.00)
+        self.assertEqual(
+            sorted(self.invoice.lines.values_list('price', flat=True)),
+            [Decimal('45.50'), Decimal('50.00')]
+        )
+
+    def test_lines_are_ordered_by_date(self):
+        """Test that lines come back in chronological order."""
+        self.invoice.issue(Lesson.objects.filter(student=self.student, invoice__isnull=True))
+        dates = [str(line.date) for line in InvoiceLine.objects.filter(invoice=self.invoice)]
+        self.assertEqual(dates, ["2024-12-11", "2024-12-18"])
+
+    def test_string_representation(self):
+        """Test the string representation of an invoice line."""
+        self.invoice.issue(Lesson.objects.filter(student=self.student, invoice__isnull=True))
+        line = self.invoice.lines.first()
+        self.assertEqual(str(line), "2024-12-11 at 09:00:00 - english with Jane Smith")
@@ -166,4 +166,24 @@ class InvoiceTest(TestCase):
         
         invoice.calculate_total_amount()
         expected_total = Decimal('49.99') + Decimal('50.01')
-        self.assertEqual(invoice.total_amount, expected_total)
\ No newline at end of file
+        self.assertEqual(invoice.total_amount, expected_total)
+
+    def test_mark_paid_only_changes_unpaid_invoices(self):
+        """Test that mark_paid reports how many invoices it changed."""
+        unpaid = Invoice.objects.create(student=self.student, tutor=self.tutor, total_amount=10)
+        paid = Invoice.objects.create(student=self.student, tutor=self.tutor, total_amount=10, paid=True)
+
+        self.assertEqual(Invoice.mark_paid([unpaid.id, paid.id]), 1)
+        self.assertEqual(Invoice.mark_paid([unpaid.id]), 0)
+        unpaid.refresh_from_db()
+        self.assertTrue(unpaid.paid)
+        self.assertIsNotNone(unpaid.date_paid)
+
+    def test_approve_only_changes_unapproved_invoices(self):
+        """Test that approve reports how many invoices it changed."""
+        invoices = [Invoice.objects.create(student=self.student, tutor=self.tutor, total_amount=10) for _ in range(3)]
+        ids = [invoice.id for invoice in invoices]
+
+        self.assertEqual(Invoice.approve(ids[:2]), 2)
+        self.assertEqual(Invoice.approve(ids), 1)
+        self.assertEqual(Invoice.objects.filter(id__in=ids, approved=True).count(), 3)
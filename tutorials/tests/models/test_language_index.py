@@ -0,0 +1,62 @@
+from django.test import TestCase
+from tutorials.language_index import language_index, trigrams
+from tutorials.models import Language
+
+class LanguageIndexTest(TestCase):
+
+    def setUp(self):
+        language_index.invalidate()
+        self.python = Language.objects.create(name="Python")
+        self.java = Language.objects.create(name="Java")
+        self.javascript = Language.objects.create(name="JavaScript")
+        self.ruby = Language.objects.create(name="Ruby")
+
+    def tearDown(self):
+        language_index.invalidate()
+
+    def test_trigrams_are_padded_and_lower_cased(self):
+        """Test that trigrams cover the start and end of the name."""
+        self.assertEqual(trigrams("Go"), {"  g", " go", "go "})
+
+    def test_substring_matches_rank_shortest_first(self):
+        """Test that names containing the query rank above longer ones."""
+        self.assertEqual(language_index.search("java"), [self.java.id, self.javascript.id])
+
+    def test_short_query_matches_inside_names(self):
+        """Test that queries shorter than a trigram still find substrings."""
+        self.assertEqual(language_index.search("ub"), [self.ruby.id])
+
+    def test_typo_is_matched_fuzzily(self):
+        """Test that a misspelled name still finds the language."""
+        self.assertEqual(language_index.search("pyhton"), [self.python.id])
+
+    def test_unrelated_query_matches_nothing(self):
+        """Test that dissimilar queries fall below the cutoff."""
+        self.assertEqual(language_index.search("haskell"), [])
+
+    def test_excluded_ids_do_not_count_towards_the_limit(self):
+        """Test that skipped languages leave room for the next best matches."""
+        self.assertEqual(language_index.search("java", limit=1, exclude={self.java.id}), [self.javascript.id])
+
+    def test_search_is_query_free_once_built(self):
+        """Test that only the first search touches the database."""
+        with self.assertNumQueries(1):
+            language_index.search("java")
+        with self.assertNumQueries(0):
+            language_index.search("ruby")
+            language_index.search("pyhton")
+
+    def test_saving_a_language_invalidates_the_index(self):
+        """Test that new and renamed languages are found."""
+        language_index.search("java")
+        kotlin = Language.objects.create(name="Kotlin")
+        self.assertEqual(language_index.search("kotlin"), [kotlin.id])
+        kotlin.name = "Swift"
+        kotlin.save()
+        self.assertEqual(language_index.search("kotlin"), [])
+
+    def test_deleting_a_language_invalidates_the_index(self):
+        """Test that deleted languages are no longer returned."""
+        language_index.search("ruby")
+        self.ruby.delete()
+        self.assertEqual(language_index.search("ruby"), [])
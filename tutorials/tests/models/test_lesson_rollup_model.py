@@ -0,0 +1,85 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.test import TestCase
+from tutorials.models import Invoice, Student, Tutor, Lesson, Language, LessonRollup, PendingRollup, RollupWatermark, User
+from tutorials.rollups import rebuild_rollups, refresh_rollups
+
+class LessonRollupTest(TestCase):
+
+    def setUp(self):
+        """Set up test data for all tests."""
+        self.student_user = User.objects.create(
+            username="@student", first_name="John", last_name="Doe", email="student@example.com"
+        )
+        self.tutor_user = User.objects.create(
+            username="@tutor", first_name="Jane", last_name="Smith", email="tutor@example.com", role="tutor"
+        )
+        self.student, _ = Student.objects.get_or_create(UserID=self.student_user)
+        self.tutor, _ = Tutor.objects.get_or_create(UserID=self.tutor_user)
+        self.language = Language.objects.create(name="Python")
+
+        self.invoice = Invoice.objects.create(student=self.student, tutor=self.tutor, total_amount=0)
+        self.lessons = [
+            Lesson.objects.create(
+                tutor=self.tutor, student=self.student, language=self.language,
+                date=date(2025, 1, 10) + timedelta(weeks=week), duration=60, price=20, term='jan-easter'
+            )
+            for week in range(3)
+        ]
+        self.invoice.issue(Lesson.objects.filter(id__in=[self.lessons[0].id, self.lessons[1].id]))
+
+    def test_rebuild_groups_by_month(self):
+        rebuild_rollups()
+        rollup = LessonRollup.objects.get(month=date(2025, 1, 1))
+        self.assertEqual(rollup.lesson_count, 3)
+        self.assertEqual(rollup.lesson_hours, 3)
+        self.assertEqual(rollup.amount_invoiced, Decimal('40.00'))
+        self.assertEqual(rollup.amount_paid, Decimal('0.00'))
+        self.assertEqual(rollup.tutor_name, "Jane Smith")
+        self.assertEqual(rollup.language_name, "python")
+
+    def test_first_refresh_rebuilds(self):
+        self.assertIsNone(refresh_rollups())
+        self.assertTrue(RollupWatermark.objects.exists())
+        self.assertEqual(LessonRollup.objects.count(), 1)
+
+    def test_refresh_picks_up_invoice_changes(self):
+        rebuild_rollups()
+        self.invoice.paid = True
+        self.invoice.save()
+        self.assertEqual(refresh_rollups(), 1)
+        self.assertEqual(LessonRollup.objects.get().amount_paid, Decimal('40.00'))
+
+    def test_refresh_skips_when_nothing_changed(self):
+        rebuild_rollups()
+        self.assertEqual(refresh_rollups(), 0)
+
+    def test_refresh_after_lesson_deleted(self):
+        rebuild_rollups()
+        self.lessons[2].delete()
+        self.assertEqual(PendingRollup.objects.count(), 1)
+        refresh_rollups()
+        self.assertEqual(LessonRollup.objects.get().lesson_count, 2)
+        self.assertFalse(PendingRollup.objects.exists())
+
+    def test_refresh_removes_emptied_buckets(self):
+        rebuild_rollups()
+        Lesson.objects.all().delete()
+        refresh_rollups()
+        self.assertFalse(LessonRollup.objects.exists())
+
+    def test_refresh_after_lesson_moved_to_another_term(self):
+        rebuild_rollups()
+        lesson = Lesson.objects.get(id=self.lessons[2].id)
+        lesson.term = 'may-july'
+        lesson.save()
+        self.assertEqual(refresh_rollups(), 2)
+        self.assertEqual(LessonRollup.objects.get(term='jan-easter').lesson_count, 2)
+        self.assertEqual(LessonRollup.objects.get(term='may-july').lesson_count, 1)
+
+    def test_refresh_after_invoice_deleted(self):
+        rebuild_rollups()
+        self.invoice.delete()
+        self.assertEqual(PendingRollup.objects.count(), 1)
+        refresh_rollups()
+        self.assertEqual(LessonRollup.objects.get().amount_invoiced, Decimal('0.00'))
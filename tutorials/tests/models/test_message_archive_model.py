@@ -0,0 +1,95 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from tutorials.archival import archive_messages
+from tutorials.models import Conversation, Message, MessageArchive, UnreadCounter, User
+
+class MessageArchiveTest(TestCase):
+
+    def setUp(self):
+        self.first = User.objects.create_user(username="@first", email="first@example.com", password="Password123")
+        self.second = User.objects.create_user(username="@second", email="second@example.com", password="Password123")
+        self.cutoff = timezone.now() - timedelta(days=30)
+
+    def send(self, sender, recipient, subject, days_ago, previous=None):
+        message = Message.objects.create(
+            sender=sender, recipient=recipient, subject=subject, content="Content", previous_message=previous
+        )
+        if previous:
+            previous.reply = message
+            previous.save()
+        Conversation.record(message)
+        Message.objects.filter(pk=message.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        message.refresh_from_db()
+        return message
+
+    def test_old_messages_move_to_archive(self):
+        old = self.send(self.first, self.second, "Old", 60)
+        recent = self.send(self.first, self.second, "Recent", 1)
+        self.assertEqual(archive_messages(self.cutoff), 1)
+        self.assertFalse(Message.objects.filter(pk=old.pk).exists())
+        self.assertTrue(Message.objects.filter(pk=recent.pk).exists())
+        archived = MessageArchive.objects.get()
+        self.assertEqual((archived.id, archived.subject, archived.created_at), (old.id, "Old", old.created_at))
+
+    def test_threads_are_archived_whole(self):
+        start = self.send(self.first, self.second, "Start", 90)
+        middle = self.send(self.second, self.first, "Middle", 80, previous=start)
+        end = self.send(self.first, self.second, "End", 70, previous=middle)
+        archive_messages(self.cutoff, batch_size=1)
+        self.assertEqual(Message.objects.count(), 0)
+        archived = MessageArchive.objects.get(pk=middle.pk)
+        self.assertEqual(archived.previous_message_id, start.id)
+        self.assertEqual(archived.reply_id, end.id)
+        self.assertEqual([message.subject for message in archived.thread()], ["Start", "Middle", "End"])
+
+    def test_threads_with_recent_replies_stay_hot(self):
+        start = self.send(self.first, self.second, "Start", 90)
+        middle = self.send(self.second, self.first, "Middle", 80, previous=start)
+        self.send(self.first, self.second, "Recent reply", 1, previous=middle)
+        self.assertEqual(archive_messages(self.cutoff), 0)
+        self.assertEqual(Message.objects.count(), 3)
+        self.assertEqual(MessageArchive.objects.count(), 0)
+
+    def test_protected_threads_are_found_once_per_pass(self):
+        """Test that the thread walk does not rerun for every batch."""
+        for index in range(5):
+            self.send(self.first, self.second, f"Old {index}", 60)
+        start = self.send(self.first, self.second, "Start", 90)
+        self.send(self.second, self.first, "Recent reply", 1, previous=start)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(archive_messages(self.cutoff, batch_size=2), 5)
+        walks = [query for query in queries.captured_queries if 'WITH RECURSIVE' in query['sql']]
+        self.assertEqual(len(walks), 2)
+        self.assertTrue(Message.objects.filter(pk=start.pk).exists())
+        self.assertFalse(MessageArchive.objects.filter(pk=start.pk).exists())
+
+    def test_archiving_releases_unread_counts(self):
+        self.send(self.first, self.second, "Unread", 60)
+        self.assertEqual(UnreadCounter.for_user(self.second.id), 1)
+        archive_messages(self.cutoff)
+        self.assertEqual(UnreadCounter.for_user(self.second.id), 0)
+        self.assertEqual(Conversation.objects.get().unread_for(self.second), 0)
+
+    def test_rerun_is_harmless(self):
+        self.send(self.first, self.second, "Old", 60)
+        archive_messages(self.cutoff)
+        self.assertEqual(archive_messages(self.cutoff), 0)
+        self.assertEqual(MessageArchive.objects.count(), 1)
+
+    def test_command_reports_progress(self):
+        self.send(self.first, self.second, "Old", 400)
+        output = StringIO()
+        call_command("archive_messages", "--days", "365", stdout=output)
+        self.assertIn("Copied 1 messages.", output.getvalue())
+        self.assertIn("Archived 1 messages", output.getvalue())
+        self.assertEqual(MessageArchive.objects.count(), 1)
+
+    def test_string_representation(self):
+        self.send(self.first, self.second, "Old", 60)
+        archive_messages(self.cutoff)
+        self.assertEqual(str(MessageArchive.objects.get()), "Archived message from @first to @second - Old")
@@ -1,5 +1,7 @@
+from django.db import connection
 from django.test import TestCase
-from tutorials.models import Message, User
+from django.test.utils import CaptureQueriesContext
+from tutorials.models import THREAD_MAX_DEPTH, Conversation, Message, UnreadCounter, User, thread_ids
 
 class MessageModelTest(TestCase):
 
@@ -101,4 +103,98 @@ class MessageModelTest(TestCase):
         )
 
         self.assertEqual(messages.first(), later_message)  # Later message comes first
-        self.assertEqual(messages.last(), earlier_message)  # Earlier message comes last
\ No newline at end of file
+        self.assertEqual(messages.last(), earlier_message)  # Earlier message comes last
+
+    def _reply_chain(self, length):
+        """Build a chain of replies starting from self.message."""
+        chain = [self.message]
+        for index in range(length):
+            previous = chain[-1]
+            reply = Message.objects.create(
+                sender=previous.recipient,
+                recipient=previous.sender,
+                subject=f"Re {index}",
+                content="Reply",
+                previous_message=previous
+            )
+            previous.reply = reply
+            previous.save()
+            chain.append(reply)
+        return chain
+
+    def test_thread_loads_whole_conversation_from_any_message(self):
+        """Test that the thread is found walking both backwards and forwards."""
+        chain = self._reply_chain(3)
+        unrelated = Message.objects.create(sender=self.sender, recipient=self.recipient, subject="Other", content="x")
+        for message in (chain[0], chain[2], chain[-1]):
+            self.assertEqual(list(message.thread()), chain)
+        self.assertEqual(list(unrelated.thread()), [unrelated])
+
+    def test_thread_is_a_single_query(self):
+        """Test that loading a thread with senders and recipients costs one query."""
+        chain = self._reply_chain(4)
+        with self.assertNumQueries(1):
+            names = [(m.sender.username, m.recipient.username) for m in chain[2].thread()]
+        self.assertEqual(len(names), 5)
+
+    def test_thread_respects_depth_limit(self):
+        """Test that the walk stops after max_depth hops."""
+        chain = self._reply_chain(4)
+        self.assertEqual(list(chain[2].thread(max_depth=1)), chain[1:4])
+
+    def test_thread_walk_stops_at_the_ends_of_the_chain(self):
+        """Test that the recursion only produces one row per message, however deep it may go."""
+        chain = self._reply_chain(3)
+        walk = thread_ids(Message, chain[1].id, THREAD_MAX_DEPTH)
+        with connection.cursor() as cursor:
+            cursor.execute(walk.sql, walk.params)
+            rows = cursor.fetchall()
+        self.assertEqual(sorted(row[0] for row in rows), [message.id for message in chain])
+
+    def test_thread_includes_every_reply_to_a_message(self):
+        """Test that two replies to the same message share one thread, whichever is linked as the reply."""
+        first = Message.objects.create(
+            sender=self.recipient, recipient=self.sender, subject="Re 1", content="Reply", previous_message=self.message
+        )
+        second = Message.objects.create(
+            sender=self.recipient, recipient=self.sender, subject="Re 2", content="Reply", previous_message=self.message
+        )
+        self.message.reply = second
+        self.message.save()
+        for message in (self.message, first, second):
+            self.assertEqual(list(message.thread()), [self.message, first, second])
+
+    def test_mark_read_stamps_thread_with_one_update(self):
+        """Test that a whole thread is marked read by a single UPDATE."""
+        chain = self._reply_chain(4)
+        for message in chain:
+            Conversation.record(message)
+        with CaptureQueriesContext(connection) as queries:
+            Message.mark_read(chain[2].thread(), self.recipient, self.sender.id)
+        message_updates = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "tutorials_message"')
+        ]
+        self.assertEqual(len(message_updates), 1)
+
+    def test_mark_read_updates_counters(self):
+        """Test that reading a thread lowers the unread counter and conversation count."""
+        chain = self._reply_chain(4)
+        for message in chain:
+            Conversation.record(message)
+        self.assertEqual(UnreadCounter.for_user(self.recipient.id), 3)
+
+        changed = Message.mark_read(chain[1].thread(), self.recipient, self.sender.id)
+
+        self.assertEqual(changed, 3)
+        self.assertEqual(UnreadCounter.for_user(self.recipient.id), 0)
+        self.assertEqual(UnreadCounter.for_user(self.sender.id), 2)
+        self.assertEqual(Conversation.objects.get().unread_for(self.recipient), 0)
+        self.assertFalse(Message.objects.filter(recipient=self.recipient, read_at__isnull=True).exists())
+
+    def test_mark_read_is_idempotent(self):
+        """Test that reading the same messages twice changes nothing the second time."""
+        Conversation.record(self.message)
+        Message.mark_read(self.message.thread(), self.recipient, self.sender.id)
+        self.assertEqual(Message.mark_read(self.message.thread(), self.recipient, self.sender.id), 0)
+        self.assertEqual(UnreadCounter.for_user(self.recipient.id), 0)
@@ -0,0 +1,81 @@
+from unittest.mock import patch
+from django.test import TestCase
+from tutorials.forms import RemoveLanguageForm, StudentRequestForm
+from tutorials.models import Language, Tutor, User
+from tutorials.reference_data import reference_data
+
+class ReferenceDataTest(TestCase):
+
+    def setUp(self):
+        reference_data.invalidate()
+        self.python = Language.objects.create(name="Python")
+        self.java = Language.objects.create(name="Java")
+        self.admin = User.objects.create_user(username="@admin", email="admin@example.com", password="Password123", role="admin")
+        self.tutor_user = User.objects.create_user(username="@tutor", email="tutor@example.com", password="Password123", role="tutor")
+
+    def test_languages_are_loaded_once(self):
+        """Test that only the first lookup queries the database."""
+        with self.assertNumQueries(1):
+            self.assertEqual(reference_data.languages(), (self.python, self.java))
+        with self.assertNumQueries(0):
+            reference_data.languages()
+            self.assertEqual(reference_data.language(self.java.id), self.java)
+            self.assertIsNone(reference_data.language(0))
+
+    def test_saving_a_language_reloads_languages(self):
+        """Test that language changes bump the version."""
+        reference_data.languages()
+        ruby = Language.objects.create(name="Ruby")
+        self.assertIn(ruby, reference_data.languages())
+        ruby.delete()
+        self.assertNotIn(ruby, reference_data.languages())
+
+    def test_old_copy_is_reloaded_without_an_invalidation(self):
+        """Test that a change another worker made shows up once the copy is too old."""
+        reference_data.languages()
+        Language.objects.bulk_create([Language(name="Go")])
+        self.assertEqual(len(reference_data.languages()), 2)
+        with patch("tutorials.reference_data.REFERENCE_MAX_AGE", -1):
+            self.assertEqual(len(reference_data.languages()), 3)
+
+    def test_admin_users(self):
+        """Test that the admin list only holds admins."""
+        self.assertEqual(reference_data.admin_users(), (self.admin,))
+
+    def test_demoting_an_admin_reloads_admin_users(self):
+        """Test that a user who stops being an admin leaves the list."""
+        reference_data.admin_users()
+        self.admin.role = "student"
+        self.admin.save()
+        self.assertEqual(reference_data.admin_users(), ())
+
+    def test_login_does_not_reload_admin_users(self):
+        """Test that saves which cannot change the list keep the cache."""
+        reference_data.admin_users()
+        version = reference_data.current_version()
+        self.client.login(username="@admin", password="Password123")
+        self.assertEqual(reference_data.current_version(), version)
+
+    def test_student_request_form_renders_languages_from_cache(self):
+        """Test that the language dropdown renders without a query."""
+        reference_data.languages()
+        with self.assertNumQueries(0):
+            html = str(StudentRequestForm()['language'])
+        self.assertIn("Python", html)
+        self.assertIn("Java", html)
+
+    def test_student_request_form_accepts_language_missing_from_cache(self):
+        """Test that a language unknown to a stale cache is still looked up."""
+        form = StudentRequestForm()
+        field = form.fields['language']
+        reference_data.languages()
+        Language.objects.bulk_create([Language(name="go")])
+        go = Language.objects.get(name="go")
+        self.assertEqual(field.clean(str(go.id)), go)
+
+    def test_remove_language_form_checks_membership(self):
+        """Test that tutors can only remove their own languages."""
+        tutor = Tutor.objects.get(UserID=self.tutor_user)
+        tutor.languages.add(self.python)
+        self.assertTrue(RemoveLanguageForm(data={'language_id': self.python.id}, tutor=tutor).is_valid())
+        self.assertFalse(RemoveLanguageForm(data={'language_id': self.java.id}, tutor=tutor).is_valid())
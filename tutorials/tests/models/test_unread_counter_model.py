@@ -0,0 +1,34 @@
+from django.test import TestCase
+from tutorials.models import UnreadCounter, User
+
+class UnreadCounterModelTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="@reader", email="reader@example.com", password="Password123")
+
+    def test_count_is_zero_without_counter(self):
+        """Test that a user who has never received a message has no unread messages."""
+        self.assertEqual(UnreadCounter.for_user(self.user.id), 0)
+
+    def test_adjust_creates_and_updates_counter(self):
+        """Test that adjusting creates the counter on first use and accumulates."""
+        UnreadCounter.adjust(self.user.id, 2)
+        UnreadCounter.adjust(self.user.id, 3)
+        self.assertEqual(UnreadCounter.for_user(self.user.id), 5)
+        self.assertEqual(UnreadCounter.objects.count(), 1)
+
+    def test_adjust_never_goes_negative(self):
+        """Test that the counter is floored at zero."""
+        UnreadCounter.adjust(self.user.id, 1)
+        UnreadCounter.adjust(self.user.id, -4)
+        self.assertEqual(UnreadCounter.for_user(self.user.id), 0)
+
+    def test_for_user_is_a_single_query(self):
+        """Test that reading the count is one primary-key lookup."""
+        UnreadCounter.adjust(self.user.id, 1)
+        with self.assertNumQueries(1):
+            UnreadCounter.for_user(self.user.id)
+
+    def test_string_representation(self):
+        UnreadCounter.adjust(self.user.id, 2)
+        self.assertEqual(str(UnreadCounter.objects.get()), "@reader - 2 unread")
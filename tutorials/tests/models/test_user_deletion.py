@@ -0,0 +1,95 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from tutorials.deletion import purge_pending, request_deletion
+from tutorials.models import (
+    Conversation, Invoice, InvoiceLine, Language, Lesson, Message, PendingRollup, PendingUserDeletion,
+    Student, StudentRequest, Tutor, TutorAvailability, UnreadCounter, User,
+)
+
+class UserDeletionTest(TestCase):
+
+    def setUp(self):
+        self.tutor_user = User.objects.create_user(username='@tutor', email='tutor@example.com', password='Password123', role='tutor')
+        self.student_user = User.objects.create_user(username='@student', email='student@example.com', password='Password123', role='student')
+        self.other_user = User.objects.create_user(username='@other', email='other@example.com', password='Password123', role='student')
+        self.tutor = Tutor.objects.get(UserID=self.tutor_user)
+        self.student = Student.objects.get(UserID=self.student_user)
+        self.other = Student.objects.get(UserID=self.other_user)
+        self.language = Language.objects.create(name='Python')
+        self.tutor.languages.add(self.language)
+        for student in (self.student, self.other):
+            invoice = Invoice.objects.create(student=student, tutor=self.tutor, total_amount='20')
+            InvoiceLine.objects.create(
+                invoice=invoice, date='2024-12-05', time='14:00', language_name='python',
+                tutor_name='Tutor', duration=60, price='20',
+            )
+            for day in range(1, 6):
+                Lesson.objects.create(
+                    student=student, tutor=self.tutor, language=self.language, date=f'2024-12-0{day}',
+                    time='14:00', venue='Room 101', duration=60, frequency='once a week',
+                    term='sept-christmas', invoice=invoice,
+                )
+        StudentRequest.objects.create(
+            student=self.student, language=self.language, description='More Python.', date='2024-12-15',
+            time='14:00', venue='Room 2', duration=90, frequency='once per fortnight', term='jan-easter',
+        )
+        TutorAvailability.objects.create(tutor=self.tutor, day='2024-12-05', start_time='14:00', end_time='20:00')
+        self.message = Message.objects.create(sender=self.student_user, recipient=self.other_user, subject='Hi', content='Hello')
+        Conversation.record(self.message)
+
+    def test_request_deletion_deactivates_and_queues(self):
+        request_deletion(self.student_user)
+        self.student_user.refresh_from_db()
+        self.assertFalse(self.student_user.is_active)
+        self.assertTrue(PendingUserDeletion.objects.filter(user=self.student_user).exists())
+        self.assertTrue(Lesson.objects.filter(student=self.student).exists())
+
+    def test_purge_removes_student_rows_only(self):
+        request_deletion(self.student_user)
+        self.assertEqual(purge_pending(batch_size=2), 1)
+        self.assertFalse(User.objects.filter(id=self.student_user.id).exists())
+        self.assertFalse(Student.objects.filter(id=self.student.id).exists())
+        self.assertFalse(Lesson.objects.filter(student_id=self.student.id).exists())
+        self.assertFalse(Invoice.objects.filter(student_id=self.student.id).exists())
+        self.assertFalse(StudentRequest.objects.exists())
+        self.assertFalse(Conversation.objects.exists())
+        self.assertEqual(Lesson.objects.filter(student=self.other).count(), 5)
+        self.assertEqual(InvoiceLine.objects.count(), 1)
+        self.message.refresh_from_db()
+        self.assertIsNone(self.message.sender_id)
+        self.assertEqual(self.message.recipient_id, self.other_user.id)
+        self.assertTrue(PendingRollup.objects.filter(tutor_id=self.tutor.id, language_id=self.language.id).exists())
+        self.assertFalse(PendingUserDeletion.objects.exists())
+
+    def test_purge_removes_tutor_and_everything_taught(self):
+        request_deletion(self.tutor_user)
+        purge_pending(batch_size=3)
+        self.assertFalse(Tutor.objects.exists())
+        self.assertFalse(Lesson.objects.exists())
+        self.assertFalse(Invoice.objects.exists())
+        self.assertFalse(InvoiceLine.objects.exists())
+        self.assertFalse(TutorAvailability.objects.exists())
+        self.assertFalse(Tutor.languages.through.objects.exists())
+        self.assertTrue(Student.objects.filter(id=self.student.id).exists())
+
+    def test_purge_removes_unread_counter(self):
+        self.assertEqual(UnreadCounter.for_user(self.other_user.id), 1)
+        request_deletion(self.other_user)
+        purge_pending()
+        self.assertFalse(UnreadCounter.objects.filter(user_id=self.other_user.id).exists())
+
+    def test_reactivated_user_is_not_purged(self):
+        request_deletion(self.student_user)
+        self.student_user.is_active = True
+        self.student_user.save()
+        self.assertEqual(purge_pending(), 0)
+        self.assertTrue(User.objects.filter(id=self.student_user.id).exists())
+        self.assertFalse(PendingUserDeletion.objects.exists())
+
+    def test_command_reports_progress(self):
+        request_deletion(self.student_user)
+        out = StringIO()
+        call_command('purge_deleted_users', '--batch-size', '2', stdout=out)
+        self.assertIn('Processed 2 lessons.', out.getvalue())
+        self.assertIn('Purged 1 users.', out.getvalue())
@@ -0,0 +1,90 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.contrib.auth import authenticate
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from tutorials.imports import hash_passwords, import_users, validate_rows
+from tutorials.models import Student, Tutor, User
+from tutorials.user_suggestions import user_index
+
+class UserImportTest(TestCase):
+
+    def setUp(self):
+        user_index.invalidate()
+        User.objects.create_user(username='@taken', email='taken@example.com', password='Password123')
+        self.rows = [
+            {'username': '@alice', 'email': 'alice@example.com', 'first_name': 'Alice', 'last_name': 'Able', 'role': 'student', 'password': 'Password123'},
+            {'username': '@bob', 'email': 'bob@example.com', 'first_name': 'Bob', 'last_name': 'Baker', 'role': 'tutor', 'password': 'Password123'},
+            {'username': '@carol', 'email': 'carol@example.com', 'first_name': 'Carol', 'last_name': 'Cole', 'role': 'admin', 'password': ''},
+        ]
+
+    def write(self, suffix, text):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w') as output:
+            output.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_validate_rows_reports_bad_and_duplicate_rows(self):
+        rows = self.rows + [
+            {'username': 'no-at', 'email': 'x@example.com', 'first_name': 'X', 'last_name': 'Y'},
+            {'username': '@alice', 'email': 'other@example.com', 'first_name': 'A', 'last_name': 'B'},
+            {'username': '@new', 'email': 'taken@example.com', 'first_name': 'A', 'last_name': 'B'},
+            {'username': '@taken', 'email': 'fresh@example.com', 'first_name': 'A', 'last_name': 'B'},
+            {'username': '@norole', 'email': 'norole@example.com', 'first_name': 'A', 'last_name': 'B', 'role': 'owner'},
+            {'username': '@blank', 'email': 'blank@example.com', 'first_name': '', 'last_name': 'B'},
+        ]
+        valid, errors = validate_rows(rows)
+        self.assertEqual([row['username'] for row in valid], ['@alice', '@bob', '@carol'])
+        self.assertEqual([number for number, _ in errors], [4, 5, 6, 7, 8, 9])
+
+    def test_validate_rows_is_query_bounded(self):
+        rows = [
+            {'username': f'@user{index}', 'email': f'user{index}@example.com', 'first_name': 'A', 'last_name': 'B'}
+            for index in range(200)
+        ]
+        with self.assertNumQueries(2):
+            valid, errors = validate_rows(rows)
+        self.assertEqual(len(valid), 200)
+        self.assertEqual(valid[0]['role'], 'student')
+
+    def test_import_creates_users_and_profiles_in_bulk(self):
+        valid, _ = validate_rows(self.rows)
+        # savepoint, users, students, tutors, release
+        with self.assertNumQueries(5):
+            users = import_users(valid, workers=1)
+        self.assertEqual(len(users), 3)
+        self.assertTrue(Student.objects.filter(UserID__username='@alice').exists())
+        self.assertTrue(Tutor.objects.filter(UserID__username='@bob').exists())
+        self.assertFalse(Student.objects.filter(UserID__username='@carol').exists())
+        self.assertEqual(authenticate(username='@alice', password='Password123'), users[0])
+        self.assertFalse(User.objects.get(username='@carol').has_usable_password())
+        self.assertEqual([result['username'] for result in user_index.search('@b')], ['@bob'])
+
+    def test_hash_passwords_in_processes(self):
+        hashed = hash_passwords(['Password123'] * 70, workers=2)
+        self.assertEqual(len(set(hashed)), 70)
+        self.assertTrue(all(value.startswith('pbkdf2_sha256$') for value in hashed))
+
+    def test_command_imports_jsonl(self):
+        path = self.write('.jsonl', '\n'.join(json.dumps(row) for row in self.rows) + '\n')
+        out = StringIO()
+        call_command('import_users', path, '--workers', '1', stdout=out)
+        self.assertIn('Imported 3 users, skipped 0.', out.getvalue())
+        self.assertEqual(User.objects.count(), 4)
+
+    def test_command_imports_csv(self):
+        path = self.write('.csv', 'username,email,first_name,last_name,role,password\n@dave,dave@example.com,Dave,Day,tutor,Password123\n')
+        call_command('import_users', path, '--workers', '1', stdout=StringIO())
+        self.assertTrue(Tutor.objects.filter(UserID__username='@dave').exists())
+
+    def test_command_refuses_invalid_rows(self):
+        path = self.write('.csv', 'username,email,first_name,last_name\n@taken,new@example.com,A,B\n@erin,erin@example.com,Erin,Eve\n')
+        with self.assertRaises(CommandError):
+            call_command('import_users', path, stdout=StringIO(), stderr=StringIO())
+        self.assertFalse(User.objects.filter(username='@erin').exists())
+        call_command('import_users', path, '--skip-invalid', '--workers', '1', stdout=StringIO(), stderr=StringIO())
+        self.assertTrue(Student.objects.filter(UserID__username='@erin').exists())
@@ -1,7 +1,10 @@
 """Unit tests for the User model."""
+from io import StringIO
+from unittest.mock import patch
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
 from django.test import TestCase
-from tutorials.models import User
+from tutorials.models import User, email_hash
 
 class UserModelTestCase(TestCase):
     """Unit tests for the User model."""
@@ -175,4 +178,28 @@ class UserModelTestCase(TestCase):
             email='testuser@example.com',
             role='student',
         )
-        self.assertEqual(str(user), '@testuser')
\ No newline at end of file
+        self.assertEqual(str(user), '@testuser')
+
+    def test_email_hash_is_stored_on_save(self):
+        self.user.save()
+        self.assertEqual(User.objects.get(id=self.user.id).email_hash, "363c1b0cd64dadffb867236a00e62986")
+
+    def test_email_hash_follows_email_changes(self):
+        self.user.email = "Someone.Else@Example.org "
+        self.user.save(update_fields=["email"])
+        stored = User.objects.get(id=self.user.id)
+        self.assertEqual(stored.email_hash, email_hash("someone.else@example.org"))
+        self.assertTrue(stored.gravatar().startswith(f"https://www.gravatar.com/avatar/{stored.email_hash}?"))
+
+    def test_gravatar_does_not_hash_stored_users(self):
+        self.user.save()
+        user = User.objects.get(id=self.user.id)
+        with patch("tutorials.models.md5_hash") as md5_hash:
+            self.assertEqual(user.gravatar(), self._gravatar_url(size=120))
+        md5_hash.assert_not_called()
+
+    def test_backfill_email_hashes(self):
+        User.objects.update(email_hash='')
+        call_command("backfill_email_hashes", "--batch-size", "2", stdout=StringIO())
+        for user in User.objects.all():
+            self.assertEqual(user.email_hash, email_hash(user.email))
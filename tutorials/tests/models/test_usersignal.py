@@ -1,5 +1,6 @@
 from django.test import TestCase
 from tutorials.models import Student, Tutor, User
+from tutorials.profiles import batch_profiles
 
 class UserRoleSignalTest(TestCase):
     def setUp(self):
@@ -115,4 +116,49 @@ class UserRoleSignalTest(TestCase):
         user.role = self.tutor_role
         user.save()
         self.assertTrue(Tutor.objects.filter(UserID=user).exists())
-        self.assertFalse(Student.objects.filter(UserID=user).exists())
\ No newline at end of file
+        self.assertFalse(Student.objects.filter(UserID=user).exists())
+
+    def test_login_does_not_touch_profiles(self):
+        """Test that the last_login update on login costs no profile queries."""
+        user = User.objects.create_user(username="@loginuser", email="loginuser@example.com", password="Password123")
+        user.last_name = "Changed"
+        with self.assertNumQueries(1):
+            user.save(update_fields=["last_login", "last_name"])
+
+    def test_save_without_role_change_costs_no_profile_queries(self):
+        """Test that saving a loaded user with an unchanged role only runs the update."""
+        User.objects.create(username="@plainsave", email="plainsave@example.com", role=self.tutor_role)
+        user = User.objects.get(username="@plainsave")
+        user.first_name = "Plain"
+        with self.assertNumQueries(1):
+            user.save()
+
+    def test_role_change_on_loaded_user(self):
+        """Test that a role change on a user read from the database swaps the profile."""
+        User.objects.create(username="@loaded", email="loaded@example.com", role=self.student_role)
+        user = User.objects.get(username="@loaded")
+        user.role = self.tutor_role
+        user.save()
+        self.assertTrue(Tutor.objects.filter(UserID=user).exists())
+        self.assertFalse(Student.objects.filter(UserID=user).exists())
+
+    def test_batch_creates_profiles_on_exit(self):
+        """Test that profiles are created in bulk when the batch ends."""
+        with batch_profiles():
+            student = User.objects.create(username="@batchstudent", email="batchstudent@example.com", role=self.student_role)
+            tutor = User.objects.create(username="@batchtutor", email="batchtutor@example.com", role=self.student_role)
+            tutor.role = self.tutor_role
+            tutor.save()
+            self.assertFalse(Student.objects.filter(UserID__in=[student, tutor]).exists())
+        self.assertTrue(Student.objects.filter(UserID=student).exists())
+        self.assertTrue(Tutor.objects.filter(UserID=tutor).exists())
+        self.assertFalse(Student.objects.filter(UserID=tutor).exists())
+
+    def test_batch_swaps_profiles_of_existing_users(self):
+        """Test that role changes inside a batch remove the old profile."""
+        user = User.objects.create(username="@batchswitch", email="batchswitch@example.com", role=self.student_role)
+        with batch_profiles():
+            user.role = self.admin_role
+            user.save()
+        self.assertFalse(Student.objects.filter(UserID=user).exists())
+        self.assertFalse(Tutor.objects.filter(UserID=user).exists())
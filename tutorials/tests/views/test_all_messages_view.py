@@ -1,7 +1,10 @@
+from datetime import timedelta
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
-from tutorials.models import Message
+from django.utils import timezone
+from tutorials.models import Conversation, Message
+from tutorials.views import INBOX_PAGE_SIZE
 
 class AllMessagesViewTests(TestCase):
     fixtures = ['tutorials/tests/fixtures/other_users.json']  # Assuming the fixture file is named `user_fixtures.json`
@@ -16,18 +19,8 @@ class AllMessagesViewTests(TestCase):
         )
 
         # Create test messages
-        self.sent_message = Message.objects.create(
-            sender=self.user,
-            recipient=self.other_user,
-            subject="Sent Message",
-            content="This is a sent message."
-        )
-        self.received_message = Message.objects.create(
-            sender=self.other_user,
-            recipient=self.user,
-            subject="Received Message",
-            content="This is a received message."
-        )
+        self.sent_message = self.send(self.user, self.other_user, "Sent Message")
+        self.received_message = self.send(self.other_user, self.user, "Received Message")
 
         # Log in as the user
         self.client = Client()
@@ -36,6 +29,16 @@ class AllMessagesViewTests(TestCase):
         # Set the URL for the view
         self.url = reverse("all_messages")
 
+    def send(self, sender, recipient, subject):
+        message = Message.objects.create(
+            sender=sender,
+            recipient=recipient,
+            subject=subject,
+            content="Message content."
+        )
+        Conversation.record(message)
+        return message
+
     def test_redirect_if_not_logged_in(self):
         """Test that unauthenticated users are redirected to the login page."""
         self.client.logout()
@@ -47,27 +50,21 @@ class AllMessagesViewTests(TestCase):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "all_messages.html")
-        self.assertIn("sent_messages", response.context)
-        self.assertIn("received_messages", response.context)
+        self.assertIn("conversations", response.context)
+        self.assertIn("next_cursor", response.context)
 
-    def test_sent_messages_context(self):
-        """Test that the sent messages are included in the context."""
+    def test_conversation_context(self):
+        """Test that both directions of a conversation appear as one entry."""
         response = self.client.get(self.url)
-        sent_messages = response.context["sent_messages"]
-        self.assertEqual(len(sent_messages), 1)
-        self.assertEqual(sent_messages[0], self.sent_message)
-        self.assertEqual(sent_messages[0].subject, "Sent Message")
-
-    def test_received_messages_context(self):
-        """Test that the received messages are included in the context."""
-        response = self.client.get(self.url)
-        received_messages = response.context["received_messages"]
-        self.assertEqual(len(received_messages), 1)
-        self.assertEqual(received_messages[0], self.received_message)
-        self.assertEqual(received_messages[0].subject, "Received Message")
+        conversations = response.context["conversations"]
+        self.assertEqual(len(conversations), 1)
+        self.assertEqual(conversations[0].other, self.other_user)
+        self.assertEqual(conversations[0].last_message, self.received_message)
+        self.assertEqual(conversations[0].unread, 1)
+        self.assertContains(response, "Received Message")
 
     def test_no_messages_for_user(self):
-        """Test that the context contains no messages when the user has none."""
+        """Test that the context contains no conversations when the user has none."""
         new_user = get_user_model().objects.create_user(
             username="@newuser",
             password="newpassword123",
@@ -77,9 +74,55 @@ class AllMessagesViewTests(TestCase):
 
         response = self.client.get(reverse("all_messages"))
 
-        sent_messages = response.context["sent_messages"]
-        received_messages = response.context["received_messages"]
-       
-        self.assertEqual(list(sent_messages), [])
-        self.assertEqual(list(received_messages), [])
-        self.assertTemplateUsed(response, "all_messages.html")
\ No newline at end of file
+        self.assertEqual(response.context["conversations"], [])
+        self.assertIsNone(response.context["next_cursor"])
+        self.assertTemplateUsed(response, "all_messages.html")
+
+    def test_keyset_pagination(self):
+        """Test that following the cursor walks every conversation exactly once."""
+        base = timezone.now()
+        for index in range(INBOX_PAGE_SIZE + 5):
+            correspondent = get_user_model().objects.create_user(
+                username=f"@correspondent{index}",
+                password="Password123",
+                email=f"correspondent{index}@example.com"
+            )
+            self.send(correspondent, self.user, f"Message {index}")
+        # Give every conversation the same activity time so paging relies on the id tie-break
+        Conversation.objects.update(last_activity_at=base)
+
+        response = self.client.get(self.url)
+        first_page = response.context["conversations"]
+        self.assertEqual(len(first_page), INBOX_PAGE_SIZE)
+        self.assertIsNotNone(response.context["next_cursor"])
+
+        response = self.client.get(self.url, {"before": response.context["next_cursor"]})
+        second_page = response.context["conversations"]
+        self.assertEqual(len(second_page), 6)
+        self.assertIsNone(response.context["next_cursor"])
+        seen = [conversation.id for conversation in first_page + second_page]
+        self.assertEqual(len(set(seen)), INBOX_PAGE_SIZE + 6)
+
+    def test_most_recent_conversation_first(self):
+        """Test that conversations are ordered by their last activity."""
+        third = get_user_model().objects.create_user(
+            username="@third", password="Password123", email="third@example.com"
+        )
+        self.send(third, self.user, "Newest")
+        Conversation.objects.filter(user_b=third).update(last_activity_at=timezone.now() + timedelta(minutes=1))
+        response = self.client.get(self.url)
+        self.assertEqual(response.context["conversations"][0].other, third)
+
+    def test_malformed_cursor_shows_first_page(self):
+        """Test that an unreadable cursor falls back to the newest conversations."""
+        response = self.client.get(self.url, {"before": "not-a-cursor"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["conversations"]), 1)
+
+    def test_query_count_does_not_grow_with_history(self):
+        """Test that the inbox costs the same regardless of message volume."""
+        for index in range(30):
+            self.send(self.other_user, self.user, f"Extra {index}")
+        # Session, user, one page of conversations and the unread counter for the menu
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
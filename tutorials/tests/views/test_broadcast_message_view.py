@@ -0,0 +1,57 @@
+from unittest.mock import patch
+from django.test import TestCase
+from django.urls import reverse
+from tutorials.models import Broadcast, Language, Message, User
+
+class BroadcastMessageViewTestCase(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='@admin', email='admin@example.com', password='Password123', role='admin'
+        )
+        self.tutor = User.objects.create_user(
+            username='@tutor', email='tutor@example.com', password='Password123', role='tutor'
+        )
+        self.language = Language.objects.create(name='Spanish')
+        self.url = reverse('broadcast_message')
+        self.client.login(username='@admin', password='Password123')
+
+    def test_get_renders_form(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'broadcast_message.html')
+
+    def test_non_admin_redirected(self):
+        self.client.login(username='@tutor', password='Password123')
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+
+    def test_broadcast_to_role_is_sent_immediately(self):
+        response = self.client.post(self.url, {
+            'audience': 'role', 'role': 'tutor', 'subject': 'Welcome', 'content': 'Term starts Monday.'
+        })
+        self.assertRedirects(response, reverse('all_messages'))
+        broadcast = Broadcast.objects.get()
+        self.assertEqual(broadcast.status, 'sent')
+        self.assertEqual(broadcast.target, 'tutor')
+        self.assertTrue(Message.objects.filter(recipient=self.tutor, subject='Welcome').exists())
+
+    def test_language_target_stored_by_name(self):
+        self.client.post(self.url, {
+            'audience': 'language', 'language': self.language.id, 'subject': 'Hola', 'content': 'Hola'
+        })
+        self.assertEqual(Broadcast.objects.get().target, 'spanish')
+
+    def test_missing_target_is_rejected(self):
+        response = self.client.post(self.url, {'audience': 'term', 'subject': 'Hi', 'content': 'Hi'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('term', response.context['form'].errors)
+        self.assertFalse(Broadcast.objects.exists())
+
+    def test_large_audience_is_queued(self):
+        with patch('tutorials.views.BROADCAST_INLINE_LIMIT', 0):
+            self.client.post(self.url, {
+                'audience': 'role', 'role': 'tutor', 'subject': 'Later', 'content': 'Queued.'
+            })
+        self.assertEqual(Broadcast.objects.get().status, 'pending')
+        self.assertFalse(Message.objects.filter(subject='Later').exists())
@@ -0,0 +1,62 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.contrib.messages import get_messages
+from tutorials.models import Student, Tutor, Invoice
+
+User = get_user_model()
+
+class BulkUpdateInvoicesViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tutor_user = User.objects.create_user(
+            username='@tutoruser', email='tutor@example.com', password='tutorpass', role='tutor'
+        )
+        cls.tutor = Tutor.objects.get(UserID=cls.tutor_user)
+        cls.student_user = User.objects.create_user(
+            username='@studentuser', email='student@example.com', password='studentpass', role='student'
+        )
+        cls.student = Student.objects.get(UserID=cls.student_user)
+        cls.admin_user = User.objects.create_user(
+            username='@adminuser', email='admin@example.com', password='adminpass', role='admin'
+        )
+        cls.url = reverse('bulk_update_invoices')
+
+    def setUp(self):
+        self.client = Client()
+        self.invoices = [
+            Invoice.objects.create(student=self.student, tutor=self.tutor, total_amount=10, paid=True)
+            for _ in range(3)
+        ]
+        self.ids = [invoice.id for invoice in self.invoices]
+
+    def test_non_admin_forbidden(self):
+        self.client.login(username='@studentuser', password='studentpass')
+        response = self.client.post(self.url, {'action': 'approve', 'invoice_ids': self.ids})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Invoice.objects.filter(approved=True).exists())
+
+    def test_bulk_approve_reports_changed_count(self):
+        self.client.login(username='@adminuser', password='adminpass')
+        Invoice.approve([self.ids[0]])
+        response = self.client.post(self.url, {'action': 'approve', 'invoice_ids': self.ids})
+        self.assertRedirects(response, f"{reverse('dashboard')}?tab=invoices", fetch_redirect_response=False)
+        self.assertEqual(Invoice.objects.filter(id__in=self.ids, approved=True).count(), 3)
+        messages = [str(message) for message in get_messages(response.wsgi_request)]
+        self.assertIn("2 of 3 invoice(s) approved.", messages)
+
+    def test_bulk_mark_paid(self):
+        self.client.login(username='@adminuser', password='adminpass')
+        Invoice.objects.filter(id__in=self.ids[:2]).update(paid=False)
+        self.client.post(self.url, {'action': 'mark_paid', 'invoice_ids': self.ids})
+        self.assertEqual(Invoice.objects.filter(id__in=self.ids, paid=True).count(), 3)
+
+    def test_invalid_action(self):
+        self.client.login(username='@adminuser', password='adminpass')
+        response = self.client.post(self.url, {'action': 'delete', 'invoice_ids': self.ids})
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_invoice_id(self):
+        self.client.login(username='@adminuser', password='adminpass')
+        response = self.client.post(self.url, {'action': 'approve', 'invoice_ids': ['abc']})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,71 @@
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.contrib.messages import get_messages
+from tutorials.models import Student, Tutor
+from tutorials.reference_data import reference_data
+
+User = get_user_model()
+
+class BulkUpdateUserRolesViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_user(
+            username='@adminuser', email='admin@example.com', password='adminpass', role='admin'
+        )
+        cls.students = [
+            User.objects.create_user(
+                username=f'@student{index}', email=f'student{index}@example.com', password='studentpass', role='student'
+            )
+            for index in range(5)
+        ]
+        cls.ids = [user.id for user in cls.students]
+        cls.url = reverse('bulk_update_user_roles')
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_non_admin_forbidden(self):
+        self.client.login(username='@student0', password='studentpass')
+        response = self.client.post(self.url, {'role': 'tutor', 'user_ids': self.ids})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Tutor.objects.exists())
+
+    def test_bulk_move_to_tutor_swaps_profiles(self):
+        self.client.login(username='@adminuser', password='adminpass')
+        response = self.client.post(self.url, {'role': 'tutor', 'user_ids': self.ids})
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+        self.assertEqual(User.objects.filter(id__in=self.ids, role='tutor').count(), 5)
+        self.assertEqual(Tutor.objects.filter(UserID__in=self.ids).count(), 5)
+        self.assertFalse(Student.objects.filter(UserID__in=self.ids).exists())
+        messages = [str(message) for message in get_messages(response.wsgi_request)]
+        self.assertIn("5 of 5 user(s) moved to tutor.", messages)
+
+    def test_users_already_in_role_are_skipped(self):
+        self.client.login(username='@adminuser', password='adminpass')
+        response = self.client.post(self.url, {'role': 'student', 'user_ids': self.ids[:2] + [self.admin_user.id]})
+        messages = [str(message) for message in get_messages(response.wsgi_request)]
+        self.assertIn("1 of 3 user(s) moved to student.", messages)
+        self.assertTrue(Student.objects.filter(UserID=self.admin_user).exists())
+
+    def test_moving_to_admin_removes_profiles_and_refreshes_admin_list(self):
+        self.client.login(username='@adminuser', password='adminpass')
+        reference_data.admin_users()
+        self.client.post(self.url, {'role': 'admin', 'user_ids': self.ids[:2]})
+        self.assertFalse(Student.objects.filter(UserID__in=self.ids[:2]).exists())
+        self.assertEqual(len(reference_data.admin_users()), 3)
+
+    def test_query_count_does_not_grow_with_users(self):
+        self.client.login(username='@adminuser', password='adminpass')
+        with CaptureQueriesContext(connection) as few:
+            self.client.post(self.url, {'role': 'tutor', 'user_ids': self.ids[:1]})
+        with CaptureQueriesContext(connection) as many:
+            self.client.post(self.url, {'role': 'tutor', 'user_ids': self.ids[1:]})
+        self.assertEqual(len(few), len(many))
+
+    def test_invalid_role_and_ids_rejected(self):
+        self.client.login(username='@adminuser', password='adminpass')
+        self.assertEqual(self.client.post(self.url, {'role': 'owner', 'user_ids': self.ids}).status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'role': 'tutor', 'user_ids': ['x']}).status_code, 400)
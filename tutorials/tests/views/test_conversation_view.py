@@ -0,0 +1,76 @@
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from tutorials.archival import archive_messages
+from tutorials.models import Conversation, Message
+from tutorials.views import INBOX_PAGE_SIZE
+
+class ConversationViewTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="@user", password="Password123", email="user@example.com")
+        self.other_user = User.objects.create_user(username="@other", password="Password123", email="other@example.com")
+        self.outsider = User.objects.create_user(username="@outsider", password="Password123", email="outsider@example.com")
+        self.first_thread = self.send(self.user, self.other_user, "First thread")
+        self.reply = self.send(self.other_user, self.user, "Re: First thread", previous=self.first_thread)
+        self.second_thread = self.send(self.other_user, self.user, "Second thread")
+        self.send(self.outsider, self.user, "Unrelated")
+        self.conversation = Conversation.for_user(self.user).get(user_b=self.other_user)
+        self.url = reverse("conversation", args=[self.conversation.id])
+        self.client.login(username="@user", password="Password123")
+
+    def send(self, sender, recipient, subject, previous=None):
+        message = Message.objects.create(
+            sender=sender, recipient=recipient, subject=subject, content="Content", previous_message=previous
+        )
+        if previous:
+            previous.reply = message
+            previous.save()
+        Conversation.record(message)
+        return message
+
+    def test_lists_every_thread_with_the_correspondent(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "conversation.html")
+        self.assertEqual(response.context["threads"], [self.second_thread, self.first_thread])
+        self.assertContains(response, reverse("message_thread", args=[self.first_thread.id]))
+
+    def test_inbox_links_to_all_threads(self):
+        response = self.client.get(reverse("all_messages"))
+        self.assertContains(response, self.url)
+
+    def test_archived_threads_stay_reachable(self):
+        Message.objects.update(created_at=timezone.now() - timedelta(days=400))
+        archive_messages(timezone.now() - timedelta(days=365))
+        self.assertFalse(Message.objects.exists())
+
+        response = self.client.get(reverse("all_messages"))
+        self.assertContains(response, "This conversation has been archived.")
+        self.assertContains(response, self.url)
+
+        response = self.client.get(self.url)
+        threads = response.context["threads"]
+        self.assertEqual([thread.id for thread in threads], [self.second_thread.id, self.first_thread.id])
+        self.assertTrue(all(thread.archived for thread in threads))
+        self.assertContains(response, reverse("message_thread", args=[self.first_thread.id]))
+        response = self.client.get(reverse("message_thread", args=[self.first_thread.id]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_only_participants_can_view(self):
+        self.client.login(username="@outsider", password="Password123")
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_keyset_pagination(self):
+        for index in range(INBOX_PAGE_SIZE):
+            self.send(self.user, self.other_user, f"Thread {index}")
+        response = self.client.get(self.url)
+        first_page = response.context["threads"]
+        self.assertEqual(len(first_page), INBOX_PAGE_SIZE)
+        response = self.client.get(self.url, {"before": response.context["next_cursor"]})
+        self.assertEqual(response.context["threads"], [self.second_thread, self.first_thread])
+        self.assertIsNone(response.context["next_cursor"])
@@ -1,7 +1,9 @@
+from io import StringIO
+from django.core.management import call_command
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
-from tutorials.models import Student, Lesson, Invoice, StudentRequest, Language, Tutor, TutorAvailability
+from tutorials.models import Student, Lesson, Invoice, StudentRequest, Language, Tutor, TutorAvailability, PendingUserDeletion
 from tutorials.views import get_allocated_lesson, get_unallocated_requests 
 
 User = get_user_model()
@@ -74,8 +76,21 @@ class AdminViewTests(TestCase):
         self.client.login(username="admin_user", password="adminpass")
         response = self.client.post(reverse("delete_user", args=[self.student_user.id]))
         self.assertEqual(response.status_code, 302)
+        self.student_user.refresh_from_db()
+        self.assertFalse(self.student_user.is_active)
+        self.assertTrue(PendingUserDeletion.objects.filter(user=self.student_user).exists())
+        call_command("purge_deleted_users", stdout=StringIO())
         self.assertFalse(User.objects.filter(id=self.student_user.id).exists())
 
+    def test_users_queued_for_deletion_leave_the_dashboard(self):
+        self.client.login(username="admin_user", password="adminpass")
+        for user in (self.student_user, self.tutor_user):
+            self.client.post(reverse("delete_user", args=[user.id]))
+        response = self.client.get(reverse("dashboard"), {"tab": "students"})
+        self.assertEqual(response.context["student_data"], [])
+        self.assertEqual(response.context["tutor_data"], [])
+        self.assertEqual(response.context["lessons_data"], [])
+
     def test_delete_user_as_non_admin(self):
         self.client.login(username="student_user", password="studentpass")
         response = self.client.post(reverse("delete_user", args=[self.tutor_user.id]))
@@ -0,0 +1,115 @@
+import csv
+import io
+import json
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from tutorials.models import Student, Tutor, Language, Invoice, Lesson
+
+User = get_user_model()
+
+class ExportRecordsViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Set up data for the entire TestCase. This method is run once for the TestCase.
+        """
+        cls.language = Language.objects.create(name='English')
+
+        cls.tutor_user = User.objects.create_user(
+            username='@tutoruser',
+            email='tutor@example.com',
+            password='tutorpass',
+            role='tutor'
+        )
+        cls.tutor = Tutor.objects.get(UserID=cls.tutor_user)
+
+        cls.student_user = User.objects.create_user(
+            username='@studentuser',
+            email='student@example.com',
+            password='studentpass',
+            role='student'
+        )
+        cls.student = Student.objects.get(UserID=cls.student_user)
+
+        cls.admin_user = User.objects.create_user(
+            username='@adminuser',
+            email='admin@example.com',
+            password='adminpass',
+            role='admin'
+        )
+
+        cls.paid_invoice = Invoice.objects.create(
+            student=cls.student, tutor=cls.tutor, total_amount=100.00, paid=True, approved=True
+        )
+        cls.unpaid_invoice = Invoice.objects.create(
+            student=cls.student, tutor=cls.tutor, total_amount=50.00, paid=False
+        )
+        cls.lesson = Lesson.objects.create(
+            tutor=cls.tutor, student=cls.student, language=cls.language,
+            date='2025-01-10', price=25.00, invoice=cls.paid_invoice
+        )
+
+    def setUp(self):
+        self.client = Client()
+
+    def _content(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_non_admin_is_forbidden(self):
+        self.client.login(username='@studentuser', password='studentpass')
+        response = self.client.get(reverse('export_records', args=['invoices', 'csv']))
+        self.assertEqual(response.status_code, 403)
+
+    def test_invoices_csv_streams_all_rows(self):
+        self.client.login(username='@adminuser', password='adminpass')
+        response = self.client.get(reverse('export_records', args=['invoices', 'csv']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = self._content(response).strip().splitlines()
+        self.assertTrue(lines[0].startswith('id,student_username'))
+        self.assertEqual(len(lines), 3)
+
+    def test_csv_cells_cannot_start_a_formula(self):
+        self.student_user.first_name = '=HYPERLINK("http://example.com","Click")'
+        self.student_user.save()
+        self.client.login(username='@adminuser', password='adminpass')
+        response = self.client.get(reverse('export_records', args=['invoices', 'csv']), {'paid': 'no'})
+        row = next(csv.DictReader(io.StringIO(self._content(response))))
+        self.assertEqual(row['student_username'], "'@studentuser")
+        self.assertEqual(row['student_first_name'], '\'=HYPERLINK("http://example.com","Click")')
+        self.assertEqual(row['total_amount'], '50.00')
+
+    def test_jsonl_values_are_not_escaped(self):
+        self.client.login(username='@adminuser', password='adminpass')
+        url = reverse('export_records', args=['invoices', 'jsonl'])
+        rows = [json.loads(line) for line in self._content(self.client.get(url)).splitlines()]
+        self.assertEqual(rows[0]['student_username'], '@studentuser')
+
+    def test_invoices_filtered_by_paid(self):
+        self.client.login(username='@adminuser', password='adminpass')
+        response = self.client.get(reverse('export_records', args=['invoices', 'csv']), {'paid': 'no'})
+        lines = self._content(response).strip().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith(f'{self.unpaid_invoice.id},'))
+
+    def test_lessons_jsonl_with_date_range(self):
+        self.client.login(username='@adminuser', password='adminpass')
+        url = reverse('export_records', args=['lessons', 'jsonl'])
+        rows = [json.loads(line) for line in self._content(self.client.get(url, {'from': '2025-01-01'})).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['language'], 'english')
+        self.assertEqual(rows[0]['price'], '25.00')
+        self.assertTrue(rows[0]['invoice_paid'])
+        empty = self._content(self.client.get(url, {'to': '2024-12-31'}))
+        self.assertEqual(empty, '')
+
+    def test_invalid_filter_is_bad_request(self):
+        self.client.login(username='@adminuser', password='adminpass')
+        response = self.client.get(reverse('export_records', args=['lessons', 'csv']), {'from': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_export_is_not_found(self):
+        self.client.login(username='@adminuser', password='adminpass')
+        response = self.client.get(reverse('export_records', args=['users', 'csv']))
+        self.assertEqual(response.status_code, 404)
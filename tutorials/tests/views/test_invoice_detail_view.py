@@ -67,7 +67,6 @@ class InvoiceDetailViewTestCase(TestCase):
 
         # Create lessons for invoice1
         cls.lesson1 = Lesson.objects.create(
-            invoice=cls.invoice1,
             tutor=cls.tutor,
             student=cls.student,
             language=cls.language,
@@ -79,6 +78,7 @@ class InvoiceDetailViewTestCase(TestCase):
             term='sept-christmas',
             price=60.00
         )
+        cls.invoice1.issue(Lesson.objects.filter(id=cls.lesson1.id))
 
     def setUp(self):
         """
@@ -104,9 +104,12 @@ class InvoiceDetailViewTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'invoice_details.html')
         self.assertIn('invoice', response.context)
-        self.assertIn('lessons', response.context)
+        self.assertIn('lines', response.context)
         self.assertEqual(response.context['invoice'], self.invoice1)
-        self.assertEqual(list(response.context['lessons']), [self.lesson1])
+        lines = list(response.context['lines'])
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0].language_name, self.language.name)
+        self.assertEqual(lines[0].tutor_name, self.tutor_user.full_name())
 
     def test_student_access_other_invoice(self):
         """
@@ -130,10 +133,10 @@ class InvoiceDetailViewTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'invoice_details.html')
         self.assertIn('invoice', response.context)
-        self.assertIn('lessons', response.context)
+        self.assertIn('lines', response.context)
         self.assertEqual(response.context['invoice'], self.invoice2)
 
-        self.assertEqual(list(response.context['lessons']), [])
+        self.assertEqual(list(response.context['lines']), [])
 
     def test_other_role_access(self):
         """
@@ -155,3 +158,14 @@ class InvoiceDetailViewTestCase(TestCase):
         self.client.login(username='@adminuser', password='adminpass')
         response = self.client.get(self.invoice_detail_url(invalid_invoice_id))
         self.assertEqual(response.status_code, 404)
+
+    def test_issued_invoice_ignores_later_lesson_changes(self):
+        """
+        Ensure that editing a lesson after issue does not change the rendered invoice.
+        """
+        Lesson.objects.filter(id=self.lesson1.id).update(price=999.00)
+        self.client.login(username='@studentuser', password='studentpass')
+        response = self.client.get(self.invoice_detail_url(self.invoice1.id))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '60.00')
+        self.assertNotContains(response, '999.00')
@@ -0,0 +1,84 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from datetime import timedelta
+from django.utils import timezone
+from tutorials.archival import archive_messages
+from tutorials.models import Conversation, Message, UnreadCounter
+
+class MessageThreadViewTests(TestCase):
+    def setUp(self):
+        self.sender = get_user_model().objects.create_user(
+            username="@sender", password="password123", email="sender@example.com"
+        )
+        self.recipient = get_user_model().objects.create_user(
+            username="@recipient", password="password123", email="recipient@example.com"
+        )
+        self.other_user = get_user_model().objects.create_user(
+            username="@other_user", password="password123", email="other_user@example.com"
+        )
+        self.original_message = Message.objects.create(
+            sender=self.sender, recipient=self.recipient, subject="Original", content="Hello"
+        )
+        self.reply_message = Message.objects.create(
+            sender=self.recipient, recipient=self.sender, subject="Re: Original", content="Hi",
+            previous_message=self.original_message
+        )
+        self.original_message.reply = self.reply_message
+        self.original_message.save()
+        Conversation.record(self.original_message)
+        Conversation.record(self.reply_message)
+        self.url = reverse("message_thread", kwargs={"pk": self.reply_message.id})
+        self.client = Client()
+
+    def test_thread_shows_conversation_in_order(self):
+        self.client.login(username="@sender", password="password123")
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "message_thread.html")
+        self.assertEqual(list(response.context["thread"]), [self.original_message, self.reply_message])
+        self.assertContains(response, "Hello")
+        self.assertContains(response, "Hi")
+
+    def test_thread_forbidden_for_other_users(self):
+        self.client.login(username="@other_user", password="password123")
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+    def test_thread_redirects_when_logged_out(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_viewing_thread_marks_received_messages_read(self):
+        self.client.login(username="@recipient", password="password123")
+        self.client.get(self.url)
+        self.original_message.refresh_from_db()
+        self.reply_message.refresh_from_db()
+        self.assertIsNotNone(self.original_message.read_at)
+        self.assertIsNone(self.reply_message.read_at)
+        self.assertEqual(UnreadCounter.for_user(self.recipient.id), 0)
+        self.assertEqual(UnreadCounter.for_user(self.sender.id), 1)
+
+    def test_unread_count_shown_in_menu(self):
+        self.client.login(username="@sender", password="password123")
+        response = self.client.get(reverse("all_messages"))
+        self.assertEqual(response.context["unread_message_count"], 1)
+        self.assertContains(response, '<span class="badge bg-danger">1</span>', html=True)
+
+    def test_archived_thread_is_still_readable(self):
+        Message.objects.update(created_at=timezone.now() - timedelta(days=400))
+        archive_messages(timezone.now() - timedelta(days=365))
+        self.assertFalse(Message.objects.exists())
+        self.client.login(username="@sender", password="password123")
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["archived"])
+        self.assertEqual([item.id for item in response.context["thread"]], [self.original_message.id, self.reply_message.id])
+        self.assertNotContains(response, reverse("reply_message", kwargs={"reply_id": self.reply_message.id}))
+
+    def test_archived_thread_forbidden_for_other_users(self):
+        Message.objects.update(created_at=timezone.now() - timedelta(days=400))
+        archive_messages(timezone.now() - timedelta(days=365))
+        self.client.login(username="@other_user", password="password123")
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,76 @@
+from unittest.mock import patch
+from django.test import TestCase
+from django.urls import reverse
+from tutorials.models import Conversation, Message, User
+
+class MessageUpdatesViewTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='@reader', email='reader@example.com', password='Password123')
+        self.sender = User.objects.create_user(username='@writer', email='writer@example.com', password='Password123')
+        self.first = self.send('First')
+        self.url = reverse('message_updates')
+        self.client.login(username='@reader', password='Password123')
+
+    def send(self, subject):
+        message = Message.objects.create(sender=self.sender, recipient=self.user, subject=subject, content='Content')
+        Conversation.record(message)
+        return message
+
+    def test_redirects_when_logged_out(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_without_since_returns_latest_id(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.json(), {'since': self.first.id, 'messages': []})
+
+    def test_returns_new_messages_immediately(self):
+        second = self.send('Second')
+        response = self.client.get(self.url, {'since': self.first.id})
+        data = response.json()
+        self.assertEqual(data['since'], second.id)
+        self.assertEqual([message['subject'] for message in data['messages']], ['Second'])
+        self.assertEqual(data['messages'][0]['sender'], '@writer')
+        self.assertEqual(data['unread'], 2)
+
+    def test_only_own_messages_are_returned(self):
+        Message.objects.create(sender=self.user, recipient=self.sender, subject='Outgoing', content='Content')
+        with patch('tutorials.views.LONG_POLL_TIMEOUT', 0):
+            response = self.client.get(self.url, {'since': self.first.id})
+        self.assertEqual(response.json()['messages'], [])
+
+    def test_times_out_with_same_cursor(self):
+        with patch('tutorials.views.LONG_POLL_TIMEOUT', 0):
+            response = self.client.get(self.url, {'since': self.first.id})
+        self.assertEqual(response.json()['since'], self.first.id)
+        self.assertEqual(response.json()['messages'], [])
+
+    def test_answers_after_one_check_under_wsgi(self):
+        delays = []
+
+        async def record_sleep(delay):
+            delays.append(delay)
+
+        with patch('tutorials.views.asyncio.sleep', record_sleep):
+            response = self.client.get(self.url, {'since': self.first.id})
+        self.assertEqual(delays, [])
+        self.assertEqual(response.json()['messages'], [])
+
+    async def test_backs_off_between_checks_under_asgi(self):
+        delays = []
+
+        async def record_sleep(delay):
+            delays.append(delay)
+
+        await self.async_client.aforce_login(self.user)
+        with patch('tutorials.views.LONG_POLL_TIMEOUT', 60), patch('tutorials.views.asyncio.sleep', record_sleep), \
+                patch('tutorials.views._new_messages', side_effect=[[], [], [], [], [{'id': 99}]]):
+            response = await self.async_client.get(self.url, {'since': self.first.id})
+        self.assertEqual(delays, [0.5, 1, 2, 4])
+        self.assertEqual(response.json()['since'], 99)
+
+    def test_invalid_since(self):
+        response = self.client.get(self.url, {'since': 'latest'})
+        self.assertEqual(response.status_code, 400)
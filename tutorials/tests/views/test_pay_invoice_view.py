@@ -101,6 +101,20 @@ class PayInvoiceViewTestCase(TestCase):
 
         self.assertRedirects(response, self.invoice_detail_url(self.invoice.id))
 
+    def test_pay_invoice_post_twice_only_pays_once(self):
+        """
+        Ensure that a repeated POST does not overwrite the first payment.
+        """
+        self.client.login(username='@studentuser', password='studentpass')
+        self.client.post(self.pay_invoice_url(self.invoice.id))
+        Invoice.objects.filter(id=self.invoice.id).update(date_paid='2020-01-01')
+        response = self.client.post(self.pay_invoice_url(self.invoice.id))
+
+        self.invoice.refresh_from_db()
+        self.assertEqual(str(self.invoice.date_paid), '2020-01-01')
+        messages = list(get_messages(response.wsgi_request))
+        self.assertTrue(any(f"Invoice {self.invoice.id} has already been paid." in message.message for message in messages))
+
     def test_pay_invoice_get_as_non_owner(self):
         """
         Ensure that a student cannot access the pay_invoice page for someone else's invoice.
@@ -0,0 +1,69 @@
+from asgiref.sync import iscoroutinefunction
+from django.http import HttpResponse
+from django.test import TestCase
+from django.urls import reverse
+from tutorials.middleware import ProfileMiddleware
+from tutorials.models import Student, Tutor, User
+
+class ProfileMiddlewareTestCase(TestCase):
+
+    def setUp(self):
+        self.tutor_user = User.objects.create_user(
+            username='@tutoruser', email='tutor@example.com', password='Password123', role='tutor'
+        )
+        self.student_user = User.objects.create_user(
+            username='@studentuser', email='student@example.com', password='Password123', role='student'
+        )
+        self.admin_user = User.objects.create_user(
+            username='@adminuser', email='admin@example.com', password='Password123', role='admin'
+        )
+
+    def test_profile_is_the_tutor(self):
+        self.client.login(username='@tutoruser', password='Password123')
+        response = self.client.get(reverse('home'))
+        self.assertEqual(response.wsgi_request.profile, Tutor.objects.get(UserID=self.tutor_user))
+
+    def test_profile_is_the_student(self):
+        self.client.login(username='@studentuser', password='Password123')
+        response = self.client.get(reverse('home'))
+        self.assertEqual(response.wsgi_request.profile, Student.objects.get(UserID=self.student_user))
+
+    def test_admin_and_anonymous_have_no_profile(self):
+        response = self.client.get(reverse('home'))
+        self.assertIsNone(response.wsgi_request.profile)
+        self.client.login(username='@adminuser', password='Password123')
+        response = self.client.get(reverse('home'), follow=True)
+        self.assertIsNone(response.wsgi_request.profile)
+
+    def test_user_and_profile_load_in_one_query(self):
+        """Test that the session user comes with their profile attached."""
+        self.client.login(username='@tutoruser', password='Password123')
+        response = self.client.get(reverse('lessons_on_day_tutor', args=[2025, 1, 6]))
+        self.assertEqual(response.status_code, 200)
+        # session, user with profiles, lessons, unread counter
+        with self.assertNumQueries(4):
+            self.client.get(reverse('lessons_on_day_tutor', args=[2025, 1, 6]))
+
+    def test_session_from_model_backend_still_authenticates(self):
+        self.client.force_login(self.tutor_user, backend='django.contrib.auth.backends.ModelBackend')
+        response = self.client.get(reverse('lessons_on_day_tutor', args=[2025, 1, 6]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user, self.tutor_user)
+
+    def test_middleware_matches_the_mode_of_the_view(self):
+        async def async_view(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(ProfileMiddleware(async_view)))
+        self.assertFalse(iscoroutinefunction(ProfileMiddleware(lambda request: HttpResponse())))
+
+    async def test_profile_is_resolved_in_async_mode(self):
+        await self.async_client.aforce_login(self.student_user)
+        response = await self.async_client.get(reverse('message_updates'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.asgi_request.profile, await Student.objects.aget(UserID=self.student_user))
+
+    def test_student_view_rejects_tutor(self):
+        self.client.login(username='@tutoruser', password='Password123')
+        response = self.client.get(reverse('lessons_on_day', args=[2025, 1, 6]))
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
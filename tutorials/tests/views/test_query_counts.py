@@ -0,0 +1,199 @@
+"""Query-count regression tests: each view must run the same number of queries however much data there is."""
+from datetime import date, time, timedelta
+from django.db import transaction
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from tutorials.language_index import language_index
+from tutorials.models import (
+    Conversation, Invoice, Language, Lesson, Message, StudentRequest, Tutor, TutorAvailability, User,
+)
+from tutorials.profiles import sync_profiles
+from tutorials.reference_data import reference_data
+from tutorials.views import StudentRequestProcessingView
+
+class QueryCountTestCase(TestCase):
+    """Seeds a dataset in growing steps and checks the query count of a view at every step."""
+
+    SIZES = (10, 100, 1000)
+
+    def setUp(self):
+        self.today = date.today()
+        self.language = Language.objects.create(name='python')
+        self.admin_user = User.objects.create_user(
+            username='@admin', email='admin@example.org', first_name='Ada', last_name='Admin', role='admin'
+        )
+        self.tutor_user = User.objects.create_user(
+            username='@tutor', email='tutor@example.org', first_name='Tim', last_name='Tutor', role='tutor'
+        )
+        self.tutor = self.tutor_user.tutor_profile
+        self.tutor.languages.add(self.language)
+        self.student_count = 0
+        self.student_user = None
+        self.student = None
+
+    def _create_users(self, role, usernames):
+        users = User.objects.bulk_create([
+            User(
+                username=username,
+                email=f'{username[1:]}@example.org',
+                first_name=role.title(),
+                last_name=username[1:],
+                role=role,
+                password='!',
+            )
+            for username in usernames
+        ])
+        sync_profiles(users, created=True)
+        return users
+
+    def grow(self, size):
+        """Add students, with a request, a lesson and an invoice each, until there are size of them."""
+        if size <= self.student_count:
+            return
+        start, count = self.student_count, size - self.student_count
+        users = self._create_users('student', [f'@student{index}' for index in range(start, size)])
+        students = [user.student_profile for user in users]
+        if self.student is None:
+            self.student_user, self.student = users[0], students[0]
+
+        # Every other invoice is paid and approved, so each dashboard branch has rows to show
+        invoices = Invoice.objects.bulk_create([
+            Invoice(
+                student=student, tutor=self.tutor, total_amount=20,
+                paid=index % 2 == 0, approved=index % 2 == 0,
+            )
+            for index, student in enumerate(students, start=start)
+        ])
+        Lesson.objects.bulk_create(
+            [
+                Lesson(
+                    student=student, tutor=self.tutor, language=self.language, invoice=invoice,
+                    date=self.today, time=time(16, 0), price=20,
+                )
+                for student, invoice in zip(students, invoices)
+            ]
+            # The first student's calendar and uninvoiced lessons grow with the dataset too
+            + [
+                Lesson(student=self.student, tutor=self.tutor, language=self.language, date=self.today, time=time(18, 0))
+                for _ in range(count // 10)
+            ]
+        )
+        StudentRequest.objects.bulk_create([
+            StudentRequest(
+                student=student, language=self.language, description='Python please', time=time(16, 0),
+                venue='Room 1', duration=60, frequency='once a week', term='sept-christmas',
+            )
+            for student in students
+        ])
+
+        tutors = self._create_users('tutor', [f'@tutor{index}' for index in range(start // 10, size // 10)])
+        Tutor.languages.through.objects.bulk_create([
+            Tutor.languages.through(tutor_id=user.tutor_profile.id, language_id=self.language.id) for user in tutors
+        ])
+        TutorAvailability.objects.bulk_create([
+            TutorAvailability(tutor=self.tutor, day=self.today, start_time=time(9, 0), end_time=time(10, 0))
+            for _ in range(count // 10)
+        ])
+
+        # Languages the tutor teaches, and ones they could add under another name
+        languages = Language.objects.bulk_create(
+            [Language(name=f'language{index}') for index in range(start, size, 10)]
+            + [Language(name=f'dialect{index}') for index in range(start, size, 10)]
+        )
+        self.tutor.languages.add(*[language for language in languages if language.name.startswith('language')])
+        language_index.invalidate()
+        reference_data.invalidate()
+
+        now = timezone.now()
+        Message.objects.bulk_create([
+            Message(sender=self.tutor_user, recipient=user, subject='Welcome', content='Hello') for user in users
+        ])
+        Conversation.record_many(self.tutor_user.id, [user.id for user in users], now)
+        self.student_count = size
+
+    def assertQueryCountsAtEverySize(self, user, cases):
+        """Grow the dataset through SIZES and check every request in cases runs its expected number of queries.
+
+        cases maps a label to an (expected queries, make_request) pair.
+        """
+        self.client.force_login(user)
+        for size in self.SIZES:
+            self.grow(size)
+            for label, (expected, make_request) in cases.items():
+                with self.subTest(size=size, case=label), transaction.atomic():
+                    with self.assertNumQueries(expected):
+                        response = make_request()
+                    self.assertIn(response.status_code, (200, 302))
+                    # Undo any writes so every request starts from the same state
+                    transaction.set_rollback(True)
+
+    def get(self, name, *args, **params):
+        return lambda: self.client.get(reverse(name, args=args), params)
+
+    def test_admin_dashboard(self):
+        self.assertQueryCountsAtEverySize(self.admin_user, {
+            'accounts': (12, self.get('dashboard', tab='accounts')),
+            'tutors': (11, self.get('dashboard', tab='tutors')),
+            'students': (11, self.get('dashboard', tab='students')),
+            'lessons': (11, self.get('dashboard', tab='lessons')),
+            'invoices': (11, self.get('dashboard', tab='invoices')),
+            'lessons by invoice': (10, self.get('dashboard', tab='lessons', sort='invoice', search='student')),
+            'lessons this month': (11, self.get('dashboard', tab='lessons', sort='this month', search='student')),
+        })
+
+    def test_tutor_dashboard(self):
+        self.assertQueryCountsAtEverySize(self.tutor_user, {
+            'lessons': (6, self.get('dashboard', tab='lessons')),
+            'availability': (6, self.get('dashboard', tab='availability')),
+        })
+
+    def test_student_dashboard(self):
+        self.grow(self.SIZES[0])
+        self.assertQueryCountsAtEverySize(self.student_user, {
+            'lessons': (5, self.get('dashboard', tab='lessons')),
+            'calendar': (4, self.get('calendar', self.today.year, self.today.month)),
+        })
+
+    def test_create_invoice(self):
+        self.grow(self.SIZES[0])
+        self.assertQueryCountsAtEverySize(self.admin_user, {
+            'page': (9, self.get('create_invoice', self.student.id)),
+            'submit': (14, lambda: self.client.post(reverse('create_invoice', args=[self.student.id]))),
+        })
+
+    def test_all_messages_view(self):
+        self.assertQueryCountsAtEverySize(self.tutor_user, {
+            'inbox': (4, self.get('all_messages')),
+        })
+
+    def test_manage_languages(self):
+        self.assertQueryCountsAtEverySize(self.tutor_user, {
+            'languages': (4, self.get('manage_languages')),
+            'search': (7, self.get('manage_languages', query='dialect')),
+        })
+
+    def test_process_request(self):
+        self.grow(self.SIZES[0])
+        student_request = StudentRequest.objects.filter(student=self.student).first()
+        # Three weekly lessons up to the end of the term, each with room in the tutor's day
+        term_end = StudentRequestProcessingView.TERM_RANGES['sept-christmas'][1]
+        first_lesson = term_end - timedelta(days=14)
+        TutorAvailability.objects.bulk_create([
+            TutorAvailability(tutor=self.tutor, day=first_lesson + timedelta(days=days), start_time=time(9, 0), end_time=time(21, 0))
+            for days in (0, 7, 14)
+        ])
+        data = {
+            'status': 'accepted',
+            'details': '',
+            'tutor': self.tutor.id,
+            'first_lesson_date_year': first_lesson.year,
+            'first_lesson_date_month': first_lesson.month,
+            'first_lesson_date_day': first_lesson.day,
+            'first_lesson_time': '16:00',
+        }
+        url = reverse('process_request', args=[student_request.id])
+        self.assertQueryCountsAtEverySize(self.admin_user, {
+            'page': (5, lambda: self.client.get(url)),
+            'submit': (18, lambda: self.client.post(url, data)),
+        })
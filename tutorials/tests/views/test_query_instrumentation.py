@@ -0,0 +1,86 @@
+import json
+from django.core.handlers.asgi import ASGIHandler
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from tutorials.models import Language, User
+from tutorials.query_stats import QueryBudgetExceeded, QueryRecorder, fingerprint
+
+class QueryInstrumentationMiddlewareTestCase(TestCase):
+
+    def setUp(self):
+        self.tutor_user = User.objects.create_user(
+            username='@tutoruser', email='tutor@example.com', password='Password123', role='tutor'
+        )
+        self.client.login(username='@tutoruser', password='Password123')
+        self.url = reverse('manage_languages')
+
+    def test_response_has_server_timing_header(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", app;dur=[\d.]+$')
+
+    def test_request_is_logged_as_json(self):
+        with self.assertLogs('tutorials.queries', level='INFO') as logs:
+            self.client.get(self.url)
+        stats = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(stats['view'], 'manage_languages')
+        self.assertEqual(stats['status'], 200)
+        self.assertGreater(stats['queries'], 0)
+        self.assertLessEqual(len(stats['slowest']), 3)
+
+    @override_settings(QUERY_BUDGETS={'manage_languages': 1}, QUERY_BUDGET_ACTION='raise')
+    def test_request_over_budget_raises(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(self.url)
+
+    @override_settings(QUERY_BUDGETS={'manage_languages': 1}, QUERY_BUDGET_ACTION='warn')
+    def test_request_over_budget_logs_a_warning(self):
+        with self.assertLogs('tutorials.queries', level='WARNING') as logs:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('over its budget of 1', logs.output[0])
+
+    async def test_async_view_is_instrumented_through_the_asgi_handler(self):
+        await self.async_client.aforce_login(self.tutor_user)
+        with self.assertLogs('tutorials.queries', level='INFO') as logs:
+            response = await self.async_client.get(reverse('message_updates'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Server-Timing', response)
+        stats = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(stats['view'], 'message_updates')
+        self.assertGreater(stats['queries'], 0)
+
+    @override_settings(DEBUG=True)
+    def test_asgi_middleware_chain_runs_without_a_thread(self):
+        """Test that no middleware makes Django adapt the async chain to sync, as a sync-only one would.
+
+        Django only logs the adaptation with DEBUG on.
+        """
+        with self.assertNoLogs('django.request', level='DEBUG'):
+            ASGIHandler()
+
+    @override_settings(QUERY_INSTRUMENTATION=False)
+    def test_disabled_instrumentation_adds_no_header(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Server-Timing', response)
+
+
+class QueryRecorderTestCase(TestCase):
+
+    def test_repeated_statements_are_reported_as_duplicates(self):
+        Language.objects.create(name='python')
+        with QueryRecorder() as recorder:
+            for _ in range(3):
+                list(Language.objects.all())
+            list(User.objects.all())
+        self.assertEqual(recorder.count, 4)
+        self.assertEqual(len(recorder.duplicates()), 1)
+        self.assertEqual(recorder.duplicates()[0][1], 3)
+        self.assertEqual(len(recorder.slowest()), 3)
+
+    def test_fingerprint_collapses_in_lists(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s,  %s)'),
+            fingerprint('SELECT * FROM t\nWHERE id IN (%s, %s)'),
+        )
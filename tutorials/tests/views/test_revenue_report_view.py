@@ -0,0 +1,62 @@
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from tutorials.models import Student, Tutor, Language, Lesson
+from tutorials.rollups import rebuild_rollups
+
+User = get_user_model()
+
+class RevenueReportViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.language = Language.objects.create(name='English')
+        cls.tutor_user = User.objects.create_user(
+            username='@tutoruser', email='tutor@example.com', password='tutorpass',
+            first_name='Jane', last_name='Smith', role='tutor'
+        )
+        cls.tutor = Tutor.objects.get(UserID=cls.tutor_user)
+        cls.student_user = User.objects.create_user(
+            username='@studentuser', email='student@example.com', password='studentpass', role='student'
+        )
+        cls.student = Student.objects.get(UserID=cls.student_user)
+        cls.admin_user = User.objects.create_user(
+            username='@adminuser', email='admin@example.com', password='adminpass', role='admin'
+        )
+        for day in (date(2024, 10, 1), date(2025, 2, 3)):
+            Lesson.objects.create(tutor=cls.tutor, student=cls.student, language=cls.language, date=day, price=30)
+        rebuild_rollups()
+        cls.url = reverse('revenue_report')
+
+    def test_non_admin_redirected(self):
+        self.client.login(username='@studentuser', password='studentpass')
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+
+    def test_group_by_tutor(self):
+        self.client.login(username='@adminuser', password='adminpass')
+        response = self.client.get(self.url, {'by': 'tutor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'revenue_report.html')
+        rows = response.context['rows']
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['label'], 'Jane Smith')
+        self.assertEqual(rows[0]['lesson_count'], 2)
+
+    def test_group_by_month_filtered_by_year(self):
+        self.client.login(username='@adminuser', password='adminpass')
+        response = self.client.get(self.url, {'by': 'month', 'year': '2025'})
+        rows = response.context['rows']
+        self.assertEqual([row['label'] for row in rows], [date(2025, 2, 1)])
+
+    def test_report_reads_only_rollups(self):
+        self.client.login(username='@adminuser', password='adminpass')
+        self.client.get(self.url)
+        with self.assertNumQueries(4):
+            self.client.get(self.url, {'by': 'language'})
+
+    def test_invalid_grouping(self):
+        self.client.login(username='@adminuser', password='adminpass')
+        response = self.client.get(self.url, {'by': 'student'})
+        self.assertEqual(response.status_code, 400)
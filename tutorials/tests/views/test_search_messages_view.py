@@ -0,0 +1,101 @@
+from datetime import timedelta
+from django.contrib.admin.sites import site
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from tutorials.archival import archive_messages
+from tutorials.models import Message, User
+from tutorials.search import MessageSearchResults, fts_query
+from tutorials.views import SEARCH_PAGE_SIZE
+
+class SearchMessagesViewTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='@reader', email='reader@example.com', password='Password123')
+        self.other = User.objects.create_user(username='@writer', email='writer@example.com', password='Password123')
+        self.stranger = User.objects.create_user(username='@stranger', email='stranger@example.com', password='Password123')
+        self.in_subject = Message.objects.create(
+            sender=self.other, recipient=self.user, subject='Grammar homework', content='Please finish it.'
+        )
+        self.in_content = Message.objects.create(
+            sender=self.user, recipient=self.other, subject='Question', content='Is the grammar homework due Friday?'
+        )
+        Message.objects.create(
+            sender=self.other, recipient=self.stranger, subject='Grammar', content='Not for the reader.'
+        )
+        self.url = reverse('search_messages')
+        self.client.login(username='@reader', password='Password123')
+
+    def test_redirects_when_logged_out(self):
+        self.client.logout()
+        response = self.client.get(self.url, {'q': 'grammar'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_results_are_scoped_and_ranked(self):
+        response = self.client.get(self.url, {'q': 'grammar'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'message_search.html')
+        self.assertEqual(list(response.context['results']), [self.in_subject, self.in_content])
+
+    def test_prefix_and_stemmed_matches(self):
+        response = self.client.get(self.url, {'q': 'homew'})
+        self.assertEqual(len(response.context['results']), 2)
+        response = self.client.get(self.url, {'q': 'finishing'})
+        self.assertEqual(list(response.context['results']), [self.in_subject])
+
+    def test_punctuation_does_not_break_the_query(self):
+        response = self.client.get(self.url, {'q': '"grammar" AND (NEAR'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(fts_query('"grammar" (NEAR'), '"grammar"* "NEAR"*')
+
+    def test_empty_query(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['results']), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.in_subject.subject = 'Vocabulary list'
+        self.in_subject.save()
+        self.in_content.delete()
+        response = self.client.get(self.url, {'q': 'grammar'})
+        self.assertEqual(list(response.context['results']), [])
+        response = self.client.get(self.url, {'q': 'vocabulary'})
+        self.assertEqual(list(response.context['results']), [self.in_subject])
+
+    def test_bulk_created_messages_are_indexed(self):
+        Message.objects.bulk_create([
+            Message(sender=self.other, recipient=self.user, subject=f'Pronunciation {index}', content='Drill')
+            for index in range(SEARCH_PAGE_SIZE + 5)
+        ])
+        response = self.client.get(self.url, {'q': 'pronunciation'})
+        self.assertEqual(response.context['page_obj'].paginator.count, SEARCH_PAGE_SIZE + 5)
+        self.assertEqual(len(response.context['results']), SEARCH_PAGE_SIZE)
+        response = self.client.get(self.url, {'q': 'pronunciation', 'page': 2})
+        self.assertEqual(len(response.context['results']), 5)
+
+    def test_archived_messages_are_found(self):
+        Message.objects.filter(pk=self.in_subject.pk).update(created_at=timezone.now() - timedelta(days=400))
+        archive_messages(timezone.now() - timedelta(days=365))
+        self.assertFalse(Message.objects.filter(pk=self.in_subject.pk).exists())
+        response = self.client.get(self.url, {'q': 'grammar'})
+        results = list(response.context['results'])
+        self.assertEqual([message.id for message in results], [self.in_subject.id, self.in_content.id])
+        self.assertEqual([message.archived for message in results], [True, False])
+        self.assertEqual(response.context['page_obj'].paginator.count, 2)
+        self.assertContains(response, 'Archived')
+
+    def test_page_is_two_queries(self):
+        results = MessageSearchResults(self.user, 'grammar')
+        with self.assertNumQueries(2):
+            page = results[0:10]
+            [message.sender.username for message in page]
+
+    def test_admin_search_uses_full_text_index(self):
+        admin_user = User.objects.create_superuser(
+            username='@boss', email='boss@example.com', password='Password123', role='admin'
+        )
+        request = RequestFactory().get('/')
+        request.user = admin_user
+        model_admin = site._registry[Message]
+        results, _ = model_admin.get_search_results(request, Message.objects.all(), 'friday')
+        self.assertEqual(list(results), [self.in_content])
@@ -0,0 +1,80 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from tutorials.models import Student, Tutor, Language, Invoice, Lesson
+
+User = get_user_model()
+
+class StudentListViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.language = Language.objects.create(name='English')
+        cls.tutor_user = User.objects.create_user(
+            username='@tutoruser', email='tutor@example.com', password='tutorpass', role='tutor'
+        )
+        cls.tutor = Tutor.objects.get(UserID=cls.tutor_user)
+        cls.admin_user = User.objects.create_user(
+            username='@adminuser', email='admin@example.com', password='adminpass', role='admin'
+        )
+        cls.students = []
+        for index in range(3):
+            user = User.objects.create_user(
+                username=f'@student{index}', email=f'student{index}@example.com', password='studentpass',
+                first_name='Student', last_name=f'Number{index}', role='student'
+            )
+            cls.students.append(Student.objects.get(UserID=user))
+
+        first = cls.students[0]
+        Invoice.objects.create(student=first, tutor=cls.tutor, total_amount=30, paid=False)
+        Invoice.objects.create(student=first, tutor=cls.tutor, total_amount=20, paid=False)
+        Invoice.objects.create(student=first, tutor=cls.tutor, total_amount=99, paid=True)
+        cls.next_date = date.today() + timedelta(days=3)
+        for day in (date.today() - timedelta(days=7), cls.next_date, cls.next_date + timedelta(days=7)):
+            Lesson.objects.create(tutor=cls.tutor, student=first, language=cls.language, date=day)
+        cls.url = reverse('student_list')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.login(username='@adminuser', password='adminpass')
+
+    def test_non_admin_redirected(self):
+        self.client.login(username='@tutoruser', password='tutorpass')
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+
+    def test_summaries_are_annotated(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        student = next(s for s in response.context['students'] if s.id == self.students[0].id)
+        self.assertEqual(student.unpaid_invoices, 2)
+        self.assertEqual(student.outstanding_balance, Decimal('50.00'))
+        self.assertEqual(student.next_lesson, self.next_date)
+        other = next(s for s in response.context['students'] if s.id == self.students[1].id)
+        self.assertEqual(other.unpaid_invoices, 0)
+        self.assertEqual(other.outstanding_balance, Decimal('0.00'))
+        self.assertIsNone(other.next_lesson)
+
+    def test_sort_by_outstanding_balance_desc(self):
+        response = self.client.get(self.url, {'sort': 'outstanding_balance', 'dir': 'desc'})
+        self.assertEqual(response.context['students'][0].id, self.students[0].id)
+
+    def test_sort_by_name(self):
+        response = self.client.get(self.url, {'sort': 'name', 'dir': 'desc'})
+        names = [student.UserID.last_name for student in response.context['students']]
+        self.assertEqual(names, ['Number2', 'Number1', 'Number0'])
+
+    def test_invalid_sort_falls_back_to_name(self):
+        response = self.client.get(self.url, {'sort': 'password'})
+        self.assertEqual(response.context['sort'], 'name')
+
+    def test_paginated(self):
+        response = self.client.get(self.url, {'page': 2})
+        self.assertEqual(response.context['page_obj'].number, 1)
+        self.assertEqual(response.context['page_obj'].paginator.per_page, 25)
+
+    def test_query_count_independent_of_students(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(5):
+            self.client.get(self.url)
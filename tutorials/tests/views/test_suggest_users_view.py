@@ -0,0 +1,95 @@
+from unittest.mock import patch
+from django.test import TestCase
+from django.urls import reverse
+from tutorials.models import User
+from tutorials.user_suggestions import MAX_SUGGESTION_LIMIT, user_index
+
+class SuggestUsersViewTestCase(TestCase):
+
+    def setUp(self):
+        user_index.invalidate()
+        self.user = User.objects.create_user(
+            username='@jane', first_name='Jane', last_name='Doe', email='jane@example.com', password='Password123'
+        )
+        User.objects.create_user(
+            username='@jack', first_name='Jack', last_name='Smith', email='jack@example.com', password='Password123'
+        )
+        User.objects.create_user(
+            username='@petra', first_name='Petra', last_name='Janssen', email='petra@example.com', password='Password123'
+        )
+        self.url = reverse('suggest_users')
+        self.client.login(username='@jane', password='Password123')
+
+    def usernames(self, response):
+        return [result['username'] for result in response.json()['results']]
+
+    def test_redirects_when_logged_out(self):
+        self.client.logout()
+        response = self.client.get(self.url, {'q': '@ja'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_matches_username_prefix(self):
+        response = self.client.get(self.url, {'q': '@ja'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(self.usernames(response)), ['@jack', '@jane'])
+
+    def test_matches_names_case_insensitively(self):
+        response = self.client.get(self.url, {'q': 'JANS'})
+        self.assertEqual(self.usernames(response), ['@petra'])
+        response = self.client.get(self.url, {'q': 'jane d'})
+        self.assertEqual(response.json()['results'], [{'username': '@jane', 'name': 'Jane Doe'}])
+
+    def test_user_matching_several_keys_listed_once(self):
+        response = self.client.get(self.url, {'q': 'jane'})
+        self.assertEqual(self.usernames(response).count('@jane'), 1)
+
+    def test_empty_query_returns_nothing(self):
+        response = self.client.get(self.url, {'q': '  '})
+        self.assertEqual(response.json()['results'], [])
+
+    def test_limit_is_applied_and_capped(self):
+        response = self.client.get(self.url, {'q': 'ja', 'limit': '1'})
+        self.assertEqual(len(self.usernames(response)), 1)
+        response = self.client.get(self.url, {'q': 'ja', 'limit': str(MAX_SUGGESTION_LIMIT + 100)})
+        self.assertEqual(response.status_code, 200)
+
+    def test_invalid_limit(self):
+        response = self.client.get(self.url, {'q': 'ja', 'limit': 'many'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_index_follows_user_changes(self):
+        self.client.get(self.url, {'q': 'ja'})
+        User.objects.create_user(
+            username='@jasmine', first_name='Jasmine', last_name='Lee', email='jasmine@example.com', password='Password123'
+        )
+        renamed = User.objects.get(username='@jack')
+        renamed.username = '@zack'
+        renamed.save()
+        User.objects.get(username='@petra').delete()
+        with self.assertNumQueries(0):
+            results = user_index.search('ja')
+        self.assertEqual(sorted(result['username'] for result in results), ['@jane', '@jasmine', '@zack'])
+        self.assertEqual(self.usernames(self.client.get(self.url, {'q': 'janssen'})), [])
+
+    def test_inactive_users_are_not_suggested(self):
+        self.client.get(self.url, {'q': 'ja'})
+        jack = User.objects.get(username='@jack')
+        jack.is_active = False
+        jack.save()
+        self.assertEqual(self.usernames(self.client.get(self.url, {'q': '@ja'})), ['@jane'])
+
+    def test_change_during_load_is_not_lost(self):
+        user_index.invalidate()
+        load = user_index._load
+        petra = User.objects.get(username='@petra')
+
+        def load_then_delete():
+            # The snapshot still holds Petra when the delete is applied to the index
+            snapshot = load()
+            if User.objects.filter(id=petra.id).exists():
+                petra.delete()
+            return snapshot
+
+        with patch.object(user_index, '_load', side_effect=load_then_delete) as patched:
+            self.assertEqual(user_index.search('petra'), [])
+        self.assertEqual(patched.call_count, 2)
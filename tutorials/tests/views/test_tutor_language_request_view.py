@@ -1,12 +1,14 @@
 from django.test import TestCase
 from django.urls import reverse
 from tutorials.forms import TutorLanguageForm, RemoveLanguageForm
+from tutorials.language_index import language_index
 from tutorials.models import User, Tutor, Language, Student
 from django.contrib.messages import get_messages
 
 class tutorLanguageRequestViewTestCase(TestCase):
     """creating a test case to test language forms for tutors"""
     def setUp(self):
+        language_index.invalidate()
         self.tutor_user = User.objects.create_user(
             username="tutor_user",
             email="tutor.user@example.org",
@@ -165,6 +167,15 @@ class tutorLanguageRequestViewTestCase(TestCase):
         actual_matches = [lang.name for lang in search_results]
         self.assertTrue(all(item in actual_matches for item in expected_matches), "All close matches should be included in the results.")
 
+    def test_own_languages_do_not_crowd_out_matches(self):
+        taught = [Language.objects.create(name=f"java{index}") for index in range(5)]
+        self.tutor.languages.add(*taught)
+        javascript = Language.objects.create(name="javascript")
+        response = self.client.get(self.url, {'query': 'java'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(javascript, response.context['search_results'])
+        self.assertFalse(self.tutor.languages.filter(name="java").exists())
+
     def test_remove_language(self):
         response = self.client.post(self.url, self.form_input5, follow=True)
         self.assertEqual(response.status_code, 200)
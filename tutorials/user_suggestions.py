@@ -0,0 +1,126 @@
+"""In-process prefix index of usernames and names for recipient suggestions."""
+import threading
+import time
+from bisect import bisect_left, insort
+
+SUGGESTION_LIMIT = 10
+MAX_SUGGESTION_LIMIT = 20
+# Other worker processes only learn about user changes on their next rebuild
+INDEX_MAX_AGE = 300
+# Loads discarded because a user changed while they ran, before giving up until the next search
+LOAD_ATTEMPTS = 3
+
+
+def index_keys(username, first_name, last_name):
+    """Return the lower-cased strings a user can be found by."""
+    username = username.lower()
+    first_name = first_name.lower()
+    last_name = last_name.lower()
+    keys = {username, username.lstrip('@'), first_name, last_name, f"{first_name} {last_name}".strip()}
+    keys.discard('')
+    return keys
+
+
+class UserPrefixIndex:
+    """Sorted list of (key, user id) pairs searched by binary search.
+
+    The index is loaded from the database with one query on first use and
+    then kept current by the User signals, so a lookup never touches the
+    database. Every change bumps a generation counter, and a load that a
+    change overlapped is thrown away, so a snapshot read before the change
+    cannot overwrite it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = None
+        self._users = {}
+        self._built_at = 0.0
+        self._generation = 0
+
+    def _load(self):
+        from .models import User
+
+        entries = []
+        users = {}
+        for user_id, username, first_name, last_name in User.objects.filter(is_active=True).values_list(
+            'id', 'username', 'first_name', 'last_name'
+        ).iterator():
+            keys = index_keys(username, first_name, last_name)
+            users[user_id] = (username, f"{first_name} {last_name}".strip(), keys)
+            entries.extend((key, user_id) for key in keys)
+        entries.sort()
+        return entries, users
+
+    def _ensure_built(self):
+        for _ in range(LOAD_ATTEMPTS):
+            with self._lock:
+                if self._entries is not None and time.monotonic() - self._built_at <= INDEX_MAX_AGE:
+                    return
+                generation = self._generation
+            entries, users = self._load()
+            with self._lock:
+                if self._generation == generation:
+                    self._entries, self._users = entries, users
+                    self._built_at = time.monotonic()
+                    return
+
+    def invalidate(self):
+        """Drop the index so the next search reloads it."""
+        with self._lock:
+            self._generation += 1
+            self._entries = None
+            self._users = {}
+
+    def _remove_locked(self, user_id):
+        _, _, keys = self._users.pop(user_id, (None, None, ()))
+        for key in keys:
+            position = bisect_left(self._entries, (key, user_id))
+            if position < len(self._entries) and self._entries[position] == (key, user_id):
+                del self._entries[position]
+
+    def update(self, user):
+        """Add or refresh a single user after it has been saved."""
+        with self._lock:
+            self._generation += 1
+            if self._entries is None:
+                return
+            self._remove_locked(user.id)
+            if not user.is_active:
+                return
+            keys = index_keys(user.username, user.first_name, user.last_name)
+            self._users[user.id] = (user.username, user.full_name().strip(), keys)
+            for key in keys:
+                insort(self._entries, (key, user.id))
+
+    def remove(self, user_id):
+        """Forget a deleted user."""
+        with self._lock:
+            self._generation += 1
+            if self._entries is not None:
+                self._remove_locked(user_id)
+
+    def search(self, query, limit=SUGGESTION_LIMIT):
+        """Return up to limit users whose username or name starts with query."""
+        query = query.strip().lower()
+        if not query:
+            return []
+        self._ensure_built()
+        results = []
+        seen = set()
+        with self._lock:
+            entries = self._entries or []
+            position = bisect_left(entries, (query,))
+            while position < len(entries) and len(results) < limit:
+                key, user_id = entries[position]
+                if not key.startswith(query):
+                    break
+                if user_id not in seen:
+                    seen.add(user_id)
+                    username, full_name, _ = self._users[user_id]
+                    results.append({'username': username, 'name': full_name})
+                position += 1
+        return results
+
+
+user_index = UserPrefixIndex()
@@ -1,6 +1,6 @@
-from datetime import date, datetime, time, timedelta
+import asyncio
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
 from django.db.models import Q
-from difflib import get_close_matches
 from itertools import count
 from django.conf import settings
 from django.contrib import messages
@@ -8,13 +8,16 @@ from django.contrib.auth import login, logout, get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.core.exceptions import ImproperlyConfigured
+from django.core.handlers.asgi import ASGIRequest
 from django.db.models.query import QuerySet
 from django.http import HttpResponseBadRequest, HttpResponse, HttpResponseForbidden
 from django.shortcuts import redirect, render, get_object_or_404
 from django.views import View
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse, Http404
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, Count
+from django.db import transaction
+from django.db.models import Q, Count, Sum, Min, F, OuterRef, Prefetch, Subquery, Value, DecimalField
+from django.db.models.functions import Coalesce
 from django.utils.safestring import mark_safe
 from django.core.paginator import Paginator
 
@@ -34,9 +37,18 @@ from tutorials.helpers import login_prohibited
 from django.contrib.auth import get_user_model
 from itertools import chain
 # 
-from .forms import StudentRequestForm, MessageForm, LessonUpdateForm, StudentRequestProcessingForm , TutorAvailabilityForm, TutorLanguageForm, RemoveLanguageForm
-from .models import StudentRequest, Student, Message, Lesson, User, Invoice, Tutor, Lesson, Tutor, Invoice, TutorAvailability, Language
+from .forms import StudentRequestForm, MessageForm, LessonUpdateForm, StudentRequestProcessingForm , TutorAvailabilityForm, TutorLanguageForm, RemoveLanguageForm, BroadcastForm
+from .models import StudentRequest, Student, Message, Lesson, User, Invoice, Tutor, Lesson, Tutor, Invoice, TutorAvailability, Language, LessonRollup, Conversation, UnreadCounter, MessageArchive
 from .utils import generate_calendar, LessonCalendar
+from .term_dates import get_term
+from .exports import DATASETS, FORMATS as EXPORT_FORMATS, parse_filters, stream_export
+from .broadcasts import BROADCAST_INLINE_LIMIT, deliver, resolve_recipients
+from .deletion import request_deletion
+from .language_index import language_index
+from .profiles import change_roles
+from .reference_data import reference_data
+from .search import MessageSearchResults
+from .user_suggestions import MAX_SUGGESTION_LIMIT, SUGGESTION_LIMIT, user_index
 from datetime import date, datetime, timedelta
 import calendar
 from calendar import HTMLCalendar, monthrange
@@ -63,18 +75,31 @@ def dashboard(request):
 
         # Fetch users with optional filters
         User = get_user_model()
-        users = User.objects.all()
+        users = User.objects.filter(pending_deletion__isnull=True)
         if search_query:
             users = users.filter(username__icontains=search_query)
         if sort_query:
             users = users.filter(role=sort_query)
 
-        # Add unallocated requests and invoices for students
-        students = Student.objects.all()
+        # Users queued for deletion are left out of every tab, so they cannot be given new lessons
+        # Add unallocated requests and invoices for students, prefetching each student's latest of both
+        students = Student.objects.filter(UserID__pending_deletion__isnull=True).select_related('UserID').prefetch_related(
+            Prefetch(
+                'classrequest',
+                queryset=StudentRequest.objects.filter(is_allocated=False)
+                .select_related('language').order_by('-created_at')[:1],
+                to_attr='latest_unallocated_requests',
+            ),
+            Prefetch(
+                'classes',
+                queryset=Lesson.objects.select_related('language', 'tutor__UserID', 'invoice').order_by('-created_at')[:1],
+                to_attr='latest_lessons',
+            ),
+        )
         student_data = []
         for student in students:
-            unallocated_request = get_unallocated_requests(student)
-            allocated_lesson = get_allocated_lesson(student)
+            unallocated_request = next(iter(student.latest_unallocated_requests), None)
+            allocated_lesson = next(iter(student.latest_lessons), None)
             invoice = allocated_lesson.invoice if allocated_lesson and allocated_lesson.invoice else None
             student_data.append({
                 'student': student,
@@ -96,37 +121,38 @@ def dashboard(request):
                 if not data['unallocated_request'] and not data['allocated_lesson']
             ]
         
-        tutors = Tutor.objects.all()
+        tutors = (
+            Tutor.objects.filter(UserID__pending_deletion__isnull=True)
+            .select_related('UserID').prefetch_related('languages')
+        )
         tutor_data = [{'tutor': tutor} for tutor in tutors]
 
-        lessons = Lesson.objects.all().order_by('-created_at')
-        lessons_data = [{'lesson': lesson} for lesson in lessons]
+        lessons = (
+            Lesson.objects.filter(
+                student__UserID__pending_deletion__isnull=True, tutor__UserID__pending_deletion__isnull=True
+            )
+            .select_related('language', 'tutor__UserID', 'student__UserID', 'invoice')
+            .order_by('-created_at')
+        )
         if search_all:
-            filtered_lessons = lessons.filter(
+            lessons = lessons.filter(
             Q(student__UserID__first_name__icontains=search_all) |
             Q(student__UserID__last_name__icontains=search_all) |
             Q(tutor__UserID__first_name__icontains=search_all) |
             Q(tutor__UserID__last_name__icontains=search_all)
             )
-            lessons = [{'lesson': lesson} for lesson in filtered_lessons] 
         if sort == 'invoice':
-            unique_invoices = Lesson.objects.values_list('invoice', flat=True).distinct()
+            # Keep the most recent lesson of each invoice, reading the lessons once
+            seen_invoices = set()
             filtered_lessons = []
-            for invoice in unique_invoices:
-                lesson = lessons.filter(invoice=invoice).first()  # Get the first lesson for each unique invoice
-                if lesson:
-                    filtered_lessons.append({'lesson': lesson})
-            lessons = [{'lesson': lesson} for lesson in filtered_lessons]         
-        elif sort == "all":
-            filtered_lessons = [{'lesson': lesson} for lesson in lessons.all()]
-            lessons = [{'lesson': lesson} for lesson in filtered_lessons] 
+            for lesson in lessons:
+                if lesson.invoice_id not in seen_invoices:
+                    seen_invoices.add(lesson.invoice_id)
+                    filtered_lessons.append(lesson)
+            lessons = filtered_lessons
         elif  sort == 'this month':
             now = datetime.now()
-            filtered_lessons = [
-                {'lesson': lesson}
-                for lesson in lessons.filter(date__year=now.year, date__month=now.month).order_by('date')
-            ]
-            lessons = [{'lesson': lesson} for lesson in filtered_lessons] 
+            lessons = lessons.filter(date__year=now.year, date__month=now.month).order_by('date')
                                       
         paginator = Paginator(lessons, 70)  # Show 10 lessons per page
         page_number = request.GET.get('page')
@@ -134,7 +160,7 @@ def dashboard(request):
 
         lessons_data = [{'lesson': lesson} for lesson in page_obj.object_list]
         
-        invoices = Invoice.objects.all()
+        invoices = Invoice.objects.select_related('student__UserID')
         invoices_data = [{'invoice': invoice} for invoice in invoices]
 
 
@@ -156,7 +182,7 @@ def dashboard(request):
 
     elif user.role == 'tutor':
         availabilities = TutorAvailability.objects.filter(tutor__UserID=user)
-        lessons = Lesson.objects.filter(tutor__UserID=user)
+        lessons = Lesson.objects.filter(tutor__UserID=user).select_related('language', 'student__UserID', 'invoice')
         invoice = lessons.first().invoice if lessons.exists() else None
         
         context.update({'lessons': lessons,
@@ -164,7 +190,7 @@ def dashboard(request):
                         'invoice': invoice})
 
     elif user.role == 'student':
-        lessons = Lesson.objects.filter(student__UserID=user)
+        lessons = Lesson.objects.filter(student__UserID=user).select_related('language', 'tutor__UserID', 'invoice')
         lesson = lessons.first()
   
         if lesson:
@@ -181,19 +207,37 @@ def update_user_role(request, user_id):
         user = get_object_or_404(User, id=user_id)
         new_role = request.POST.get('role')
         if new_role in dict(User.ROLE_CHOICES):
-            user.role = new_role
-            user.save()
+            change_roles([user.id], new_role)
             messages.success(request, f"Role updated for {user.username}.")
         return redirect('dashboard')
     if request.user.role != 'admin':
             return HttpResponseForbidden("You do not have permission to perform this action.")
         
+@login_required
+def bulk_update_user_roles(request):
+    """Move a list of users to one role in a single transaction."""
+    if request.user.role != 'admin':
+        return HttpResponseForbidden("You do not have permission to perform this action.")
+    if request.method != "POST":
+        return redirect('dashboard')
+    role = request.POST.get('role')
+    try:
+        user_ids = [int(user_id) for user_id in request.POST.getlist('user_ids')]
+    except ValueError:
+        return HttpResponseBadRequest("Invalid user id.")
+    if role not in dict(User.ROLE_CHOICES):
+        return HttpResponseBadRequest("Invalid role.")
+
+    changed = change_roles(user_ids, role)
+    messages.success(request, f"{changed} of {len(user_ids)} user(s) moved to {role}.")
+    return redirect('dashboard')
+
 @login_required
 def delete_user(request, user_id):
     if request.method == "POST" and request.user.role == 'admin':
         user = get_object_or_404(User, id=user_id)
-        user.delete()
-        messages.success(request, f"User {user.username} deleted successfully.")
+        request_deletion(user)
+        messages.success(request, f"User {user.username} deactivated and queued for deletion.")
         return redirect('dashboard')
     if request.user.role != 'admin':
             return HttpResponseForbidden("You do not have permission to perform this action.")
@@ -214,14 +258,37 @@ def get_allocated_lesson(student):
 def approve_invoice(request, invoice_id):
     if request.user.role != 'admin':
             return HttpResponseForbidden("You do not have permission to perform this action.")
-    invoice = get_object_or_404(Invoice, id=invoice_id)
-    if request.method == "POST" and request.user.role in ['admin']:
-        invoice.approved = True
-        invoice.save()
+    if request.method == "POST" and Invoice.approve([invoice_id]):
         messages.success(request, f"Approved invoice successfully.")
     else:
+        get_object_or_404(Invoice.objects.only('id'), id=invoice_id)
         messages.success(request, f"Invoice already approved.")
     return redirect('dashboard')
+
+BULK_INVOICE_ACTIONS = {
+    'approve': (Invoice.approve, "approved"),
+    'mark_paid': (Invoice.mark_paid, "marked as paid"),
+}
+
+@login_required
+def bulk_update_invoices(request):
+    """Approve or mark as paid a list of invoices with a single UPDATE."""
+    if request.user.role != 'admin':
+        return HttpResponseForbidden("You do not have permission to perform this action.")
+    if request.method != "POST":
+        return redirect(f"{reverse('dashboard')}?tab=invoices")
+    action = BULK_INVOICE_ACTIONS.get(request.POST.get('action'))
+    try:
+        invoice_ids = [int(invoice_id) for invoice_id in request.POST.getlist('invoice_ids')]
+    except ValueError:
+        return HttpResponseBadRequest("Invalid invoice id.")
+    if action is None:
+        return HttpResponseBadRequest("Invalid action.")
+
+    update, verb = action
+    changed = update(invoice_ids)
+    messages.success(request, f"{changed} of {len(invoice_ids)} invoice(s) {verb}.")
+    return redirect(f"{reverse('dashboard')}?tab=invoices")
     
         
 
@@ -235,15 +302,13 @@ def home(request):
 
 @login_required
 def calendar_view(request, year=None, month=None):
-    user = request.user
     today = date.today()
     year = int(year) if year else today.year
     month = int(month) if month else today.month
 
     # Get the Student instance
-    try:
-        student = Student.objects.get(UserID=user)
-    except Student.DoesNotExist:
+    student = request.profile
+    if not isinstance(student, Student):
         # Handle the case where the student profile doesn't exist
         return redirect('dashboard')  # Or an appropriate page
 
@@ -252,7 +317,7 @@ def calendar_view(request, year=None, month=None):
         student=student,
         date__year=year,
         date__month=month
-    )
+    ).select_related('language')
 
     cal = LessonCalendar(lessons, year, month)
     html_cal = cal.formatmonth(year, month)
@@ -286,15 +351,13 @@ def prev_month(year, month):
 
 @login_required
 def tutor_calendar_view(request, year=None, month=None):
-    user = request.user
     today = date.today()
     year = int(year) if year else today.year
     month = int(month) if month else today.month
 
     # Get the Tutor instance
-    try:
-        tutor = Tutor.objects.get(UserID=user)
-    except Tutor.DoesNotExist:
+    tutor = request.profile
+    if not isinstance(tutor, Tutor):
         return redirect('dashboard')
 
     # Fetch lessons for the tutor
@@ -335,12 +398,10 @@ def prev_month(year, month):
 
 @login_required
 def lessons_on_day(request, year, month, day):
-    user = request.user
     date_obj = date(year=int(year), month=int(month), day=int(day))
 
-    try:
-        student = Student.objects.get(UserID=user)
-    except Student.DoesNotExist:
+    student = request.profile
+    if not isinstance(student, Student):
         return redirect('dashboard')
 
     lessons = Lesson.objects.filter(
@@ -352,12 +413,10 @@ def lessons_on_day(request, year, month, day):
 
 @login_required
 def lessons_on_day_tutor(request, year, month, day):
-    user = request.user
     date_obj = date(year=int(year), month=int(month), day=int(day))
 
-    try:
-        tutor = Tutor.objects.get(UserID=user)
-    except Tutor.DoesNotExist:
+    tutor = request.profile
+    if not isinstance(tutor, Tutor):
         return redirect('dashboard')  # Or an appropriate page
 
     lessons = Lesson.objects.filter(
@@ -367,15 +426,64 @@ def lessons_on_day_tutor(request, year, month, day):
     return render(request, 'lessons_on_day_tutor.html', {'lessons': lessons, 'date': date_obj})
 
 
+# Sortable column -> (heading, ORM ordering)
+STUDENT_LIST_COLUMNS = {
+    'username': ('Username', 'UserID__username'),
+    'name': ('Full Name', 'UserID__last_name'),
+    'email': ('Email', 'UserID__email'),
+    'unpaid_invoices': ('Unpaid Invoices', 'unpaid_invoices'),
+    'outstanding_balance': ('Outstanding Balance', 'outstanding_balance'),
+    'lessons_this_term': ('Lessons This Term', 'lessons_this_term'),
+    'next_lesson': ('Next Lesson', 'next_lesson'),
+}
+
+def _student_subquery(queryset, aggregate, default):
+    """Correlate a per-student aggregate so each annotation stays a single subquery."""
+    value = queryset.filter(student=OuterRef('pk')).values('student').annotate(value=aggregate).values('value')
+    return Coalesce(Subquery(value), default) if default is not None else Subquery(value)
+
+def annotate_student_summaries(students, today):
+    """Add invoice and lesson summaries to a student queryset without joining rows together."""
+    try:
+        term = get_term(today)
+        term_lessons = Lesson.objects.filter(date__range=(term['start_date'], term['end_date']))
+        lessons_this_term = _student_subquery(term_lessons, Count('id'), 0)
+    except ValueError:
+        # Outside term time there is no current term to count lessons in
+        lessons_this_term = Value(0)
+    unpaid = Invoice.objects.filter(paid=False)
+    return students.annotate(
+        unpaid_invoices=_student_subquery(unpaid, Count('id'), 0),
+        outstanding_balance=_student_subquery(
+            unpaid, Sum('total_amount'), Value(Decimal('0.00'), output_field=DecimalField())
+        ),
+        lessons_this_term=lessons_this_term,
+        next_lesson=_student_subquery(Lesson.objects.filter(date__gte=today), Min('date'), None),
+    )
+
 @login_required
 def student_list(request):
     if request.user.role != 'admin':
         return redirect('dashboard')
-    # Retrieve all students along with their unpaid invoice count
-    students = Student.objects.annotate(
-        unpaid_invoices=Count('invoices', filter=Q(invoices__paid=False))
-    )
-    return render(request, 'student_list.html', {'students': students})
+    sort = request.GET.get('sort', 'name')
+    if sort not in STUDENT_LIST_COLUMNS:
+        sort = 'name'
+    direction = 'desc' if request.GET.get('dir') == 'desc' else 'asc'
+    order = STUDENT_LIST_COLUMNS[sort][1]
+    order_by = F(order).desc(nulls_last=True) if direction == 'desc' else F(order).asc(nulls_last=True)
+
+    # Retrieve students with their invoice and lesson summaries in one query
+    students = annotate_student_summaries(
+        Student.objects.select_related('UserID'), date.today()
+    ).order_by(order_by, 'id')
+    page_obj = Paginator(students, 25).get_page(request.GET.get('page'))
+    return render(request, 'student_list.html', {
+        'students': page_obj.object_list,
+        'page_obj': page_obj,
+        'columns': [(column, heading) for column, (heading, _) in STUDENT_LIST_COLUMNS.items()],
+        'sort': sort,
+        'dir': direction,
+    })
 
 @login_required
 def set_price(request, student_id):
@@ -402,9 +510,9 @@ def set_price(request, student_id):
 def create_invoice(request, student_id):
     if request.user.role != 'admin':
         return redirect('dashboard')
-    student = get_object_or_404(Student, id=student_id)
+    student = get_object_or_404(Student.objects.select_related('UserID'), id=student_id)
     # Fetch lessons not yet invoiced
-    lessons = Lesson.objects.filter(student=student, invoice__isnull=True)
+    lessons = Lesson.objects.filter(student=student, invoice__isnull=True).select_related('language', 'tutor__UserID')
     tutor = None
     if lessons.exists():
         tutor = lessons.first().tutor
@@ -415,17 +523,14 @@ def create_invoice(request, student_id):
 
     if request.method == 'POST':
         # Create the invoice
-        invoice = Invoice.objects.create(
-            student=student,
-            tutor=tutor,
-            paid=False,
-            total_amount = 0.0,
-        )
-        for lesson in lessons:
-            lesson.invoice = invoice
-            lesson.save()
-            
-        invoice.calculate_total_amount()
+        with transaction.atomic():
+            invoice = Invoice.objects.create(
+                student=student,
+                tutor=tutor,
+                paid=False,
+                total_amount = 0.0,
+            )
+            invoice.issue(lessons)
         messages.success(request, f"Invoice {invoice.id} created for {student.UserID.full_name()}.")
         return redirect('invoice_detail', invoice_id=invoice.id)
 
@@ -440,9 +545,9 @@ def create_invoice(request, student_id):
 @login_required
 def invoice_detail(request, invoice_id):
     # Access Control
-    invoice = get_object_or_404(Invoice, id=invoice_id)
+    invoice = get_object_or_404(Invoice.objects.select_related('student'), id=invoice_id)
     if request.user.role == 'student':
-        if request.user != invoice.student.UserID:
+        if request.user.id != invoice.student.UserID_id:
             return redirect('dashboard')
     elif request.user.role == 'admin':
         # Admins can view any invoice
@@ -451,18 +556,16 @@ def invoice_detail(request, invoice_id):
         # Other roles are not allowed
         return redirect('dashboard')
     
-    lessons = Lesson.objects.filter(invoice=invoice)
+    # Issued invoices are rendered from their snapshot lines only
+    lines = invoice.lines.all()
 
-    
-    return render(request, 'invoice_details.html', {'invoice': invoice , 'lessons': lessons})
+    return render(request, 'invoice_details.html', {'invoice': invoice , 'lines': lines})
 
 
 @login_required
 def student_invoices(request):
-    user = request.user
-    try:
-        student = Student.objects.get(UserID=user)
-    except Student.DoesNotExist:
+    student = request.profile
+    if not isinstance(student, Student):
         messages.error(request, "You are not authorized to view this page.")
         return redirect('dashboard')
 
@@ -472,18 +575,18 @@ def student_invoices(request):
 
 @login_required
 def pay_invoice(request, invoice_id):
-    invoice = get_object_or_404(Invoice, id=invoice_id)
+    invoice = get_object_or_404(Invoice.objects.select_related('student'), id=invoice_id)
 
     # Ensure only the student can pay their own invoice
-    if request.user != invoice.student.UserID:
+    if request.user.id != invoice.student.UserID_id:
         messages.error(request, "You are not authorized to perform this action.")
         return redirect('dashboard')
 
     if request.method == 'POST':
-        invoice.paid = True
-        invoice.date_paid = timezone.now()
-        invoice.save()
-        messages.success(request, f"Invoice {invoice.id} marked as paid.")
+        if Invoice.mark_paid([invoice.id]):
+            messages.success(request, f"Invoice {invoice.id} marked as paid.")
+        else:
+            messages.info(request, f"Invoice {invoice.id} has already been paid.")
         return redirect('invoice_detail', invoice_id=invoice.id)
 
     return render(request, 'pay_invoice.html', {'invoice': invoice})
@@ -500,33 +603,87 @@ def student_invoices_admin(request, student_id):
         'invoices': invoices,
     })
 
+@login_required
+def export_records(request, dataset, fmt):
+    """Stream invoices or lessons as CSV/JSONL for accounting."""
+    if request.user.role != 'admin':
+        return HttpResponseForbidden("You do not have permission to perform this action.")
+    if dataset not in DATASETS or fmt not in EXPORT_FORMATS:
+        raise Http404("Unknown export.")
+    try:
+        filters = parse_filters(request.GET)
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+
+    content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(stream_export(dataset, fmt, filters), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.{fmt}"'
+    return response
+
+REPORT_GROUPINGS = {
+    'tutor': ('tutor_id', 'tutor_name'),
+    'language': ('language_id', 'language_name'),
+    'term': ('term',),
+    'month': ('month',),
+}
+
+@login_required
+def revenue_report(request):
+    """Show lesson hours and revenue totals, read only from the rollup table."""
+    if request.user.role != 'admin':
+        return redirect('dashboard')
+    group_by = request.GET.get('by', 'month')
+    if group_by not in REPORT_GROUPINGS:
+        return HttpResponseBadRequest("Invalid grouping.")
+
+    rollups = LessonRollup.objects.all()
+    year = request.GET.get('year', '')
+    if year.isdigit():
+        rollups = rollups.filter(month__year=int(year))
+    fields = REPORT_GROUPINGS[group_by]
+    rows = list(rollups.values(*fields).annotate(
+        lesson_count=Sum('lesson_count'),
+        lesson_minutes=Sum('lesson_minutes'),
+        amount_invoiced=Sum('amount_invoiced'),
+        amount_paid=Sum('amount_paid'),
+        amount_approved=Sum('amount_approved'),
+    ).order_by(fields[-1]))
+    for row in rows:
+        row['label'] = row[fields[-1]]
+        row['lesson_hours'] = row['lesson_minutes'] / 60
+
+    return render(request, 'revenue_report.html', {
+        'rows': rows,
+        'group_by': group_by,
+        'groupings': REPORT_GROUPINGS,
+        'year': year,
+    })
+
 @login_required
 def manage_languages(request):
     """View to implement fuzzy and filtering for search to add languages and logic for removing with cleaning orphans."""
 
-    if not request.user.is_authenticated or not hasattr(request.user, 'tutor_profile'):
+    tutor = request.profile
+    if not isinstance(tutor, Tutor):
         messages.warning(request, "You must be a tutor to manage languages.")
         return redirect(reverse('dashboard'))
     
-    tutor = request.user.tutor_profile
     query = request.GET.get('query', '').strip()
     languages = tutor.languages.all() 
-    search_results = Language.objects.none()
+    search_results = []
     
     add_form = TutorLanguageForm(initial_query=query)
     remove_form = RemoveLanguageForm(tutor=tutor)
     if query:
 
-        existing_languages = list(Language.objects.values_list('name', flat=True))
-        close_matches = get_close_matches(query, existing_languages, n=5, cutoff=0.4)  # Adjust cutoff for similarity
-        
-  
-        search_results = Language.objects.filter(
-            Q(name__icontains=query) | Q(name__in=close_matches)
-        ).exclude(id__in=languages)
+        # The tutor's own languages are skipped before the match limit, so they cannot crowd out the rest
+        taught = set(languages.values_list('id', flat=True))
+        ranked_ids = language_index.search(query, exclude=taught)
+        found = Language.objects.filter(id__in=ranked_ids).in_bulk()
+        search_results = [found[language_id] for language_id in ranked_ids if language_id in found]
 
         
-        if not search_results.exists():
+        if not search_results:
             new_language, created = Language.objects.get_or_create(name=query)
             tutor.languages.add(new_language)
             if created:
@@ -668,7 +825,7 @@ class PasswordView(LoginRequiredMixin, FormView):
         """Handle valid form by saving the new password."""
 
         form.save()
-        login(self.request, self.request.user)
+        login(self.request, self.request.user, backend=settings.AUTHENTICATION_BACKENDS[0])
         return super().form_valid(form)
 
     def get_success_url(self):
@@ -705,7 +862,7 @@ class SignUpView(LoginProhibitedMixin, FormView):
 
     def form_valid(self, form):
         self.object = form.save()
-        login(self.request, self.object)
+        login(self.request, self.object, backend=settings.AUTHENTICATION_BACKENDS[0])
         return super().form_valid(form)
 
     def get_success_url(self):
@@ -721,8 +878,8 @@ class StudentRequestCreateView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         """attach the logged-in student to the form before saving."""
-        student = getattr(self.request.user, 'student_profile', None)
-        if not student:
+        student = self.request.profile
+        if not isinstance(student, Student):
             messages.error(self.request, "You must have a student profile to submit a request.")
             return redirect('dashboard')
         form.instance.created_at = timezone.now()
@@ -736,8 +893,8 @@ class StudentRequestCreateView(LoginRequiredMixin, CreateView):
     def get_context_data(self, **kwargs) -> dict[str, any]:
         context = super().get_context_data(**kwargs)
         context['form'] = kwargs.get('form', self.get_form())
-        student = getattr(self.request.user, 'student_profile', None)
-        if student and get_allocated_lesson(student):
+        student = self.request.profile
+        if isinstance(student, Student) and get_allocated_lesson(student):
             lesson = get_allocated_lesson(student)
             if lesson.invoice:
                 context["invoice"] = lesson.invoice
@@ -752,11 +909,124 @@ class StudentRequestListView(LoginRequiredMixin, ListView):
 
     def get_queryset(self):
         """filter the requests to show only those created by the logged-in student."""
-        try:
-            student = self.request.user.student_profile
-            return StudentRequest.objects.filter(student=student).order_by('-created_at')
-        except Student.DoesNotExist:
-            return StudentRequest.objects.none() 
+        student = self.request.profile
+        if not isinstance(student, Student):
+            return StudentRequest.objects.none()
+        return StudentRequest.objects.filter(student=student).order_by('-created_at')
+
+LONG_POLL_TIMEOUT = 25
+LONG_POLL_MAX_INTERVAL = 5
+LONG_POLL_BATCH_SIZE = 50
+
+
+async def _new_messages(user_id, since):
+    queryset = (
+        Message.objects.filter(recipient_id=user_id, id__gt=since)
+        .order_by('id')
+        .values('id', 'subject', 'sender__username', 'created_at')[:LONG_POLL_BATCH_SIZE]
+    )
+    return [
+        {
+            'id': row['id'],
+            'subject': row['subject'],
+            'sender': row['sender__username'],
+            'created_at': row['created_at'].isoformat(),
+        }
+        async for row in queryset
+    ]
+
+
+@login_required
+async def message_updates(request):
+    """Poll for messages received after ?since=<id>.
+
+    Without since, answers at once with the newest received id to poll from.
+    Otherwise checks the (recipient, id) index. Under ASGI the check repeats,
+    sleeping with a growing interval, until a message arrives or
+    LONG_POLL_TIMEOUT passes, as a waiting coroutine holds no worker thread.
+    Under WSGI the async view still runs on a worker thread, so it answers
+    after one check and the page spaces out its own polls instead.
+    """
+    user = await request.auser()
+    since = request.GET.get('since')
+    if since is None:
+        latest = await Message.objects.filter(recipient_id=user.id).order_by('-id').values_list('id', flat=True).afirst()
+        return JsonResponse({'since': latest or 0, 'messages': []})
+    try:
+        since = int(since)
+    except ValueError:
+        return JsonResponse({'error': 'since must be a message id'}, status=400)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + (LONG_POLL_TIMEOUT if isinstance(request, ASGIRequest) else 0)
+    interval = 0.5
+    while True:
+        new = await _new_messages(user.id, since)
+        remaining = deadline - loop.time()
+        if new or remaining <= 0:
+            break
+        await asyncio.sleep(min(interval, remaining))
+        interval = min(interval * 2, LONG_POLL_MAX_INTERVAL)
+
+    unread = await UnreadCounter.objects.filter(pk=user.id).values_list('count', flat=True).afirst()
+    return JsonResponse({
+        'since': new[-1]['id'] if new else since,
+        'messages': new,
+        'unread': unread or 0,
+    })
+
+
+SEARCH_PAGE_SIZE = 20
+
+
+@login_required
+def search_messages(request):
+    """Full-text search over the subject and content of the user's own messages."""
+    query = request.GET.get('q', '').strip()
+    paginator = Paginator(MessageSearchResults(request.user, query), SEARCH_PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'message_search.html', {
+        'query': query,
+        'page_obj': page_obj,
+        'results': page_obj.object_list,
+    })
+
+
+@login_required
+def suggest_users(request):
+    """Return recipient suggestions whose username or name starts with ?q=."""
+    try:
+        limit = max(1, min(int(request.GET.get('limit', SUGGESTION_LIMIT)), MAX_SUGGESTION_LIMIT))
+    except ValueError:
+        return JsonResponse({'error': 'limit must be a number'}, status=400)
+    return JsonResponse({'results': user_index.search(request.GET.get('q', ''), limit)})
+
+@login_required
+def broadcast_message(request):
+    """Let an admin message every user with a role, a language or lessons in a term."""
+    if request.user.role != 'admin':
+        messages.error(request, "You do not have permission to send broadcasts.")
+        return redirect('dashboard')
+
+    if request.method == 'POST':
+        form = BroadcastForm(request.POST)
+        if form.is_valid():
+            broadcast = form.save(commit=False)
+            broadcast.sender = request.user
+            broadcast.save()
+            recipient_ids = resolve_recipients(broadcast)
+            if len(recipient_ids) > BROADCAST_INLINE_LIMIT:
+                messages.success(
+                    request,
+                    f"Broadcast to {len(recipient_ids)} users queued. It will be delivered shortly."
+                )
+            else:
+                sent = deliver(broadcast, recipient_ids)
+                messages.success(request, f"Broadcast sent to {sent} users.")
+            return redirect('all_messages')
+    else:
+        form = BroadcastForm()
+    return render(request, 'broadcast_message.html', {'form': form})
 
 class SendMessageView(LoginRequiredMixin, CreateView):
     """View for sending messages"""
@@ -771,7 +1041,7 @@ class SendMessageView(LoginRequiredMixin, CreateView):
         if reply_id:
             reply_message = get_object_or_404(Message, pk=reply_id)
             context['reply_message'] = reply_message
-        context['admin_users'] = User.objects.filter(role = 'admin')
+        context['admin_users'] = reference_data.admin_users()
         return context
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
@@ -794,17 +1064,102 @@ class SendMessageView(LoginRequiredMixin, CreateView):
         return self.render_to_response(self.get_context_data(form=form))
 
 
+INBOX_PAGE_SIZE = 20
+CURSOR_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_inbox_cursor(conversation):
+    """Encode a conversation's position in the inbox as '<microseconds>-<id>'."""
+    micros = (conversation.last_activity_at - CURSOR_EPOCH) // timedelta(microseconds=1)
+    return f"{micros}-{conversation.id}"
+
+
+def decode_inbox_cursor(cursor):
+    """Return the (last_activity_at, id) pair of a cursor, or None if it is malformed."""
+    try:
+        micros, conversation_id = (int(part) for part in cursor.split('-'))
+    except ValueError:
+        return None
+    return CURSOR_EPOCH + timedelta(microseconds=micros), conversation_id
+
+
 class AllMessagesView(LoginRequiredMixin, TemplateView):
-    """Display all sent and received messages."""
+    """Display the user's conversations, most recent first.
+
+    Pages are fetched by keyset on (last_activity_at, id), so each page costs
+    the same however much message history the user has.
+    """
     template_name = 'all_messages.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         user = self.request.user
 
-        context['sent_messages'] = user.sent_messages.all().order_by('-created_at')
-        context['received_messages'] = user.received_messages.all().order_by('-created_at')
-        
+        conversations = (
+            Conversation.for_user(user)
+            .select_related('user_a', 'user_b', 'last_message')
+            .order_by('-last_activity_at', '-id')
+        )
+        cursor = decode_inbox_cursor(self.request.GET.get('before', ''))
+        if cursor:
+            last_activity_at, conversation_id = cursor
+            conversations = conversations.filter(
+                Q(last_activity_at__lt=last_activity_at)
+                | Q(last_activity_at=last_activity_at, id__lt=conversation_id)
+            )
+        page = list(conversations[:INBOX_PAGE_SIZE + 1])
+        has_next = len(page) > INBOX_PAGE_SIZE
+        page = page[:INBOX_PAGE_SIZE]
+        for conversation in page:
+            conversation.other = conversation.other_participant(user)
+            conversation.unread = conversation.unread_for(user)
+
+        context['conversations'] = page
+        context['next_cursor'] = encode_inbox_cursor(page[-1]) if has_next else None
+        context['is_first_page'] = cursor is None
+        return context
+
+class ConversationView(LoginRequiredMixin, TemplateView):
+    """List every thread the user has had with one correspondent, newest first.
+
+    The inbox keeps one row per pair of users, so this is where threads
+    older than the conversation's last message are reached, including
+    those moved to MessageArchive. Threads are paged by keyset on the id of
+    their first message.
+    """
+    template_name = 'conversation.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        user = self.request.user
+        conversation = get_object_or_404(
+            Conversation.for_user(user).select_related('user_a', 'user_b'), pk=self.kwargs['pk']
+        )
+        user_a_id, user_b_id = conversation.user_a_id, conversation.user_b_id
+        between = Q(sender_id=user_a_id, recipient_id=user_b_id) | Q(sender_id=user_b_id, recipient_id=user_a_id)
+        try:
+            before = int(self.request.GET.get('before', ''))
+        except ValueError:
+            before = None
+
+        # Archived messages keep their ids, so one keyset pages through both tables
+        page = []
+        for model in (Message, MessageArchive):
+            threads = model.objects.filter(between, previous_message_id__isnull=True).order_by('-id')
+            if before:
+                threads = threads.filter(id__lt=before)
+            for thread in threads[:INBOX_PAGE_SIZE + 1]:
+                thread.archived = model is MessageArchive
+                page.append(thread)
+        page.sort(key=lambda thread: thread.id, reverse=True)
+        has_next = len(page) > INBOX_PAGE_SIZE
+        page = page[:INBOX_PAGE_SIZE]
+
+        context['conversation'] = conversation
+        context['other'] = conversation.other_participant(user)
+        context['threads'] = page
+        context['next_cursor'] = page[-1].id if has_next else None
+        context['is_first_page'] = before is None
         return context
 
 class MessageDetailView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
@@ -825,6 +1180,9 @@ class MessageDetailView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
         if not message:
             raise ValueError("Message object not found.")
         
+        if message.recipient_id == self.request.user.id and message.sender_id:
+            Message.mark_read(Message.objects.filter(pk=message.pk), self.request.user, message.sender_id)
+
         context['previous_message'] = message.previous_message if message.previous_message else None
         context['next_message'] = message.reply if message.reply else None
 
@@ -836,6 +1194,37 @@ class MessageDetailView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
 
         return context
         
+class MessageThreadView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
+    """Display the whole conversation a message belongs to, archived or not"""
+    model = Message
+    template_name = 'message_thread.html'
+    context_object_name = 'message'
+
+    def test_func(self):
+        """ensure the user is authorized"""
+        message = self.get_object()
+        return self.request.user.id in (message.sender_id, message.recipient_id)
+
+    def get_object(self, queryset=None):
+        if not hasattr(self, 'object'):
+            try:
+                self.object = super().get_object(queryset)
+            except Http404:
+                self.object = get_object_or_404(MessageArchive, pk=self.kwargs['pk'])
+        return self.object
+
+    def get_context_data(self, **kwargs):
+        """Add the conversation, limited to messages the user sent or received."""
+        context = super().get_context_data(**kwargs)
+        user = self.request.user
+        archived = isinstance(self.object, MessageArchive)
+        other_id = self.object.sender_id if self.object.recipient_id == user.id else self.object.recipient_id
+        if other_id and not archived:
+            Message.mark_read(self.object.thread(), user, other_id)
+        context['thread'] = self.object.thread().filter(Q(sender=user) | Q(recipient=user))
+        context['archived'] = archived
+        return context
+
 class StudentRequestProcessingView(LoginRequiredMixin, View):
     """View for processing student requests."""
     today = date.today()
@@ -864,7 +1253,7 @@ class StudentRequestProcessingView(LoginRequiredMixin, View):
 
     def get(self, request, request_id):
         """Display the form for processing a student request."""
-        student_request = get_object_or_404(StudentRequest, id=request_id)
+        student_request = get_object_or_404(StudentRequest.objects.select_related('student__UserID', 'language'), id=request_id)
         form = StudentRequestProcessingForm(student_request=student_request)
 
         return render(request, 'process_request.html', {
@@ -874,7 +1263,7 @@ class StudentRequestProcessingView(LoginRequiredMixin, View):
 
     def post(self, request, request_id):
         """Handle the form submission for processing a student request."""
-        student_request = get_object_or_404(StudentRequest, id=request_id)
+        student_request = get_object_or_404(StudentRequest.objects.select_related('student__UserID', 'language'), id=request_id)
         form = StudentRequestProcessingForm(request.POST, student_request=student_request)
 
         if form.is_valid():
@@ -1111,9 +1500,8 @@ class TutorAvailabilityView(LoginRequiredMixin, View):
     template = 'tutor_availability_request.html'
 
     def get(self, request, availability_id=None):
-        try:
-            tutor = Tutor.objects.get(UserID=request.user)
-        except Tutor.DoesNotExist:
+        tutor = request.profile
+        if not isinstance(tutor, Tutor):
             return redirect("dashboard")
         
         availabilities = TutorAvailability.objects.filter(tutor=tutor)
@@ -1125,7 +1513,7 @@ class TutorAvailabilityView(LoginRequiredMixin, View):
                 return HttpResponseBadRequest("Invalid availability ID.")
             if action == 'edit':
                 availability = get_object_or_404(TutorAvailability, id=availability_id, tutor=tutor)
-                form = TutorAvailabilityForm(instance=availability, user=request.user)
+                form = TutorAvailabilityForm(instance=availability, tutor=tutor)
             elif action == 'delete':
                 availability = get_object_or_404(TutorAvailability, id=availability_id)
                 availability.delete()
@@ -1133,7 +1521,7 @@ class TutorAvailabilityView(LoginRequiredMixin, View):
             else:
                 return HttpResponseBadRequest("Invalid action.")
         else:
-            form = TutorAvailabilityForm(initial={'tutor': tutor}, user=request.user)
+            form = TutorAvailabilityForm(initial={'tutor': tutor}, tutor=tutor)
 
         context = {
             "tutor": tutor,
@@ -1153,16 +1541,15 @@ class TutorAvailabilityView(LoginRequiredMixin, View):
         ).exists()
 
     def post(self, request, availability_id=None):
-        try:
-            tutor = Tutor.objects.get(UserID=request.user)
-        except Tutor.DoesNotExist:
+        tutor = request.profile
+        if not isinstance(tutor, Tutor):
             return redirect(f"{reverse('dashboard')}?tab=availability")
 
         if availability_id:
             availability = get_object_or_404(TutorAvailability, id=availability_id, tutor=tutor)
-            form = TutorAvailabilityForm(request.POST, instance=availability, user=request.user)
+            form = TutorAvailabilityForm(request.POST, instance=availability, tutor=tutor)
         else:
-            form = TutorAvailabilityForm(request.POST, initial={'tutor': Tutor.objects.get(UserID=request.user)}, user=request.user)
+            form = TutorAvailabilityForm(request.POST, initial={'tutor': tutor}, tutor=tutor)
 
         if form.is_valid():
             new_availability = form.save(commit=False)